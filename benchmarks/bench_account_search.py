@@ -0,0 +1,107 @@
+"""Hesap planı search latency: AccountIndex vs a linear scan, on a generated chart.
+
+    python benchmarks/bench_account_search.py --accounts 50000
+
+The chart is the seed accounts plus client sub-accounts (120.01.0457 style)
+named after generated companies. The linear scan is what search_account did
+before, with difflib added for typos, since a plain substring match misses
+them.
+"""
+import argparse
+import difflib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.hesap_plani import AccountIndex
+from utils.turkish import tokenize
+
+MAIN_ACCOUNTS = {
+    "100": "KASA", "102": "BANKALAR", "120": "ALICILAR", "121": "ALACAK SENETLERİ",
+    "191": "İNDİRİLECEK KDV", "320": "SATICILAR", "321": "BORÇ SENETLERİ",
+    "335": "PERSONELE BORÇLAR", "360": "ÖDENECEK VERGİ VE FONLAR", "391": "HESAPLANAN KDV",
+    "600": "YURTİÇİ SATIŞLAR", "770": "GENEL YÖNETİM GİDERLERİ",
+}
+NAMES = [
+    "Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Öztürk", "Aydın", "Özdemir", "Arslan",
+    "Doğan", "Kılıç", "Aslan", "Çetin", "Kara", "Koç", "Kurt", "Özkan", "Şimşek", "Polat",
+]
+SECTORS = [
+    "İnşaat", "Gıda", "Tekstil", "Otomotiv", "Lojistik", "Danışmanlık", "Yazılım", "Mobilya",
+    "Temizlik", "Turizm", "Kuyumculuk", "Eczane", "Matbaa", "Elektrik", "Tarım", "Madencilik",
+]
+FORMS = ["Ltd. Şti.", "A.Ş.", "Ticaret", "Sanayi ve Ticaret"]
+
+QUERIES = [
+    ("exact", "alıcılar"),
+    ("no diacritics", "alicilar"),
+    ("typo", "alcilar"),
+    ("typo", "mobilye"),
+    ("two words", "yilmaz insaat"),
+    ("prefix", "120.01"),
+]
+
+
+def make_chart(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    accounts = [{"code": code, "name": name} for code, name in MAIN_ACCOUNTS.items()]
+    for i in range(n - len(accounts)):
+        main = rng.choice(["120", "320", "335", "600"])
+        company = f"{rng.choice(NAMES)} {rng.choice(SECTORS)} {rng.choice(FORMS)}".upper()
+        accounts.append({"code": f"{main}.{i // 9999 + 1:02d}.{i % 9999 + 1:04d}", "name": company})
+    return accounts
+
+
+def linear_search(accounts, query: str):
+    if query[0].isdigit():
+        return [a for a in accounts if a["code"].startswith(query)]
+    words = tokenize(query)
+    results = []
+    for account in accounts:
+        names = tokenize(account["name"])
+        if all(any(w in n or difflib.SequenceMatcher(None, w, n).ratio() >= 0.75 for n in names)
+               for w in words):
+            results.append(account)
+    return results
+
+
+def timed(func, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--skip-linear", action="store_true", help="the linear scan takes minutes")
+    args = parser.parse_args()
+
+    accounts = make_chart(args.accounts)
+    start = time.perf_counter()
+    index = AccountIndex(accounts)
+    print(f"index build: {len(index)} accounts in {time.perf_counter() - start:.2f} s")
+
+    print(f"{'query':>14} {'text':>14} {'resolve ms':>11} {'top10 ms':>9} {'hits':>6} {'linear ms':>10}")
+    for kind, query in QUERIES:
+        if query[0].isdigit():
+            resolve_s = 0.0
+            top_s, (hits, _) = timed(lambda: index.search(query), args.repeat)
+        else:
+            words = tokenize(query)
+            resolve_s, _ = timed(lambda: [index._expand(w) for w in words], args.repeat)
+            top_s, (hits, _) = timed(lambda: index.search("", words), max(args.repeat // 10, 1))
+        linear = "-"
+        if not args.skip_linear:
+            linear_s, _ = timed(lambda: linear_search(accounts, query), 1)
+            linear = f"{linear_s * 1000:.0f}"
+        print(f"{kind:>14} {query:>14} {resolve_s * 1000:>11.3f} {top_s * 1000:>9.2f} {hits:>6} {linear:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Recall@k and query latency of the VectorStore index types against flat search.
+
+    python benchmarks/bench_ann_index.py --sizes 10000,100000,1000000 --dim 128
+
+Vectors are drawn from a Gaussian mixture (clustered like real embeddings)
+and L2-normalized. Every ANN index is compared with exact IndexFlatL2
+results for the same queries, across a sweep of nprobe / efSearch values.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory.index_factory import create_index, set_search_params
+
+SWEEPS = {
+    "flat": [{}],
+    "ivf_flat": [{"nprobe": n} for n in (1, 4, 16, 64)],
+    "ivf_pq": [{"nprobe": n} for n in (1, 4, 16, 64)],
+    "hnsw": [{"ef_search": e} for e in (16, 32, 64, 128)],
+}
+
+
+def make_vectors(n: int, dim: int, rng: np.random.Generator, n_clusters: int = 256) -> np.ndarray:
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, n)
+    vectors = centers[labels] + 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--types", default="flat,ivf_flat,ivf_pq,hnsw")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'size':>8} {'index':>8} {'param':>14} {'build s':>8} {'recall@' + str(args.k):>10} {'ms/query':>9}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        data = make_vectors(size, args.dim, rng)
+        queries = make_vectors(args.queries, args.dim, rng)
+
+        exact = create_index("flat", args.dim)
+        exact.add(data)
+        _, truth = exact.search(queries, args.k)
+
+        for index_type in args.types.split(","):
+            start = time.perf_counter()
+            index = create_index(index_type, args.dim, size)
+            if not index.is_trained:
+                # Train on a sample, as VectorStore does at its threshold
+                index.train(data[rng.choice(size, min(size, 100000), replace=False)])
+            index.add(data)
+            build = time.perf_counter() - start
+
+            for params in SWEEPS[index_type]:
+                set_search_params(index, **params)
+                start = time.perf_counter()
+                _, found = index.search(queries, args.k)
+                latency = (time.perf_counter() - start) * 1000 / len(queries)
+                label = ",".join(f"{k}={v}" for k, v in params.items()) or "-"
+                print(f"{size:>8} {index_type:>8} {label:>14} {build:>8.2f} "
+                      f"{recall_at_k(found, truth):>10.3f} {latency:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Prompt size over a long chat: ContextBuilder's token budget vs sending all history and chunks.
+
+    python benchmarks/bench_context.py --turns 100 --budget 3000
+
+"unbounded" is every earlier turn plus every retrieved chunk, which grows
+with the conversation. "budgeted" is ContextBuilder with a summarizer that
+only counts its calls, to show how rarely the rolling summary is redone.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat.context import ContextBuilder
+from utils.tokens import count_tokens
+
+WORDS = ("stopaj oranı matrah tevkifat beyanname kdv muhtasar geçici vergi hesap kodu fatura tutar "
+         "istisna mükellef dönem tahakkuk ödeme süre gecikme faizi ceza indirim").split()
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+async def run(args):
+    rng = random.Random(0)
+    calls = []
+
+    async def summarize(previous, turns):
+        calls.append(len(turns))
+        return (previous + " " if previous else "") + f"{len(turns)} mesajlık özet."
+
+    builder = ContextBuilder(summarize=summarize, max_tokens=args.budget)
+    history = []
+    unbounded, budgeted, build_s = [], [], 0.0
+    for i in range(args.turns):
+        question = sentence(rng, rng.randint(8, 30))
+        chunks = [sentence(rng, 250) for _ in range(args.chunks)]
+        history.append([question, None])
+
+        start = time.perf_counter()
+        prompt = await builder.build(question, history, chunks, "bench")
+        build_s += time.perf_counter() - start
+        budgeted.append(prompt["tokens"])
+
+        everything = [turn for pair in history[:-1] for turn in pair] + chunks + [question]
+        unbounded.append(sum(count_tokens(text) for text in everything))
+        history[-1][1] = " ".join(sentence(rng, rng.randint(20, 80)) for _ in range(3))
+
+    print(f"{'turn':>5} {'unbounded':>10} {'budgeted':>9}")
+    for i in sorted({0, 9, args.turns // 4, args.turns // 2, args.turns - 1}):
+        print(f"{i + 1:>5} {unbounded[i]:>10,} {budgeted[i]:>9,}")
+    print(f"max budgeted prompt: {max(budgeted):,} tokens (budget {args.budget:,})")
+    print(f"build: {build_s / args.turns * 1000:.2f} ms per request; "
+          f"summary recomputed {len(calls)} times in {args.turns} turns")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--chunks", type=int, default=6)
+    parser.add_argument("--budget", type=int, default=3000)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Upcoming-deadline queries across many clients: DeadlineIndex bisect vs a full scan.
+
+    python benchmarks/bench_deadlines.py --clients 500
+
+The full scan is what DeadlineTracker.check did before: walk every stored
+deadline and strptime its "dd.mm.yyyy" date on each call.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+OBLIGATIONS = {
+    "KDV": ["monthly", "quarterly"],
+    "Muhtasar": ["monthly", "quarterly"],
+    "Geçici Vergi": ["quarterly"],
+    "Ba-Bs": ["monthly"],
+    "Kurumlar Vergisi": ["yearly"],
+}
+
+
+def make_clients(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"m{i:04d}",
+            "name": f"Mükellef {i}",
+            "obligations": {name: rng.choice(periods) for name, periods in OBLIGATIONS.items()},
+        }
+        for i in range(n)
+    ]
+
+
+def full_scan(rows, start: datetime, end: datetime):
+    found = []
+    for row in rows:
+        due = datetime.strptime(row["date"], "%d.%m.%Y")
+        if start <= due <= end:
+            found.append(row)
+    return sorted(found, key=lambda row: row["date"])
+
+
+def timed(func, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--days", default="7,14,30")
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())
+    from tools.deadline_tracker import DeadlineTracker
+
+    tracker = DeadlineTracker()
+    tracker.clients = make_clients(args.clients)
+    today = date.today()
+    start = time.perf_counter()
+    tracker.generate(today, today + timedelta(days=400))
+    print(f"generated {len(tracker.index)} deadlines for {args.clients} clients "
+          f"in {time.perf_counter() - start:.2f} s")
+
+    rows = [{**d, "date": d["date"].strftime("%d.%m.%Y")} for d in tracker.index]
+    print(f"{'days':>5} {'due':>6} {'index ms':>9} {'full scan ms':>13}")
+    for days in (int(d) for d in args.days.split(",")):
+        index_s, found = timed(lambda: tracker.upcoming(days, today), args.repeat)
+        midnight = datetime.combine(today, datetime.min.time())
+        scan_s, scanned = timed(lambda: full_scan(rows, midnight, midnight + timedelta(days=days)),
+                                max(args.repeat // 20, 1))
+        assert len(found) == len(scanned)
+        print(f"{days:>5} {len(found):>6} {index_s * 1000:>9.3f} {scan_s * 1000:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Invoice field extraction: legacy per-field searches vs the shared FieldExtractor.
+
+    python benchmarks/bench_field_extraction.py --pages 1,50,500 --repeat 20
+
+The legacy approach is the one PDFParser used before: one uncompiled
+re.search per field, string results. The "one pass" column runs the same
+fields as a single combined alternation, scanning the text once; it is kept
+here to show why FieldExtractor searches field by field instead. The
+company and date are in the header and the totals on the last page, as on
+real invoices; one run drops the company line, so that field is searched
+through the whole text without a match.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.pdf_parser import INVOICE_FIELDS
+
+HEADER = "SAYIN\nÖrnek Ticaret Ltd. Şti.\nFatura Tarihi: 15.01.2024\n"
+LINE = "{i}. Ofis malzemesi A4 kağıt 80 gr, 10 paket x 125,50 = 1.255,00\n"
+FOOTER = (
+    "Mal Hizmet Toplam Tutarı 12.550,00 TL\nHesaplanan KDV (%20) 2.510,00 TL\n"
+    "Vergiler Dahil Toplam Tutar 15.060,00 TL\n"
+)
+LINES_PER_PAGE = 40
+
+
+def legacy_extract(text: str) -> dict:
+    date_match = re.search(r'\d{2}[./]\d{2}[./]\d{4}', text)
+    amount_match = re.search(r'(?:TOPLAM|TUTAR)[^\d]*(\d+(?:\.\d{2})?)', text)
+    vat_match = re.search(r'KDV[^\d]*(\d+(?:\.\d{2})?)', text)
+    company_match = re.search(r'(?:SAYIN|FİRMA)[^\n]*\n([^\n]+)', text)
+    return {
+        "tarih": date_match.group(0) if date_match else "Bulunamadı",
+        "tutar": amount_match.group(1) if amount_match else "Bulunamadı",
+        "kdv": vat_match.group(1) if vat_match else "Bulunamadı",
+        "firma": company_match.group(1).strip() if company_match else "Bulunamadı",
+    }
+
+
+def one_pass_extract(text: str) -> dict:
+    """The same fields as one alternation: leftmost match wins, then rescan without it."""
+    found = {}
+    pending = dict(INVOICE_FIELDS.fields)
+    pos = 0
+    while pending:
+        regex = _combined(tuple(pending))
+        match = regex.search(text, pos)
+        if match is None:
+            break
+        name = match.lastgroup
+        field = pending.pop(name)
+        inner = field.regex.match(text, match.start())
+        found[name] = field.convert(inner.group(1) if field.regex.groups else inner.group(0))
+        pos = match.start()
+    return {name: found.get(name) for name in INVOICE_FIELDS.fields}
+
+
+_COMBINED = {}
+_CAPTURE = re.compile(r"(?<!\\)\((?!\?)")
+
+
+def _combined(names: tuple):
+    if names not in _COMBINED:
+        fields = INVOICE_FIELDS.fields
+        # Inner groups become non-capturing; a trailing empty group names the branch
+        branches = (_CAPTURE.sub("(?:", fields[n].pattern) for n in names)
+        _COMBINED[names] = re.compile("|".join(f"(?:{b})(?P<{n}>)" for b, n in zip(branches, names)))
+    return _COMBINED[names]
+
+
+def make_text(pages: int, with_company: bool = True) -> str:
+    header = HEADER if with_company else HEADER.replace("SAYIN\nÖrnek Ticaret Ltd. Şti.\n", "")
+    body = "".join(LINE.format(i=i) for i in range(pages * LINES_PER_PAGE))
+    return header + body + FOOTER
+
+
+def timed(func, text: str, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(text)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", default="1,50,500")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'company':>8} {'legacy ms':>10} {'extractor ms':>13} {'one pass ms':>12}")
+    for pages in (int(p) for p in args.pages.split(",")):
+        for with_company in (True, False):
+            text = make_text(pages, with_company)
+            legacy_s, _ = timed(legacy_extract, text, args.repeat)
+            new_s, new = timed(INVOICE_FIELDS.extract, text, args.repeat)
+            one_pass_s, one_pass = timed(one_pass_extract, text, args.repeat)
+            assert new == one_pass, (new, one_pass)
+            print(f"{pages:>6} {str(with_company):>8} {legacy_s * 1000:>10.2f} {new_s * 1000:>13.2f} "
+                  f"{one_pass_s * 1000:>12.2f}")
+
+    text = make_text(1)
+    print("\nlegacy:   ", legacy_extract(text))
+    print("extractor:", INVOICE_FIELDS.extract(text))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Batch KDV/tevkifat over invoice lines: int64 kuruş columns vs a per-row Decimal loop.
+
+    python benchmarks/bench_kdv_batch.py --lines 1000000
+
+The Decimal loop is what calculating each line the way KDVCalculator.calculate
+does would cost; it runs on the first --decimal-lines rows (it is slow) and
+its results are checked against the batch ones kuruş for kuruş.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.kdv_batch import KDVBatchCalculator
+
+RATES = [1, 10, 20]
+WITHHOLDINGS = ["", "", "", "2/10", "5/10", "7/10", "9/10"]
+
+
+def make_lines(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "matrah": np.round(rng.lognormal(6, 1.5, n), 2),
+        "kdv_orani": rng.choice(RATES, n),
+        "tevkifat_orani": rng.choice(WITHHOLDINGS, n),
+    })
+
+
+def decimal_loop(frame: pd.DataFrame):
+    cent = Decimal("0.01")
+    results = []
+    for matrah, rate, withholding in frame.itertuples(index=False):
+        matrah = Decimal(str(matrah))
+        kdv = (matrah * rate / 100).quantize(cent, rounding=ROUND_HALF_UP)
+        share = int(withholding.split("/")[0]) if withholding else 0
+        tevkifat = (kdv * share / 10).quantize(cent, rounding=ROUND_HALF_UP)
+        results.append((kdv, tevkifat, matrah + kdv - tevkifat))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--decimal-lines", type=int, default=100_000)
+    args = parser.parse_args()
+
+    frame = make_lines(args.lines)
+    calculator = KDVBatchCalculator()
+
+    start = time.perf_counter()
+    lines, summary = calculator.run(frame)
+    batch_s = time.perf_counter() - start
+    print(f"batch:   {args.lines:,} lines in {batch_s:.2f} s ({args.lines / batch_s:,.0f} lines/s)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "lines.parquet")
+        frame.to_parquet(path, index=False)
+        start = time.perf_counter()
+        calculator.run(path)
+        print(f"parquet: {args.lines:,} lines in {time.perf_counter() - start:.2f} s including the read")
+
+    sample = frame.head(args.decimal_lines)
+    start = time.perf_counter()
+    expected = decimal_loop(sample)
+    decimal_s = time.perf_counter() - start
+    print(f"decimal: {len(sample):,} lines in {decimal_s:.2f} s ({len(sample) / decimal_s:,.0f} lines/s, "
+          f"~{args.lines / len(sample) * decimal_s:.1f} s for {args.lines:,})")
+
+    got = lines.head(len(sample))[["kdv_kurus", "tevkifat_kurus", "odenecek_kurus"]].itertuples(index=False)
+    mismatches = sum(
+        1 for (kdv, tevkifat, total), row in zip(expected, got)
+        if (int(kdv * 100), int(tevkifat * 100), int(total * 100)) != tuple(row)
+    )
+    print(f"kuruş mismatches vs Decimal: {mismatches}")
+    print()
+    print(summary.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Cold start: lazy tool registry vs loading every tool up front, in fresh interpreters.
+
+    python benchmarks/bench_startup.py --repeat 5
+
+"lazy" is what main() does before the web UI binds its port: import
+chat.assistant and build MaliBotAssistant. "eager" also loads every tool
+and the ollama client library, as the assistant used to in its constructor. "gradio" is `import gradio`
+alone, the floor for startup (skipped when Gradio is not installed).
+Each run is a new process in an empty working directory.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPTS = {
+    "gradio": "import gradio",
+    "lazy": "from chat.assistant import MaliBotAssistant; MaliBotAssistant()",
+    "eager": "from chat.assistant import MaliBotAssistant; MaliBotAssistant().tools.preload(); import ollama",
+}
+
+TIMED = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{script}
+print(json.dumps(time.perf_counter() - start))
+"""
+
+PROFILE = """
+import sys
+sys.path.insert(0, {root!r})
+from chat.assistant import MaliBotAssistant
+assistant = MaliBotAssistant()
+assistant.tools.preload()
+print(assistant.tools.format_profile())
+"""
+
+
+def run(code: str, cwd: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        print(f"{'startup':<8} {'median ms':>10} {'min ms':>8}")
+        for name, script in SCRIPTS.items():
+            times = []
+            for _ in range(args.repeat):
+                result = run(TIMED.format(root=ROOT, script=script), cwd)
+                if result.returncode != 0:
+                    break
+                times.append(json.loads(result.stdout.splitlines()[-1]))
+            if not times:
+                print(f"{name:<8} skipped: {result.stderr.strip().splitlines()[-1]}")
+                continue
+            print(f"{name:<8} {statistics.median(times) * 1000:>10.0f} {min(times) * 1000:>8.0f}")
+
+        print()
+        print(run(PROFILE.format(root=ROOT), cwd).stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""GUI transaction entry: the background queue with readiness checks vs inline fixed sleeps.
+
+    python benchmarks/bench_transaction_queue.py --entries 20 --time-scale 0.1
+
+Both run against SimulatedDriver. "inline" is the old enter_transaction:
+keystrokes on the event loop, a fixed 1 s sleep after opening the form and
+pyautogui's 0.5 s pause after every call. "queue" submits the entries to
+AccountingSystem's worker thread, which waits for the form instead. A
+heartbeat task measures how long the event loop (every chat session) is
+stalled. All delays are multiplied by --time-scale.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.accounting_system import KEY_PAUSE, AccountingSystem, SimulatedDriver
+
+LEGACY_PAUSE = 0.5
+LEGACY_FORM_WAIT = 1.0
+
+
+def make_entries(n: int):
+    return [{"account_code": "120.01", "amount": f"{100 + i}.00", "description": f"Tahsilat {i}"} for i in range(n)]
+
+
+def legacy_entry(driver: SimulatedDriver, shortcuts, data, scale: float):
+    driver.hotkey(*shortcuts["new_entry"])
+    time.sleep(LEGACY_FORM_WAIT * scale)
+    driver.press(shortcuts["account_field"])
+    driver.write(data["account_code"])
+    driver.press(shortcuts["amount_field"])
+    driver.write(data["amount"])
+    driver.press("tab")
+    driver.write(data["description"])
+    driver.hotkey(*shortcuts["save"])
+
+
+async def heartbeat(lag: list, interval: float = 0.005):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag[0] = max(lag[0], time.perf_counter() - start - interval)
+
+
+async def run_inline(entries, args):
+    driver = SimulatedDriver(args.open_delay * args.time_scale, args.save_delay * args.time_scale,
+                             LEGACY_PAUSE * args.time_scale)
+    shortcuts = AccountingSystem(driver=driver).systems["zirve"]
+    lag = [0.0]
+    beat = asyncio.create_task(heartbeat(lag))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    for data in entries:
+        # The old method was async but never awaited: each entry blocked the loop
+        legacy_entry(driver, shortcuts, data, args.time_scale)
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    beat.cancel()
+    return elapsed, lag[0], driver
+
+
+async def run_queue(entries, args):
+    driver = SimulatedDriver(args.open_delay * args.time_scale, args.save_delay * args.time_scale,
+                             KEY_PAUSE * args.time_scale, fail_rate=args.fail_rate)
+    system = AccountingSystem(driver=driver)
+    system.ready_timeout = 3 * args.open_delay * args.time_scale
+    system.queue.retry_delay = 0.2 * args.time_scale
+    lag = [0.0]
+    beat = asyncio.create_task(heartbeat(lag))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    batch = system.enter_transactions("zirve", entries)
+    for job_id in batch["isler"]:
+        await system.queue.wait(job_id, 600)
+    elapsed = time.perf_counter() - start
+    beat.cancel()
+    system.queue.stop()
+    jobs = system.queue.batch(batch["parti"])
+    return elapsed, lag[0], driver, jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20)
+    parser.add_argument("--time-scale", type=float, default=0.1)
+    parser.add_argument("--open-delay", type=float, default=0.3, help="seconds the entry form takes to open")
+    parser.add_argument("--save-delay", type=float, default=0.2)
+    parser.add_argument("--fail-rate", type=float, default=0.1, help="share of new-entry keys that open nothing")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())
+    entries = make_entries(args.entries)
+    expected = [[e["account_code"], e["amount"], e["description"]] for e in entries]
+
+    elapsed, lag, driver = asyncio.run(run_inline(entries, args))
+    print(f"inline: {args.entries} entries in {elapsed:.2f} s, event loop stalled up to {lag * 1000:.0f} ms, "
+          f"{driver.lost_keys} keys lost, correct: {driver.entries == expected}")
+
+    elapsed, lag, driver, jobs = asyncio.run(run_queue(entries, args))
+    done = sum(1 for job in jobs if job["status"] == "done")
+    retries = sum(job["attempts"] - 1 for job in jobs)
+    saved = [entry for entry in driver.entries]
+    print(f"queue:  {args.entries} entries in {elapsed:.2f} s, event loop stalled up to {lag * 1000:.0f} ms, "
+          f"{driver.lost_keys} keys lost, {done} done, {retries} retries, "
+          f"duplicates: {len(saved) - len({tuple(e) for e in saved})}, "
+          f"correct: {sorted(saved) == sorted(e for e, job in zip(expected, jobs) if job['status'] == 'done')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Throughput and peak memory of the streaming UBL-TR parser over invoice bundles.
+
+    python benchmarks/bench_ubl_parser.py --sizes 100,1000,10000
+    python benchmarks/bench_ubl_parser.py --pdf-dir faturalar/   # compare with PDF scraping
+
+Each generated invoice carries a 200 KB embedded XSLT view, as real GİB
+invoices do, so a bundle of 10,000 is ~2 GB on disk; peak memory should not
+grow with the bundle size.
+"""
+import argparse
+import asyncio
+import base64
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.ubl_parser import UBLParser
+
+INVOICE = """<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"
+ xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"
+ xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">
+ <cbc:ProfileID>TICARIFATURA</cbc:ProfileID><cbc:ID>ABC2024{n:09d}</cbc:ID>
+ <cbc:UUID>00000000-0000-0000-0000-{n:012d}</cbc:UUID><cbc:IssueDate>2024-01-{day:02d}</cbc:IssueDate>
+ <cbc:InvoiceTypeCode>TEVKIFAT</cbc:InvoiceTypeCode><cbc:DocumentCurrencyCode>TRY</cbc:DocumentCurrencyCode>
+ <cac:AdditionalDocumentReference><cbc:ID>xslt</cbc:ID><cac:Attachment>
+  <cbc:EmbeddedDocumentBinaryObject mimeCode="application/xml">{xslt}</cbc:EmbeddedDocumentBinaryObject>
+ </cac:Attachment></cac:AdditionalDocumentReference>
+ <cac:AccountingSupplierParty><cac:Party>
+  <cac:PartyIdentification><cbc:ID schemeID="VKN">1234567890</cbc:ID></cac:PartyIdentification>
+  <cac:PartyName><cbc:Name>Örnek Temizlik Hizmetleri A.Ş.</cbc:Name></cac:PartyName>
+  <cac:PartyTaxScheme><cac:TaxScheme><cbc:Name>Kadıköy</cbc:Name></cac:TaxScheme></cac:PartyTaxScheme>
+ </cac:Party></cac:AccountingSupplierParty>
+ <cac:AccountingCustomerParty><cac:Party>
+  <cac:PartyIdentification><cbc:ID schemeID="TCKN">11111111110</cbc:ID></cac:PartyIdentification>
+  <cac:Person><cbc:FirstName>Ayşe</cbc:FirstName><cbc:FamilyName>Yılmaz</cbc:FamilyName></cac:Person>
+ </cac:Party></cac:AccountingCustomerParty>
+ <cac:TaxTotal><cbc:TaxAmount currencyID="TRY">220.00</cbc:TaxAmount>
+  <cac:TaxSubtotal><cbc:TaxableAmount currencyID="TRY">1000.00</cbc:TaxableAmount>
+   <cbc:TaxAmount currencyID="TRY">200.00</cbc:TaxAmount><cbc:Percent>20</cbc:Percent>
+   <cac:TaxCategory><cac:TaxScheme><cbc:Name>KDV</cbc:Name><cbc:TaxTypeCode>0015</cbc:TaxTypeCode></cac:TaxScheme></cac:TaxCategory>
+  </cac:TaxSubtotal>
+  <cac:TaxSubtotal><cbc:TaxableAmount currencyID="TRY">200.00</cbc:TaxableAmount>
+   <cbc:TaxAmount currencyID="TRY">20.00</cbc:TaxAmount><cbc:Percent>10</cbc:Percent>
+   <cac:TaxCategory><cac:TaxScheme><cbc:Name>KDV</cbc:Name><cbc:TaxTypeCode>0015</cbc:TaxTypeCode></cac:TaxScheme></cac:TaxCategory>
+  </cac:TaxSubtotal>
+ </cac:TaxTotal>
+ <cac:WithholdingTaxTotal><cbc:TaxAmount currencyID="TRY">180.00</cbc:TaxAmount>
+  <cac:TaxSubtotal><cbc:TaxableAmount currencyID="TRY">200.00</cbc:TaxableAmount>
+   <cbc:TaxAmount currencyID="TRY">180.00</cbc:TaxAmount><cbc:Percent>90</cbc:Percent>
+   <cac:TaxCategory><cac:TaxScheme><cbc:Name>Temizlik Hizmeti</cbc:Name><cbc:TaxTypeCode>613</cbc:TaxTypeCode></cac:TaxScheme></cac:TaxCategory>
+  </cac:TaxSubtotal>
+ </cac:WithholdingTaxTotal>
+ <cac:LegalMonetaryTotal>
+  <cbc:LineExtensionAmount currencyID="TRY">1200.00</cbc:LineExtensionAmount>
+  <cbc:TaxExclusiveAmount currencyID="TRY">1200.00</cbc:TaxExclusiveAmount>
+  <cbc:TaxInclusiveAmount currencyID="TRY">1420.00</cbc:TaxInclusiveAmount>
+  <cbc:PayableAmount currencyID="TRY">1240.00</cbc:PayableAmount>
+ </cac:LegalMonetaryTotal>
+ <cac:InvoiceLine><cbc:ID>1</cbc:ID><cbc:InvoicedQuantity unitCode="C62">10</cbc:InvoicedQuantity>
+  <cbc:LineExtensionAmount currencyID="TRY">1000.00</cbc:LineExtensionAmount>
+  <cac:TaxTotal><cac:TaxSubtotal><cbc:TaxAmount currencyID="TRY">200.00</cbc:TaxAmount><cbc:Percent>20</cbc:Percent>
+   <cac:TaxCategory><cac:TaxScheme><cbc:TaxTypeCode>0015</cbc:TaxTypeCode></cac:TaxScheme></cac:TaxCategory></cac:TaxSubtotal></cac:TaxTotal>
+  <cac:Item><cbc:Name>Ofis malzemesi</cbc:Name></cac:Item><cac:Price><cbc:PriceAmount currencyID="TRY">100.00</cbc:PriceAmount></cac:Price>
+ </cac:InvoiceLine>
+ <cac:InvoiceLine><cbc:ID>2</cbc:ID><cbc:InvoicedQuantity unitCode="HUR">4</cbc:InvoicedQuantity>
+  <cbc:LineExtensionAmount currencyID="TRY">200.00</cbc:LineExtensionAmount>
+  <cac:TaxTotal><cac:TaxSubtotal><cbc:TaxAmount currencyID="TRY">20.00</cbc:TaxAmount><cbc:Percent>10</cbc:Percent>
+   <cac:TaxCategory><cac:TaxScheme><cbc:TaxTypeCode>0015</cbc:TaxTypeCode></cac:TaxScheme></cac:TaxCategory></cac:TaxSubtotal></cac:TaxTotal>
+  <cac:Item><cbc:Name>Temizlik hizmeti</cbc:Name></cac:Item><cac:Price><cbc:PriceAmount currencyID="TRY">50.00</cbc:PriceAmount></cac:Price>
+ </cac:InvoiceLine>
+</Invoice>
+"""
+
+
+def write_bundle(path: str, n: int, xslt_bytes: int):
+    xslt = base64.b64encode(os.urandom(xslt_bytes * 3 // 4)).decode()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<Paket>\n")
+        for i in range(n):
+            f.write(INVOICE.format(n=i, day=i % 28 + 1, xslt=xslt))
+        f.write("</Paket>\n")
+
+
+def bench_xml(path: str):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = 0
+    kdv = 0
+    for invoice in UBLParser().iter_invoices(path):
+        count += 1
+        kdv += invoice["kdv_toplam"]
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, kdv, elapsed, peak
+
+
+def bench_pdf(pdf_dir: str):
+    from tools.pdf_parser import PDFParser
+    from tools.pdf_cache import PDFCache
+
+    files = [os.path.join(pdf_dir, f) for f in os.listdir(pdf_dir) if f.lower().endswith(".pdf")]
+    parser = PDFParser(cache=PDFCache(tempfile.mkdtemp()))
+
+    async def run():
+        start = time.perf_counter()
+        await asyncio.gather(*(parser.extract_efatura(f) for f in files), return_exceptions=True)
+        return time.perf_counter() - start
+
+    return len(files), asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--xslt-kb", type=int, default=200)
+    parser.add_argument("--pdf-dir", default=None)
+    args = parser.parse_args()
+
+    print(f"{'invoices':>9} {'file MB':>8} {'seconds':>8} {'inv/s':>9} {'peak MB':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        fd, path = tempfile.mkstemp(suffix=".xml")
+        os.close(fd)
+        try:
+            write_bundle(path, size, args.xslt_kb * 1024)
+            count, kdv, elapsed, peak = bench_xml(path)
+            assert count == size and kdv == 220 * size
+            print(f"{size:>9} {os.path.getsize(path) / 1e6:>8.1f} {elapsed:>8.2f} "
+                  f"{size / elapsed:>9.0f} {peak / 1e6:>8.2f}")
+        finally:
+            os.remove(path)
+
+    if args.pdf_dir:
+        count, elapsed = bench_pdf(args.pdf_dir)
+        print(f"PDF scraping: {count} files in {elapsed:.2f} s ({count / elapsed:.0f} inv/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Ingestion throughput of VectorStore: per-document saves vs batched adds.
+
+    python benchmarks/bench_vector_ingest.py --docs 100000 --batch-size 1000
+
+The per-document path (add_document followed by save_data, which rewrites
+the whole index every time) is quadratic, so it is only run on
+--legacy-docs documents.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory.vector_store import VectorStore
+
+
+def make_texts(n: int):
+    return [f"Belge {i}: KDV Kanunu madde {i % 120} kapsamında tevkifat uygulaması." for i in range(n)]
+
+
+def bench_per_document(texts):
+    data_dir = tempfile.mkdtemp()
+    try:
+        store = VectorStore(data_dir, flush_interval=None)
+        start = time.perf_counter()
+        for text in texts:
+            store.add_document(text)
+            store.save_data()
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(data_dir)
+
+
+def bench_batched(texts, batch_size: int):
+    data_dir = tempfile.mkdtemp()
+    try:
+        store = VectorStore(data_dir, flush_interval=None)
+        start = time.perf_counter()
+        for i in range(0, len(texts), batch_size):
+            store.add_documents(texts[i:i + batch_size])
+            store.flush()
+        store.checkpoint()
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        VectorStore(data_dir, flush_interval=None)
+        return elapsed, time.perf_counter() - start
+    finally:
+        shutil.rmtree(data_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--legacy-docs", type=int, default=2000)
+    args = parser.parse_args()
+
+    legacy_texts = make_texts(args.legacy_docs)
+    elapsed = bench_per_document(legacy_texts)
+    print(f"per-document save : {args.legacy_docs:>8} docs in {elapsed:8.2f}s "
+          f"({args.legacy_docs / elapsed:10.0f} docs/s)")
+
+    texts = make_texts(args.docs)
+    elapsed, reload = bench_batched(texts, args.batch_size)
+    print(f"batched + journal : {args.docs:>8} docs in {elapsed:8.2f}s "
+          f"({args.docs / elapsed:10.0f} docs/s), reload {reload:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
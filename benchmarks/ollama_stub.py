@@ -0,0 +1,105 @@
+"""Minimal stand-in for the Ollama HTTP API.
+
+Answers /api/chat (streaming and non-streaming) with a canned reply after
+a configurable delay, and /api/embed with deterministic vectors, so the
+LLM client and embedding backend can be exercised without a model:
+
+    python benchmarks/ollama_stub.py --port 11500 --delay 2
+    OLLAMA_HOST=http://127.0.0.1:11500 python main.py
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime, timezone
+import argparse
+import hashlib
+import json
+import time
+
+REPLY = "Bu yanıt test sunucusundan geliyor."
+EMBEDDING_DIMENSION = 64
+
+
+class OllamaStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+    delay = 0.0
+    token_delay = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path == "/api/chat":
+            self._chat(body)
+        elif self.path == "/api/embed":
+            self._embed(body)
+        else:
+            self.send_error(404)
+
+    def _chat(self, body: dict):
+        time.sleep(self.delay)
+        model = body.get("model", "stub")
+        if not body.get("stream", True):
+            self._send_json(self._chunk(model, REPLY, done=True))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for word in REPLY.split(" "):
+            time.sleep(self.token_delay)
+            self._write_chunk(self._chunk(model, word + " ", done=False))
+        self._write_chunk(self._chunk(model, "", done=True))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _embed(self, body: dict):
+        texts = body.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        embeddings = []
+        for text in texts:
+            digest = hashlib.sha256(text.encode("utf-8")).digest() * (EMBEDDING_DIMENSION // 32)
+            embeddings.append([b / 255.0 for b in digest])
+        self._send_json({"model": body.get("model", "stub"), "embeddings": embeddings})
+
+    def _chunk(self, model: str, content: str, done: bool) -> dict:
+        return {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+        }
+
+    def _send_json(self, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, payload: dict):
+        data = json.dumps(payload).encode() + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--delay", type=float, default=0.5, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.05, help="seconds between streamed tokens")
+    args = parser.parse_args()
+
+    OllamaStubHandler.delay = args.delay
+    OllamaStubHandler.token_delay = args.token_delay
+    server = ThreadingHTTPServer((args.host, args.port), OllamaStubHandler)
+    print(f"Ollama stub listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
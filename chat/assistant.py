@@ -1,71 +1,216 @@
-from typing import List, Dict, Any
-import ollama
-from memory.vector_store import VectorStore
-from tools.kdv_calculator import KDVCalculator
-from tools.pdf_parser import PDFParser
-from tools.email_writer import EmailWriter
-from tools.deadline_tracker import DeadlineTracker
-from tools.hesap_plani import HesapPlaniProcessor
-from tools.accounting_system import AccountingSystem
+from typing import List, Dict, Any, AsyncIterator
+from tools.deadline_scheduler import BannerSink, LogSink, MailboxSink
+from chat.context import ContextBuilder, format_turns, truncate
+from chat.router import ToolRouter, NaiveBayesClassifier, GENERAL
+from chat.llm_client import LLMClient, LLMError
+from chat.response_cache import ResponseCache
+from chat.tool_registry import ToolRegistry, ToolUnavailable
+from utils.extraction import ACCOUNT_CODE, AMOUNT, Field, FieldExtractor, parse_amount
+import asyncio
+from decimal import Decimal
+import logging
+import time
 import re
 
+logger = logging.getLogger(__name__)
+
+# Retrieved chunks offered to the context builder; its token budget decides how many are used
+RETRIEVAL_CHUNKS = 6
+
+SUMMARY_PROMPT = ("Aşağıdaki konuşmayı, varsa önceki özetle birleştirerek en fazla {words} kelimelik "
+                  "Türkçe bir özet yaz. Tutarları, oranları, hesap kodlarını, tarihleri ve mükellef "
+                  "adlarını koru. Yalnızca özeti yaz.")
+
+# "120 hesabına 1.250,50 TL tahsilat": a number followed by "hesap..." is the account
+TRANSACTION_FIELDS = FieldExtractor([
+    Field("account_code", ACCOUNT_CODE),
+    Field("amount", "(" + AMOUNT + r")(?!\s*(?i:nolu\s+|no'lu\s+)?(?i:hesa))", parse_amount),
+])
+
 class MaliBotAssistant:
     def __init__(self):
         self.model = "mistral"  # or any other model you prefer
-        self.vector_store = VectorStore()
-        self.tools = {
-            "kdv_calculator": KDVCalculator(),
-            "pdf_parser": PDFParser(),
-            "email_writer": EmailWriter(),
-            "deadline_tracker": DeadlineTracker(),
-            "hesap_plani": HesapPlaniProcessor(),
-            "accounting_system": AccountingSystem()
-        }
-        
-    async def process_message(self, message: str, history: List[Dict[str, str]] = None) -> str:
-        """Process user message and generate response using appropriate tools."""
-        # Analyze message intent and determine which tool to use
-        response = ollama.chat(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "Sen MaliBot, Türkiye'deki mali müşavirler için geliştirilmiş bir AI asistansın. Kullanıcının mesajını analiz et ve hangi aracı kullanman gerektiğine karar ver."},
-                {"role": "user", "content": message}
-            ]
+        self.llm = LLMClient(model=self.model)
+        self.response_cache = ResponseCache()
+        # Fits history, its rolling summary and retrieved chunks into the prompt budget
+        self.context = ContextBuilder(summarize=self._summarize_history)
+        self.router = ToolRouter(classifier=NaiveBayesClassifier())
+        # Imported and built on first use: faiss, pypdf, pandas and pyautogui
+        # would otherwise all load before the web UI can bind its port
+        self.tools = ToolRegistry()
+        self.tools.register("vector_store", "memory.vector_store:VectorStore")
+        self.tools.register("kdv_calculator", "tools.kdv_calculator:KDVCalculator")
+        self.tools.register("pdf_parser", "tools.pdf_parser:PDFParser")
+        self.tools.register("email_writer", "tools.email_writer:EmailWriter")
+        self.tools.register("deadline_tracker", "tools.deadline_tracker:DeadlineTracker")
+        self.tools.register("hesap_plani", "tools.hesap_plani:HesapPlaniProcessor")
+        self.tools.register("accounting_system", "tools.accounting_system:AccountingSystem")
+        self.tools.register("invoice_batch", "tools.efatura_batch:EFaturaBatchProcessor", requires=["pdf_parser"])
+        # Deadline reminders; started by main() next to the web UI
+        self.notifications = BannerSink()
+        self.tools.register(
+            "deadline_scheduler", "tools.deadline_scheduler:DeadlineScheduler", requires=["deadline_tracker"],
+            sinks=[LogSink(), self.notifications, MailboxSink()]
         )
+        # Last uploaded PDF per chat session, so "bu faturayı oku" has a file to work on
+        self.uploaded_files: Dict[str, str] = {}
+    
+    @property
+    def vector_store(self):
+        return self.tools["vector_store"]
+    
+    @property
+    def invoice_batch(self):
+        return self.tools["invoice_batch"]
+    
+    @property
+    def deadline_scheduler(self):
+        return self.tools["deadline_scheduler"]
+    
+    def start_background_services(self, preload: bool = True):
+        """Start reminders and queued GUI entries, then load the remaining tools.
         
-        # Process the response and use appropriate tools
-        message_lower = message.lower()
+        Meant for a background thread once the web UI is up, so the first
+        request finds its tool ready without delaying startup.
+        """
+        self.deadline_scheduler.start_in_thread()
+        try:
+            self.tools["accounting_system"].resume_pending()
+        except ToolUnavailable as e:
+            logger.warning("%s", e)
+        if preload:
+            self.tools.preload()
+        logger.info("Startup profile:\n%s", self.tools.format_profile())
+        
+    async def process_message(self, message: str, history: List[Dict[str, str]] = None, session_id: str = None) -> str:
+        """Process user message and generate response using appropriate tools."""
+        chunks = [chunk async for chunk in self.stream_message(message, history, session_id)]
+        return "".join(chunks)
+    
+    async def stream_message(self, message: str, history: List[Dict[str, str]] = None, session_id: str = None) -> AsyncIterator[str]:
+        """Process user message and yield the response as it is generated."""
+        # Route locally so tool requests never wait on the LLM
+        tool, confidence = self.router.route(message)
         
-        if "kdv" in message_lower:
+        if tool == GENERAL:
+            # Use hybrid BM25 + vector retrieval for general knowledge queries
+            await self._load("vector_store")
+            relevant_docs = self.vector_store.hybrid_search(message, n_results=RETRIEVAL_CHUNKS)
+            async for token in self._generate_contextual_response(message, relevant_docs, session_id, history):
+                yield token
+        else:
+            yield await self._run_tool(tool, message, session_id)
+    
+    async def _run_tool(self, tool: str, message: str, session_id: str = None) -> str:
+        """Run the tool selected by the router."""
+        try:
+            await self._load(tool)
+            return await self._call_tool(tool, message, session_id)
+        except ToolUnavailable as e:
+            return str(e)
+    
+    async def _load(self, name: str):
+        """Load a component in a worker thread, so its first use doesn't stall other sessions."""
+        if name in self.tools and not self.tools.is_loaded(name):
+            await asyncio.get_running_loop().run_in_executor(None, self.tools.get, name)
+    
+    async def _call_tool(self, tool: str, message: str, session_id: str = None) -> str:
+        if tool == "kdv_calculator":
             return await self.tools["kdv_calculator"].calculate(message)
-        elif "pdf" in message_lower or "fatura" in message_lower:
-            return await self.tools["pdf_parser"].process(message)
-        elif "e-posta" in message_lower or "mail" in message_lower:
+        elif tool == "pdf_parser":
+            return await self.tools["pdf_parser"].process(message, self.uploaded_files.get(session_id))
+        elif tool == "email_writer":
             return await self.tools["email_writer"].generate(message)
-        elif "beyanname" in message_lower or "son tarih" in message_lower:
+        elif tool == "deadline_tracker":
             return await self.tools["deadline_tracker"].check(message)
-        elif "hesap" in message_lower and "plan" in message_lower:
+        elif tool == "hesap_plani":
             return await self.tools["hesap_plani"].search_account(message)
-        elif "dbs" in message_lower or "zirve" in message_lower:
+        elif tool == "accounting_system":
+            if self.tools["accounting_system"].is_status_query(message):
+                return await self.tools["accounting_system"].check_status(message)
             # Extract transaction details from message
             data = self._extract_transaction_data(message)
-            system = "dbs" if "dbs" in message_lower else "zirve"
+            system = "dbs" if "dbs" in message.lower() else "zirve"
             return await self.tools["accounting_system"].enter_transaction(system, data)
-        else:
-            # Use vector store for general knowledge queries
-            relevant_docs = self.vector_store.search(message)
-            return await self._generate_contextual_response(message, relevant_docs)
-    
-    async def _generate_contextual_response(self, message: str, context: List[str]) -> str:
-        """Generate response using context from vector store."""
-        response = ollama.chat(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "Sen MaliBot, Türkiye'deki mali müşavirler için geliştirilmiş bir AI asistansın. Verilen bağlamı kullanarak kullanıcının sorusunu yanıtla."},
-                {"role": "user", "content": f"Bağlam: {' '.join(context)}\n\nSoru: {message}"}
-            ]
+        return f"Bilinmeyen araç: {tool}"
+    
+    def register_upload(self, file_path: str, session_id: str = None):
+        """Remember the file a session uploaded for later tool calls."""
+        self.uploaded_files[session_id] = file_path
+    
+    async def ingest_document(self, file_path: str) -> Dict[str, int]:
+        """Chunk, embed and index a mevzuat PDF without blocking the event loop.
+
+        Only for documents meant to answer questions; invoices go through
+        ``register_upload`` so they stay out of retrieval.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._ingest, file_path)
+    
+    def _ingest(self, file_path: str) -> Dict[str, int]:
+        from memory.ingest import ingest_pdf
+        return ingest_pdf(file_path, self.vector_store, parser=self.tools["pdf_parser"])
+    
+    async def process_invoice_batch(self, source: str, output_path: str, progress=None) -> Dict[str, Any]:
+        """Extract all e-faturas in a directory, ZIP or XML bundle into a CSV/Parquet table."""
+        await self._load("invoice_batch")
+        return await self.invoice_batch.run(source, output_path, progress)
+    
+    async def export_fis_batch(self, source: str, system: str, output_path: str) -> Dict[str, Any]:
+        """Write a table of fiş lines as a DBS / Zirve import file instead of typing them in."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, lambda: self.tools["accounting_system"].export_transactions(system, source, output_path)
         )
-        return response['message']['content']
+    
+    def cancel(self, session_id: str = None) -> int:
+        """Cancel in-flight LLM requests of a chat session."""
+        return self.llm.cancel(session_id)
+    
+    async def _generate_contextual_response(self, message: str, context: List[str], session_id: str = None,
+                                            history: List[Any] = None) -> AsyncIterator[str]:
+        """Stream a response using the conversation and context from the vector store."""
+        prompt = await self.context.build(message, history, context, session_id)
+        messages = prompt["messages"]
+        logger.info("Prompt: %d tokens, %d history turns (+%d summarized), %d chunks", prompt["tokens"],
+                    prompt["history_turns"], prompt["summarized_turns"], prompt["chunks"])
+        
+        # Repeated questions over unchanged context and conversation skip generation entirely
+        self.response_cache.sync(self.vector_store.revision)
+        cache_key = self.response_cache.make_key(message, [m["content"] for m in messages], self.model)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Response cache hit (%s)", self.response_cache.stats())
+            yield cached
+            return
+        
+        start = time.perf_counter()
+        first_token_at = None
+        tokens = []
+        try:
+            async for token in self.llm.chat_stream(messages, session_id=session_id):
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    logger.info("Time to first token: %.0f ms", (first_token_at - start) * 1000)
+                tokens.append(token)
+                yield token
+        except LLMError as e:
+            yield f"Yanıt oluşturulurken bir hata oluştu: {str(e)}"
+            return
+        finally:
+            logger.info("Response generated in %.0f ms", (time.perf_counter() - start) * 1000)
+        
+        self.response_cache.put(cache_key, "".join(tokens))
+    
+    async def _summarize_history(self, previous: str, turns: List[Dict[str, str]]) -> str:
+        """Fold turns that left the context window into the session's running summary."""
+        words = self.context.summary_tokens // 2
+        conversation = truncate(format_turns(turns), self.context.max_tokens, keep_end=True)
+        messages = [
+            {"role": "system", "content": SUMMARY_PROMPT.format(words=words)},
+            {"role": "user", "content": f"Önceki özet: {previous or '-'}\n\nKonuşma:\n{conversation}"},
+        ]
+        return await self.llm.chat(messages, timeout=60)
     
     def _extract_transaction_data(self, message: str) -> Dict[str, Any]:
         """Extract transaction details from message."""
@@ -76,18 +221,13 @@ class MaliBotAssistant:
             "description": ""
         }
         
-        # Extract account code (assuming it's a 3-digit number)
-        account_match = re.search(r'\b\d{3}\b', message)
-        if account_match:
-            data["account_code"] = account_match.group(0)
-        
-        # Extract amount (assuming it's a number with decimal point)
-        amount_match = re.search(r'\b\d+(?:\.\d{2})?\b', message)
-        if amount_match:
-            data["amount"] = amount_match.group(0)
-        
-        # Extract description (everything after the amount)
-        if amount_match:
-            data["description"] = message[amount_match.end():].strip()
+        fields = TRANSACTION_FIELDS.scan(message)
+        if "account_code" in fields:
+            data["account_code"] = fields["account_code"][0]
+        if "amount" in fields:
+            amount, _, end = fields["amount"]
+            data["amount"] = str(amount.quantize(Decimal("0.01")))
+            # Description is everything after the amount and its currency
+            data["description"] = re.sub(r"^\s*(?:TL|₺)\b", "", message[end:]).strip()
         
         return data 
\ No newline at end of file
@@ -0,0 +1,219 @@
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple
+import hashlib
+import logging
+import os
+from utils.tokens import count_tokens, get_encoding
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = ("Sen MaliBot, Türkiye'deki mali müşavirler için geliştirilmiş bir AI asistansın. "
+                 "Verilen bağlamı kullanarak kullanıcının sorusunu yanıtla.")
+
+# Prompt budget in tiktoken tokens; keep it below the model's context
+# window (Ollama's num_ctx) minus room for the answer
+CONTEXT_TOKENS = int(os.getenv("MALIBOT_CONTEXT_TOKENS", "3000"))
+# Share of what is left after the system prompt and question that history may use
+HISTORY_SHARE = 0.35
+# Room kept for the summary of turns that no longer fit
+SUMMARY_TOKENS = 200
+# When the summary has to be extended, the window shrinks to this share of
+# the history budget, so the next few turns fit without another summary
+SUMMARY_WATERMARK = 0.5
+# A retrieved chunk is cut to fit only if at least this much of it fits
+MIN_CHUNK_TOKENS = 40
+# Role / separator tokens the chat template adds per message
+MESSAGE_OVERHEAD = 4
+MAX_SESSIONS = 1000
+
+ROLE_LABELS = {"user": "Kullanıcı", "assistant": "MaliBot"}
+
+
+@lru_cache(maxsize=4096)
+def _count(text: str) -> int:
+    # History turns and popular chunks are counted again on every request
+    return count_tokens(text)
+
+
+class ContextBuilder:
+    """Fits the system prompt, conversation and retrieved chunks into a token budget.
+
+    The question always goes in. History gets up to ``history_share`` of
+    the rest, newest turns first and whole turns only; turns that fall out
+    of that window are folded into a rolling summary. Retrieved chunks fill
+    what is left in rank order, the last one cut to fit.
+
+    Summaries are cached per session together with a digest of the turns
+    they cover. While a session's history only grows, a request reuses the
+    summary, and only turns newly pushed out of the window are passed to
+    ``summarize(previous_summary, turns)`` to extend it; the window then
+    shrinks to ``SUMMARY_WATERMARK`` of its budget so this happens every few
+    turns rather than on each one. ``summarize`` is
+    an async callable (e.g. an LLM call); without one, or when it fails,
+    an extractive summary is used.
+    """
+
+    def __init__(self, summarize: Callable[[str, List[Dict[str, str]]], Awaitable[str]] = None,
+                 max_tokens: int = CONTEXT_TOKENS, history_share: float = HISTORY_SHARE,
+                 summary_tokens: int = SUMMARY_TOKENS, system_prompt: str = SYSTEM_PROMPT):
+        self.summarize = summarize
+        self.max_tokens = max_tokens
+        self.history_share = history_share
+        self.summary_tokens = summary_tokens
+        self.system_prompt = system_prompt
+        # session -> (number of turns covered, their digest, summary)
+        self._summaries: "OrderedDict[str, Tuple[int, str, str]]" = OrderedDict()
+        self.summaries_computed = 0
+
+    async def build(self, message: str, history: Sequence[Any] = None, chunks: Sequence[str] = (),
+                    session_id: str = None) -> Dict[str, Any]:
+        """Return {"messages": [...], "tokens": n, ...} ready for the chat API."""
+        turns = normalize_history(history, message)
+        question = truncate(message, self.max_tokens // 4)
+        fixed = (_count(self.system_prompt) + _count(f"Bağlam: \n\nSoru: {question}")
+                 + 2 * MESSAGE_OVERHEAD)
+        available = max(self.max_tokens - fixed, 0)
+
+        # Turns already summarized stay summarized, so the window only slides forward
+        covered, summary = self._cached_summary(session_id, turns)
+        history_budget = int(available * self.history_share)
+        summary_budget = min(self.summary_tokens, history_budget // 2)
+        start = self._window_start(turns, covered, history_budget)
+        if start > 0:
+            # Something falls out: make room for its summary and fit the window again
+            window_budget = history_budget - summary_budget
+            start = self._window_start(turns, max(covered, start), window_budget)
+            if start > covered or not summary:
+                start = self._window_start(turns, start, int(window_budget * SUMMARY_WATERMARK))
+                summary = await self._summarize(summary, turns[covered:start])
+                self._store_summary(session_id, turns, start, summary)
+            summary = truncate(summary, summary_budget)
+        window = turns[start:]
+
+        system = self.system_prompt
+        if summary:
+            system += f"\n\nÖnceki konuşmanın özeti: {summary}"
+        used = fixed + _count(system) - _count(self.system_prompt)
+        used += sum(_count(turn["content"]) + MESSAGE_OVERHEAD for turn in window)
+
+        context = []
+        for chunk in chunks:
+            remaining = self.max_tokens - used - 1
+            size = _count(chunk) + 1
+            if size <= remaining:
+                context.append(chunk)
+                used += size
+                continue
+            if remaining >= MIN_CHUNK_TOKENS:
+                context.append(truncate(chunk, remaining))
+                used += remaining
+            break
+
+        messages = [{"role": "system", "content": system}]
+        messages += window
+        messages.append({"role": "user", "content": f"Bağlam: {' '.join(context)}\n\nSoru: {question}"})
+        return {
+            "messages": messages,
+            "tokens": used,
+            "history_turns": len(window),
+            "summarized_turns": start,
+            "chunks": len(context),
+        }
+
+    def clear(self, session_id: str = None):
+        """Forget a session's summary (e.g. when its chat is cleared)."""
+        self._summaries.pop(session_id, None)
+
+    def _window_start(self, turns: List[Dict[str, str]], minimum: int, budget: int) -> int:
+        """Index of the oldest turn of the newest run of turns fitting ``budget``."""
+        start, used = len(turns), 0
+        while start > minimum:
+            size = _count(turns[start - 1]["content"]) + MESSAGE_OVERHEAD
+            if used + size > budget:
+                break
+            used += size
+            start -= 1
+        # Start the window on a question, not on an answer
+        if start < len(turns) and turns[start]["role"] == "assistant":
+            start += 1
+        return start
+
+    def _cached_summary(self, session_id: str, turns: List[Dict[str, str]]) -> Tuple[int, str]:
+        cached = self._summaries.get(session_id)
+        if cached is None:
+            return 0, ""
+        covered, digest, summary = cached
+        if covered > len(turns) or _digest(turns[:covered]) != digest:
+            # The chat was cleared or edited: this summary is about another conversation
+            del self._summaries[session_id]
+            return 0, ""
+        self._summaries.move_to_end(session_id)
+        return covered, summary
+
+    def _store_summary(self, session_id: str, turns: List[Dict[str, str]], covered: int, summary: str):
+        self._summaries[session_id] = (covered, _digest(turns[:covered]), summary)
+        self._summaries.move_to_end(session_id)
+        while len(self._summaries) > MAX_SESSIONS:
+            self._summaries.popitem(last=False)
+
+    async def _summarize(self, previous: str, turns: List[Dict[str, str]]) -> str:
+        self.summaries_computed += 1
+        if self.summarize is not None:
+            try:
+                summary = await self.summarize(previous, turns)
+                if summary.strip():
+                    return summary.strip()
+            except Exception as e:
+                logger.warning("Summarizing history failed (%s); using an extractive summary", e)
+        return extractive_summary(previous, turns, self.summary_tokens)
+
+
+def normalize_history(history: Sequence[Any], message: str = None) -> List[Dict[str, str]]:
+    """Chat history as [{"role", "content"}], from role dicts or Gradio [user, bot] pairs.
+
+    Empty entries are skipped, and so is a trailing copy of the current
+    ``message`` (Gradio appends it before the answer is generated).
+    """
+    turns = []
+    for entry in history or []:
+        if isinstance(entry, dict):
+            pairs = [(entry.get("role"), entry.get("content"))]
+        else:
+            pairs = [("user", entry[0]), ("assistant", entry[1])]
+        for role, content in pairs:
+            if role in ROLE_LABELS and isinstance(content, str) and content.strip():
+                turns.append({"role": role, "content": content})
+    if message is not None and turns and turns[-1]["role"] == "user" and turns[-1]["content"] == message:
+        turns.pop()
+    return turns
+
+
+def extractive_summary(previous: str, turns: List[Dict[str, str]], max_tokens: int) -> str:
+    """Previous summary plus the first sentence of each turn, cut to ``max_tokens`` keeping the newest."""
+    parts = [previous] if previous else []
+    for turn in turns:
+        first = turn["content"].strip().split("\n")[0].split(". ")[0]
+        parts.append(f"{ROLE_LABELS[turn['role']]}: {first}")
+    return truncate(" / ".join(parts), max_tokens, keep_end=True)
+
+
+def truncate(text: str, max_tokens: int, keep_end: bool = False) -> str:
+    """Cut text to at most ``max_tokens`` tokens, from the end or (``keep_end``) the start."""
+    if _count(text) <= max_tokens:
+        return text
+    encoding = get_encoding()
+    tokens = encoding.encode(text, disallowed_special=())
+    kept = tokens[-max_tokens:] if keep_end else tokens[:max_tokens]
+    return encoding.decode(kept) if max_tokens > 0 else ""
+
+
+def format_turns(turns: List[Dict[str, str]]) -> str:
+    return "\n".join(f"{ROLE_LABELS[turn['role']]}: {turn['content']}" for turn in turns)
+
+
+def _digest(turns: List[Dict[str, str]]) -> str:
+    digest = hashlib.sha256()
+    for turn in turns:
+        digest.update(f"{turn['role']}\0{turn['content']}\0".encode("utf-8"))
+    return digest.hexdigest()
@@ -0,0 +1,166 @@
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Set, Tuple
+import asyncio
+import os
+
+if TYPE_CHECKING:
+    import ollama
+
+
+class LLMError(Exception):
+    """Base error for LLM client failures."""
+
+
+class LLMTimeoutError(LLMError):
+    """Raised when a request exceeds its timeout."""
+
+
+class LLMCancelledError(LLMError):
+    """Raised when a request is cancelled, e.g. because the chat was cleared."""
+
+
+class LLMClient:
+    """Non-blocking Ollama client with a shared connection pool.
+
+    One ``ollama.AsyncClient`` (and so one HTTP connection pool) is shared by
+    every request. At most ``max_in_flight`` requests hit the server at the
+    same time; the rest wait their turn without blocking the event loop.
+    Requests can be grouped by session and cancelled together.
+    """
+
+    def __init__(
+        self,
+        model: str = "mistral",
+        host: str = None,
+        max_in_flight: int = 4,
+        timeout: float = 120.0,
+    ):
+        self.model = model
+        self.host = host or os.getenv("OLLAMA_HOST", "http://localhost:11434")
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self._client: Optional["ollama.AsyncClient"] = None
+        # Becomes (ollama.ResponseError, ConnectionError) once ollama is imported
+        self._errors: Tuple[type, ...] = (ConnectionError,)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._sessions: Dict[str, Set[asyncio.Task]] = {}
+        self._cancelled: Set[asyncio.Task] = set()
+
+    def _get_client(self) -> "ollama.AsyncClient":
+        # Created lazily so the pool is bound to the running event loop; the
+        # import is deferred too, as it costs half a second at startup
+        if self._client is None:
+            import ollama
+            self._errors = (ollama.ResponseError, ConnectionError)
+            self._client = ollama.AsyncClient(host=self.host)
+        return self._client
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphore
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        session_id: str = None,
+        timeout: float = None,
+    ) -> str:
+        """Send a chat request and return the answer text."""
+        task = asyncio.ensure_future(self._chat(messages, timeout or self.timeout))
+        self._sessions.setdefault(session_id, set()).add(task)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if task in self._cancelled:
+                raise LLMCancelledError("İstek iptal edildi.")
+            raise
+        finally:
+            self._discard(session_id, task)
+
+    async def _chat(self, messages: List[Dict[str, str]], timeout: float) -> str:
+        async with self._get_semaphore():
+            try:
+                response = await asyncio.wait_for(
+                    self._get_client().chat(model=self.model, messages=messages),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                raise LLMTimeoutError(f"Model {timeout:.0f} saniye içinde yanıt vermedi.")
+            except self._errors as e:
+                raise LLMError(str(e))
+        return response["message"]["content"]
+
+    async def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        session_id: str = None,
+        timeout: float = None,
+    ) -> AsyncIterator[str]:
+        """Send a chat request and yield the answer as it is generated."""
+        queue: asyncio.Queue = asyncio.Queue()
+        task = asyncio.ensure_future(self._pump(messages, timeout or self.timeout, queue))
+        self._sessions.setdefault(session_id, set()).add(task)
+        try:
+            while True:
+                if queue.empty() and task.done():
+                    # The pump ended without its sentinel; don't wait on the queue forever
+                    if task.cancelled():
+                        raise LLMCancelledError("İstek iptal edildi.")
+                    raise LLMError("Model yanıtı beklenmedik şekilde kesildi.")
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    continue
+                item = getter.result()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Consumer stopped early (e.g. Gradio cancelled the event)
+            if not task.done():
+                task.cancel()
+            self._discard(session_id, task)
+
+    async def _pump(self, messages: List[Dict[str, str]], timeout: float, queue: asyncio.Queue):
+        """Feed streamed tokens into the queue, ending with None or an error."""
+        try:
+            async with self._get_semaphore():
+                await asyncio.wait_for(self._stream_into(messages, queue), timeout)
+            queue.put_nowait(None)
+        except asyncio.TimeoutError:
+            queue.put_nowait(LLMTimeoutError(f"Model {timeout:.0f} saniye içinde yanıt vermedi."))
+        except asyncio.CancelledError:
+            queue.put_nowait(LLMCancelledError("İstek iptal edildi."))
+            raise
+        except self._errors as e:
+            queue.put_nowait(LLMError(str(e)))
+        except Exception as e:
+            # Broken connection mid-stream (httpx), malformed chunk, ...
+            queue.put_nowait(LLMError(f"Model yanıtı okunamadı: {type(e).__name__}: {e}"))
+
+    async def _stream_into(self, messages: List[Dict[str, str]], queue: asyncio.Queue):
+        stream = await self._get_client().chat(model=self.model, messages=messages, stream=True)
+        async for part in stream:
+            content = part["message"]["content"]
+            if content:
+                queue.put_nowait(content)
+
+    def cancel(self, session_id: str = None) -> int:
+        """Cancel all in-flight requests of a session. Returns how many were cancelled."""
+        tasks = self._sessions.get(session_id, set())
+        for task in tasks:
+            if not task.done():
+                self._cancelled.add(task)
+                task.cancel()
+        return len(tasks)
+
+    def _discard(self, session_id: str, task: asyncio.Task):
+        self._cancelled.discard(task)
+        tasks = self._sessions.get(session_id)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del self._sessions[session_id]
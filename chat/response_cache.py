@@ -0,0 +1,120 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import hashlib
+import json
+import os
+import re
+import time
+from utils.turkish import turkish_lower
+
+
+class ResponseCache:
+    """LRU + TTL cache of LLM answers, persisted to disk.
+
+    Keys combine the normalized question, a hash of the retrieved context and
+    the model name. The whole cache is dropped when the vector store revision
+    it was built against changes.
+    """
+
+    def __init__(
+        self,
+        data_dir: str = "./data/cache",
+        max_entries: int = 1000,
+        ttl: float = 7 * 24 * 3600,
+    ):
+        self.data_dir = data_dir
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.cache_file = os.path.join(self.data_dir, "responses.json")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self.revision = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._load()
+
+    def make_key(self, message: str, context: List[str], model: str) -> str:
+        """Build the cache key for a question, its context and the model."""
+        context_hash = hashlib.sha256("\0".join(context).encode("utf-8")).hexdigest()
+        raw = "\0".join([self._normalize(message), context_hash, model])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def sync(self, revision: int):
+        """Invalidate all entries if the vector store changed since they were cached."""
+        if revision != self.revision:
+            self.entries.clear()
+            self.revision = revision
+            self._save()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached answer or None."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if time.time() - entry["created_at"] > self.ttl:
+            del self.entries[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry["answer"]
+
+    def put(self, key: str, answer: str):
+        """Store an answer, evicting the least recently used entries."""
+        self.entries[key] = {"answer": answer, "created_at": time.time()}
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        self._save()
+
+    def clear(self):
+        """Remove all cached answers."""
+        self.entries.clear()
+        self._save()
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _normalize(self, message: str) -> str:
+        message = re.sub(r"[^\w\s]", " ", turkish_lower(message))
+        return " ".join(message.split())
+
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # A corrupt cache is not worth failing startup for
+            return
+
+        self.revision = data.get("revision")
+        now = time.time()
+        for key, entry in data.get("entries", []):
+            if now - entry["created_at"] <= self.ttl:
+                self.entries[key] = entry
+
+    def _save(self):
+        # Write to a temp file first so a crash never leaves a truncated cache
+        tmp_file = self.cache_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({
+                "revision": self.revision,
+                "entries": list(self.entries.items())
+            }, f, ensure_ascii=False)
+        os.replace(tmp_file, self.cache_file)
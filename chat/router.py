@@ -0,0 +1,152 @@
+from typing import Callable, Dict, List, Optional, Tuple
+import math
+import re
+from utils.extraction import AMOUNT, RATE
+from utils.turkish import tokenize, turkish_lower
+
+# Tool name used when no tool matches and the message should go to RAG
+GENERAL = "general"
+
+# (tool, pattern, confidence) - checked in order, highest confidence wins
+DEFAULT_RULES = [
+    # A number alone is not a calculation ("191 indirilecek kdv", "3065 sayılı
+    # kdv kanunu"): it needs a TL amount, a rate or a verb
+    ("kdv_calculator", r"(?=.*\bkdv\b)(?=.*(?:" + AMOUNT + r"\s*(?:tl\b|₺|lira)|" + RATE + r"|\bhesapla))", 0.95),
+    ("kdv_calculator", r"\bkdv\b.*\bhesapla", 0.9),
+    ("hesap_plani", r"\bhesap\s+plan", 0.95),
+    ("hesap_plani", r"\bhesap\b.*\bplan", 0.85),
+    ("deadline_tracker", r"\bbeyanname\w*\b.*\b(?:ne zaman|son (?:tarih|gün))", 0.97),
+    ("deadline_tracker", r"\bson (?:tarih|gün)", 0.85),
+    ("deadline_tracker", r"\bbeyanname", 0.8),
+    ("email_writer", r"\be-?posta|\bmail\b", 0.9),
+    ("accounting_system", r"\b(?:dbs|zirve)\b", 0.9),
+    ("accounting_system", r"\b(?:iş|parti)\s*(?:#\d+|\d+\S*\s+(?:durum|ne durumda))|\bkayıt kuyru|\bkuyru\w*\s+durum", 0.9),
+    ("pdf_parser", r"\bpdf\b|\be-?fatura", 0.8),
+    ("pdf_parser", r"fatura", 0.65),
+    ("kdv_calculator", r"\bkdv\b", 0.5),
+]
+
+# Seed phrases for the local classifier, used when no rule is confident enough
+DEFAULT_EXAMPLES = {
+    "kdv_calculator": [
+        "katma değer vergisi hesapla",
+        "vergi dahil tutar ne kadar",
+        "matrah üzerinden vergi hesapla",
+        "yüzde yirmi vergi ekle",
+    ],
+    "hesap_plani": [
+        "hangi hesaba kaydedilir",
+        "alıcılar hesabının kodu",
+        "tek düzen hesap kodu",
+        "satıcılar hesabı hangisi",
+    ],
+    "deadline_tracker": [
+        "muhtasar ne zaman verilir",
+        "geçici vergi son günü",
+        "yaklaşan bildirimler neler",
+        "ba bs formu tarihi",
+    ],
+    "email_writer": [
+        "müşteriye yazı hazırla",
+        "resmi yazışma oluştur",
+        "ödeme hatırlatma yazısı yaz",
+        "bilgilendirme mektubu yaz",
+    ],
+    GENERAL: [
+        "stopaj oranı nedir",
+        "bu ne demek",
+        "mevzuatta nasıl düzenlenmiş",
+        "vergi kanunu maddesi ne diyor",
+        "istisna kapsamı nedir",
+    ],
+}
+
+
+class NaiveBayesClassifier:
+    """Small multinomial Naive Bayes classifier over word tokens."""
+
+    def __init__(self, examples: Dict[str, List[str]] = None, alpha: float = 1.0):
+        self.alpha = alpha
+        self.word_counts: Dict[str, Dict[str, int]] = {}
+        self.totals: Dict[str, int] = {}
+        self.priors: Dict[str, float] = {}
+        self.vocabulary = set()
+        self.fit(examples or DEFAULT_EXAMPLES)
+
+    def fit(self, examples: Dict[str, List[str]]):
+        """Train the classifier from {label: [phrase, ...]}."""
+        n_examples = sum(len(phrases) for phrases in examples.values())
+        for label, phrases in examples.items():
+            counts = self.word_counts.setdefault(label, {})
+            for phrase in phrases:
+                for token in tokenize(phrase):
+                    counts[token] = counts.get(token, 0) + 1
+                    self.vocabulary.add(token)
+            self.totals[label] = sum(counts.values())
+            self.priors[label] = math.log(len(phrases) / n_examples)
+
+    def __call__(self, message: str) -> Tuple[str, float]:
+        """Return the most likely label and its posterior probability."""
+        tokens = [t for t in tokenize(message) if t in self.vocabulary]
+        if not tokens or not self.word_counts:
+            return GENERAL, 0.0
+
+        vocab_size = len(self.vocabulary)
+        scores = {}
+        for label, counts in self.word_counts.items():
+            denominator = self.totals[label] + self.alpha * vocab_size
+            score = self.priors[label]
+            for token in tokens:
+                score += math.log((counts.get(token, 0) + self.alpha) / denominator)
+            scores[label] = score
+
+        # Softmax over log scores to get a confidence in [0, 1]
+        best = max(scores, key=scores.get)
+        peak = scores[best]
+        norm = sum(math.exp(s - peak) for s in scores.values())
+        return best, 1.0 / norm
+
+
+class ToolRouter:
+    """Route messages to tools with keyword rules first, then a local classifier."""
+
+    def __init__(
+        self,
+        rules: List[Tuple[str, str, float]] = None,
+        classifier: Optional[Callable[[str], Tuple[str, float]]] = None,
+        min_confidence: float = 0.6,
+    ):
+        self.rules = [
+            (tool, re.compile(pattern), confidence)
+            for tool, pattern, confidence in (rules or DEFAULT_RULES)
+        ]
+        self.classifier = classifier
+        self.min_confidence = min_confidence
+
+    def route(self, message: str) -> Tuple[str, float]:
+        """Return (tool name, confidence) for a message.
+
+        The tool name is GENERAL when the message should be answered from
+        the vector store instead of a tool.
+        """
+        text = turkish_lower(message)
+
+        # Tier 1: keyword and regex rules
+        best_tool, best_confidence = GENERAL, 0.0
+        for tool, pattern, confidence in self.rules:
+            if confidence > best_confidence and pattern.search(text):
+                best_tool, best_confidence = tool, confidence
+
+        if best_confidence >= self.min_confidence:
+            return best_tool, best_confidence
+
+        # Tier 2: optional local classifier
+        if self.classifier is not None:
+            tool, confidence = self.classifier(message)
+            if confidence >= self.min_confidence and confidence > best_confidence:
+                return tool, confidence
+
+        if best_tool != GENERAL and best_confidence > 0:
+            # Weak rule match - let the vector store answer instead
+            return GENERAL, 1.0 - best_confidence
+        return GENERAL, 1.0
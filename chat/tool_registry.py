@@ -0,0 +1,119 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ToolUnavailable(Exception):
+    """Raised when a tool cannot be loaded because an optional dependency is missing."""
+
+
+class _Entry:
+    def __init__(self, name: str, target: str, requires: Sequence[str], factory: Optional[Callable],
+                 kwargs: Dict[str, Any]):
+        self.name = name
+        self.module, _, self.attribute = target.partition(":")
+        self.requires = tuple(requires)
+        self.factory = factory
+        self.kwargs = kwargs
+        self.lock = threading.Lock()
+        self.instance: Any = None
+        self.loaded = False
+        self.error: Optional[Exception] = None
+        self.import_s = 0.0
+        self.init_s = 0.0
+
+
+class ToolRegistry:
+    """Tools and the services they share, imported and built on first use.
+
+    Each entry names its class as "module:Class"; nothing is imported until
+    the entry is first looked up, so startup only pays for what a request
+    actually needs. ``requires`` lists entries passed to the constructor
+    (loaded first); ``factory`` replaces the constructor call when more
+    wiring is needed. A tool whose module or constructor raises ImportError
+    (an optional dependency, e.g. pyautogui on a headless server) raises
+    ToolUnavailable instead, and the rest keep working. Import and init
+    times are kept per entry for ``profile``.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+
+    def register(self, name: str, target: str, requires: Sequence[str] = (), factory: Callable = None, **kwargs):
+        self._entries[name] = _Entry(name, target, requires, factory, kwargs)
+
+    def __getitem__(self, name: str) -> Any:
+        return self.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def get(self, name: str) -> Any:
+        entry = self._entries[name]
+        if entry.loaded:
+            return entry.instance
+        # Dependencies first, outside this entry's lock and timing
+        dependencies = [self.get(required) for required in entry.requires]
+        with entry.lock:
+            if not entry.loaded:
+                self._load(entry, dependencies)
+        if entry.error is not None:
+            raise ToolUnavailable(f"{name} bu sunucuda kullanılamıyor: {entry.error}") from entry.error
+        return entry.instance
+
+    def is_loaded(self, name: str) -> bool:
+        return self._entries[name].loaded
+
+    def preload(self, names: Sequence[str] = None):
+        """Load entries ahead of the first request (e.g. in the background)."""
+        for name in names or list(self._entries):
+            try:
+                self.get(name)
+            except ToolUnavailable as e:
+                logger.warning("%s", e)
+            except Exception:
+                logger.exception("Could not load %s", name)
+
+    def profile(self) -> List[Dict[str, Any]]:
+        """Import and init seconds of every loaded entry, slowest first."""
+        rows = [
+            {"name": e.name, "import_s": e.import_s, "init_s": e.init_s,
+             "status": "unavailable" if e.error else "loaded"}
+            for e in self._entries.values() if e.loaded
+        ]
+        return sorted(rows, key=lambda row: row["import_s"] + row["init_s"], reverse=True)
+
+    def format_profile(self) -> str:
+        lines = [f"{'component':<20} {'import ms':>10} {'init ms':>9}  status"]
+        for row in self.profile():
+            lines.append(f"{row['name']:<20} {row['import_s'] * 1000:>10.1f} {row['init_s'] * 1000:>9.1f}  "
+                         f"{row['status']}")
+        return "\n".join(lines)
+
+    def _load(self, entry: _Entry, dependencies: List[Any]):
+        try:
+            start = time.perf_counter()
+            try:
+                module = importlib.import_module(entry.module)
+            finally:
+                entry.import_s = time.perf_counter() - start
+            start = time.perf_counter()
+            try:
+                if entry.factory is not None:
+                    entry.instance = entry.factory(module, *dependencies, **entry.kwargs)
+                else:
+                    entry.instance = getattr(module, entry.attribute)(*dependencies, **entry.kwargs)
+            finally:
+                entry.init_s = time.perf_counter() - start
+        except ImportError as e:
+            entry.error = e
+        entry.loaded = True
+        logger.info("Loaded %s (import %.0f ms, init %.0f ms)", entry.name, entry.import_s * 1000,
+                    entry.init_s * 1000)
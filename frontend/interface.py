@@ -1,5 +1,6 @@
 import gradio as gr
-from typing import List, Dict
+import os
+import tempfile
 from chat.assistant import MaliBotAssistant
 
 def create_gradio_interface(assistant: MaliBotAssistant):
@@ -17,6 +18,7 @@ def create_gradio_interface(assistant: MaliBotAssistant):
         - Resmi Yazışma Oluşturma
         - Beyanname Takibi
         """)
+        deadline_banner = gr.Markdown(assistant.notifications.render())
         
         with gr.Row():
             with gr.Column(scale=4):
@@ -40,29 +42,132 @@ def create_gradio_interface(assistant: MaliBotAssistant):
                 with gr.Group():
                     gr.Markdown("### Dosya Yükleme")
                     pdf_upload = gr.File(
-                        label="PDF Dosyası Yükle",
-                        file_types=[".pdf"]
+                        label="PDF / E-Fatura XML Yükle",
+                        file_types=[".pdf", ".xml"]
                     )
-                    upload_btn = gr.Button("Yükle")
+                    with gr.Row():
+                        upload_btn = gr.Button("Yükle")
+                        regulation_btn = gr.Button("Mevzuat Ekle")
+                with gr.Group():
+                    gr.Markdown("### Toplu E-Fatura")
+                    batch_upload = gr.File(
+                        label="E-Fatura ZIP / XML Dosyası",
+                        file_types=[".zip", ".xml"]
+                    )
+                    batch_format = gr.Radio(["csv", "parquet"], value="csv", label="Çıktı Biçimi")
+                    batch_btn = gr.Button("Faturaları İşle")
+                    batch_result = gr.File(label="Sonuç", file_count="multiple")
+                with gr.Group():
+                    gr.Markdown("### Muhasebe Fiş Aktarımı")
+                    fis_upload = gr.File(
+                        label="Fiş Satırları (CSV / Excel / Parquet)",
+                        file_types=[".csv", ".xlsx", ".parquet"]
+                    )
+                    fis_system = gr.Radio(["zirve", "dbs"], value="zirve", label="Muhasebe Programı")
+                    fis_btn = gr.Button("Aktarım Dosyası Oluştur")
+                    fis_result = gr.File(label="Aktarım Dosyası", file_count="multiple")
         
         async def user(user_message, history):
             history = history or []
             history.append([user_message, None])
             return "", history
         
-        async def bot(history):
+        async def bot(history, request: gr.Request):
             user_message = history[-1][0]
-            bot_message = await assistant.process_message(user_message, history)
-            history[-1][1] = bot_message
+            history[-1][1] = ""
+            async for chunk in assistant.stream_message(user_message, history, request.session_hash):
+                history[-1][1] += chunk
+                yield history
+        
+        def clear(request: gr.Request):
+            # Stop any generation still running for this session
+            assistant.cancel(request.session_hash)
+            return None
+        
+        async def upload_file(file, history, request: gr.Request):
+            history = history or []
+            if file is None:
+                history.append([None, "Lütfen bir dosya seçin."])
+                return history
+            name = os.path.basename(file.name)
+            assistant.register_upload(file.name, request.session_hash)
+            history.append([None, f"{name} yüklendi. İçeriğini görmek için 'faturayı oku' yazabilirsiniz."])
+            return history
+        
+        async def add_regulation(file, history):
+            # Only documents added here are searched when answering questions
+            history = history or []
+            if file is None:
+                history.append([None, "Lütfen mevzuat belgesini (PDF) seçin."])
+                return history
+            name = os.path.basename(file.name)
+            if not name.lower().endswith(".pdf"):
+                history.append([None, "Mevzuat olarak yalnızca PDF belgeleri eklenebilir."])
+                return history
+            try:
+                stats = await assistant.ingest_document(file.name)
+            except Exception as e:
+                history.append([None, f"{name} işlenirken bir hata oluştu: {str(e)}"])
+                return history
+            history.append([None, (
+                f"{name} mevzuata eklendi: {stats['pages']} sayfa, {stats['chunks']} parça "
+                f"({stats['added']} yeni, {stats['chunks'] - stats['added']} zaten kayıtlı)."
+            )])
             return history
         
-        async def upload_file(file):
+        async def process_batch(file, output_format, history, progress=gr.Progress()):
+            history = history or []
+            if file is None:
+                history.append([None, "Lütfen e-faturaları içeren bir ZIP veya XML dosyası seçin."])
+                return history, None
+            output_path = os.path.join(
+                tempfile.mkdtemp(prefix="efatura_"),
+                os.path.splitext(os.path.basename(file.name))[0] + "." + output_format
+            )
+            try:
+                summary = await assistant.process_invoice_batch(
+                    file.name, output_path, lambda done, total: progress((done, total), desc="Faturalar işleniyor")
+                )
+            except Exception as e:
+                history.append([None, f"Toplu işlem sırasında bir hata oluştu: {str(e)}"])
+                return history, None
+            message = (
+                f"{summary['basarili']}/{summary['toplam']} dosyadan {summary['fatura']} fatura "
+                f"{summary['sure']:.1f} saniyede işlendi."
+            )
+            files = [summary["cikti"]]
+            if summary["hata_raporu"]:
+                message += f" {summary['hatali']} dosya okunamadı, hata raporu ektedir."
+                files.append(summary["hata_raporu"])
+            history.append([None, message])
+            return history, files
+        
+        async def export_fis(file, system, history):
+            history = history or []
             if file is None:
-                return "Lütfen bir dosya seçin."
-            # Here you would implement file processing logic
-            return f"Dosya yüklendi: {file.name}"
+                history.append([None, "Lütfen fiş satırlarını içeren bir dosya seçin."])
+                return history, None
+            output_path = os.path.join(
+                tempfile.mkdtemp(prefix="fis_"),
+                os.path.splitext(os.path.basename(file.name))[0] + "_" + system
+            )
+            try:
+                summary = await assistant.export_fis_batch(file.name, system, output_path)
+            except Exception as e:
+                history.append([None, f"Aktarım dosyası oluşturulurken bir hata oluştu: {str(e)}"])
+                return history, None
+            message = f"{summary['fis']} fiş ({summary['satir']} satır) aktarım dosyasına yazıldı."
+            files = [summary["dosya"]]
+            if summary["hata_raporu"]:
+                message += f" {summary['hatali_fis']} fiş hatalı olduğu için dışarıda bırakıldı, hata raporu ektedir."
+                files.append(summary["hata_raporu"])
+            history.append([None, message])
+            return history, files
         
-        submit_btn.click(
+        def refresh_banner():
+            return assistant.notifications.render()
+        
+        bot_event = submit_btn.click(
             user,
             [txt, chatbot],
             [txt, chatbot]
@@ -72,11 +177,31 @@ def create_gradio_interface(assistant: MaliBotAssistant):
             chatbot
         )
         
-        clear_btn.click(lambda: None, None, chatbot, queue=False)
+        clear_btn.click(clear, None, chatbot, queue=False, cancels=[bot_event])
         upload_btn.click(
             upload_file,
-            pdf_upload,
+            [pdf_upload, chatbot],
+            chatbot
+        )
+        regulation_btn.click(
+            add_regulation,
+            [pdf_upload, chatbot],
             chatbot
         )
+        batch_btn.click(
+            process_batch,
+            [batch_upload, batch_format, chatbot],
+            [chatbot, batch_result]
+        )
+        fis_btn.click(
+            export_fis,
+            [fis_upload, fis_system, chatbot],
+            [chatbot, fis_result]
+        )
+        # Reminders are pushed by the scheduler; the page picks them up every minute
+        if hasattr(gr, "Timer"):
+            gr.Timer(60).tick(refresh_banner, None, deadline_banner)
+        else:
+            interface.load(refresh_banner, None, deadline_banner, every=60)
     
     return interface 
\ No newline at end of file
@@ -1,15 +1,34 @@
 import os
-import gradio as gr
+import sys
+import logging
+import threading
 from chat.assistant import MaliBotAssistant
 from frontend.interface import create_gradio_interface
 
 def main():
-    # Initialize the MaliBot assistant
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    
+    # Initialize the MaliBot assistant; tools load on first use
     assistant = MaliBotAssistant()
     
+    if "--profile-startup" in sys.argv:
+        # Load everything now and report import / init time per component
+        assistant.tools.preload()
+        print(assistant.tools.format_profile())
+        return
+    
     # Create and launch the Gradio interface
     interface = create_gradio_interface(assistant)
-    interface.launch(server_name="0.0.0.0", server_port=7860)
+    interface.launch(server_name="0.0.0.0", server_port=7860, prevent_thread_lock=True)
+    
+    # With the port bound, start deadline reminders and queued GUI entries and
+    # warm up the remaining tools (MALIBOT_PRELOAD=0 leaves them to first use)
+    threading.Thread(
+        target=assistant.start_background_services,
+        kwargs={"preload": os.getenv("MALIBOT_PRELOAD", "1") != "0"},
+        name="startup", daemon=True
+    ).start()
+    interface.block_thread()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
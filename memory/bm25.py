@@ -0,0 +1,101 @@
+from collections import Counter
+from typing import Iterable, List, Set, Tuple
+import math
+import sqlite3
+import threading
+from utils.turkish import analyze
+
+
+class BM25Index:
+    """Persistent inverted index with Okapi BM25 scoring.
+
+    Postings live in SQLite and are updated incrementally as documents are
+    added; a query only reads the posting lists of its own terms. Document
+    ids are the VectorStore ids, so results can be fused with vector hits.
+    """
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS postings_term ON postings (term);
+            CREATE TABLE IF NOT EXISTS doc_lengths (
+                doc_id INTEGER PRIMARY KEY,
+                length INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS stats (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                n_docs INTEGER NOT NULL,
+                total_length INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO stats (id, n_docs, total_length) VALUES (0, 0, 0);
+        """)
+        self._lock = threading.RLock()
+
+    def count(self) -> int:
+        """Number of indexed documents (ids are contiguous)."""
+        with self._lock:
+            row = self.conn.execute("SELECT max(doc_id) FROM doc_lengths").fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def add(self, doc_ids: Iterable[int], texts: Iterable[str]):
+        """Index documents in one transaction."""
+        postings, lengths = [], []
+        for doc_id, text in zip(doc_ids, texts):
+            terms = Counter(analyze(text))
+            postings.extend((term, doc_id, tf) for term, tf in terms.items())
+            lengths.append((doc_id, sum(terms.values())))
+
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)", postings)
+            self.conn.executemany("INSERT INTO doc_lengths (doc_id, length) VALUES (?, ?)", lengths)
+            self.conn.execute(
+                "UPDATE stats SET n_docs = n_docs + ?, total_length = total_length + ? WHERE id = 0",
+                (len(lengths), sum(length for _, length in lengths))
+            )
+
+    def search(self, query: str, n_results: int = 10, allowed: Set[int] = None) -> List[Tuple[int, float]]:
+        """Return up to n_results (doc_id, score) pairs, best first."""
+        terms = set(analyze(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            n_docs, total_length = self.conn.execute(
+                "SELECT n_docs, total_length FROM stats WHERE id = 0"
+            ).fetchone()
+            if not n_docs:
+                return []
+            avg_length = total_length / n_docs or 1.0
+
+            scores = Counter()
+            for term in terms:
+                rows = self.conn.execute(
+                    "SELECT p.doc_id, p.tf, d.length FROM postings p "
+                    "JOIN doc_lengths d ON d.doc_id = p.doc_id WHERE p.term = ?", (term,)
+                ).fetchall()
+                if not rows:
+                    continue
+                idf = math.log(1 + (n_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+                for doc_id, tf, length in rows:
+                    if allowed is not None and doc_id not in allowed:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return scores.most_common(n_results)
+
+    def clear(self):
+        """Remove all documents from the index."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM postings")
+            self.conn.execute("DELETE FROM doc_lengths")
+            self.conn.execute("UPDATE stats SET n_docs = 0, total_length = 0 WHERE id = 0")
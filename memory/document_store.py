@@ -0,0 +1,235 @@
+from typing import Any, Dict, Iterator, List, Set, Tuple
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+
+def content_hash(text: str) -> str:
+    """Hash of a text with whitespace normalized, used to skip duplicate chunks."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+class DocumentStore:
+    """SQLite-backed document and metadata storage for VectorStore.
+
+    Row ids are the FAISS vector ids (0, 1, 2, ...), so a search only has to
+    read the rows it returns. Nothing is loaded into memory up front.
+    Metadata fields are also kept in an inverted index (field, value) -> ids
+    for filtered search.
+    """
+
+    SCHEMA_VERSION = 2
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                text TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                content_hash TEXT
+            );
+            CREATE TABLE IF NOT EXISTS state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS metadata_index (
+                field TEXT NOT NULL,
+                value TEXT NOT NULL,
+                doc_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS metadata_lookup ON metadata_index (field, value, doc_id);
+        """)
+        self._lock = threading.RLock()
+        self._upgrade()
+
+    def _upgrade(self):
+        """Backfill indexes added after documents were first stored."""
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            with self.conn:
+                for doc_id, metadata in self.conn.execute("SELECT id, metadata FROM documents").fetchall():
+                    self._index_metadata(doc_id, json.loads(metadata))
+        if version < 2:
+            with self.conn:
+                columns = [row[1] for row in self.conn.execute("PRAGMA table_info(documents)")]
+                if "content_hash" not in columns:
+                    self.conn.execute("ALTER TABLE documents ADD COLUMN content_hash TEXT")
+                for doc_id, text in self.conn.execute("SELECT id, text FROM documents").fetchall():
+                    self.conn.execute("UPDATE documents SET content_hash = ? WHERE id = ?", (content_hash(text), doc_id))
+                self.conn.execute("CREATE INDEX IF NOT EXISTS documents_hash ON documents (content_hash)")
+        self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    def count(self) -> int:
+        """Number of stored documents (ids are contiguous, so this is max(id) + 1)."""
+        with self._lock:
+            row = self.conn.execute("SELECT max(id) FROM documents").fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def add_many(self, texts: List[str], metadatas: List[dict]) -> List[int]:
+        """Append documents in one transaction and return their ids."""
+        with self._lock, self.conn:
+            start = self.count()
+            ids = list(range(start, start + len(texts)))
+            self.conn.executemany(
+                "INSERT INTO documents (id, text, metadata, content_hash) VALUES (?, ?, ?, ?)",
+                ((i, text, json.dumps(metadata or {}, ensure_ascii=False), content_hash(text))
+                 for i, text, metadata in zip(ids, texts, metadatas))
+            )
+            for doc_id, metadata in zip(ids, metadatas):
+                self._index_metadata(doc_id, metadata or {})
+        return ids
+
+    def _index_metadata(self, doc_id: int, metadata: dict):
+        rows = []
+        for field, value in metadata.items():
+            # List values (e.g. several laws) are indexed element by element
+            for item in value if isinstance(value, (list, tuple)) else [value]:
+                if item is not None:
+                    rows.append((field, self._index_value(item), doc_id))
+        self.conn.executemany("INSERT INTO metadata_index (field, value, doc_id) VALUES (?, ?, ?)", rows)
+
+    def _index_value(self, value: Any) -> str:
+        return value if isinstance(value, str) else json.dumps(value)
+
+    def filter_ids(self, where: Dict[str, Any]) -> List[int]:
+        """Return sorted ids whose metadata matches every field in ``where``.
+
+        A field matches a scalar value exactly, or any value of a list, e.g.
+        ``{"client": "ABC Ltd", "doc_type": ["tebliğ", "kanun"]}``.
+        """
+        clauses, params = [], []
+        for field, value in where.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            placeholders = ",".join("?" * len(values))
+            clauses.append(f"SELECT doc_id FROM metadata_index WHERE field = ? AND value IN ({placeholders})")
+            params.append(field)
+            params.extend(self._index_value(v) for v in values)
+
+        with self._lock:
+            rows = self.conn.execute(" INTERSECT ".join(clauses) + " ORDER BY doc_id", params).fetchall()
+        return [row[0] for row in rows]
+
+    def existing_hashes(self, hashes: List[str]) -> Set[str]:
+        """Return the subset of content hashes already stored."""
+        found = set()
+        with self._lock:
+            for i in range(0, len(hashes), 500):
+                chunk = hashes[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(row[0] for row in self.conn.execute(
+                    f"SELECT content_hash FROM documents WHERE content_hash IN ({placeholders})", chunk
+                ))
+        return found
+
+    def get_texts(self, ids: List[int]) -> List[str]:
+        """Return texts for the given ids, in the same order."""
+        return [text for text, _ in self.get(ids)]
+
+    def get(self, ids: List[int]) -> List[Tuple[str, dict]]:
+        """Return (text, metadata) for the given ids, in the same order."""
+        if not ids:
+            return []
+        rows = {}
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for doc_id, text, metadata in self.conn.execute(
+                    f"SELECT id, text, metadata FROM documents WHERE id IN ({placeholders})",
+                    [int(doc_id) for doc_id in chunk]
+                ):
+                    rows[doc_id] = (text, json.loads(metadata))
+        return [rows[int(doc_id)] for doc_id in ids if int(doc_id) in rows]
+
+    def iter_texts(self, start: int = 0, batch_size: int = 10000) -> Iterator[List[str]]:
+        """Yield texts with id >= start in id order, batch by batch."""
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT id, text FROM documents WHERE id >= ? ORDER BY id LIMIT ?",
+                    (start, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield [text for _, text in rows]
+            start = rows[-1][0] + 1
+
+    def clear(self):
+        """Delete all documents."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM documents")
+            self.conn.execute("DELETE FROM metadata_index")
+
+    def get_state(self) -> Dict[str, object]:
+        """Return the persisted key/value state."""
+        with self._lock:
+            return {key: json.loads(value) for key, value in self.conn.execute("SELECT key, value FROM state")}
+
+    def set_state(self, **values):
+        """Persist key/value state entries."""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+                ((key, json.dumps(value)) for key, value in values.items())
+            )
+
+
+def migrate_json(data_dir: str, store: DocumentStore, batch_size: int = 10000) -> int:
+    """Move documents from documents.json / documents.jsonl into the store.
+
+    Returns the number of migrated documents. The JSON files are removed
+    afterwards, so this only ever runs once per data directory.
+    """
+    legacy_path = os.path.join(data_dir, "documents.json")
+    journal_path = os.path.join(data_dir, "documents.jsonl")
+    state_path = os.path.join(data_dir, "state.json")
+    migrated = 0
+
+    if not (os.path.exists(legacy_path) or os.path.exists(journal_path)):
+        return 0
+    # The JSON files are only deleted after a successful migration, so rows
+    # left over from an interrupted run are discarded and migrated again
+    store.clear()
+
+    if os.path.exists(legacy_path):
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        documents, metadata = data["documents"], data["metadata"]
+        for i in range(0, len(documents), batch_size):
+            store.add_many(documents[i:i + batch_size], metadata[i:i + batch_size])
+        # The legacy index was built from SHA-256 digests and must be rebuilt
+        store.set_state(revision=data.get("revision", 0), embedder=None)
+        migrated += len(documents)
+        os.remove(legacy_path)
+
+    if os.path.exists(journal_path):
+        texts, metadatas = [], []
+        with open(journal_path, "rb") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    break  # Torn final line from an interrupted flush
+                texts.append(row["text"])
+                metadatas.append(row["metadata"])
+                if len(texts) == batch_size:
+                    store.add_many(texts, metadatas)
+                    migrated += len(texts)
+                    texts, metadatas = [], []
+        if texts:
+            store.add_many(texts, metadatas)
+            migrated += len(texts)
+        os.remove(journal_path)
+
+    if os.path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as f:
+            store.set_state(**json.load(f))
+        os.remove(state_path)
+
+    return migrated
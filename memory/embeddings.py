@@ -0,0 +1,151 @@
+import numpy as np
+from typing import Dict, List
+import hashlib
+import os
+import sqlite3
+import threading
+import zlib
+from utils.turkish import tokenize
+
+
+class EmbeddingProvider:
+    """Turns texts into L2-normalized float32 vectors of a fixed dimension."""
+
+    name = "base"
+    dimension = 0
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts into a (len(texts), dimension) array."""
+        raise NotImplementedError
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """Offline bag-of-words embeddings using the hashing trick.
+
+    Each word and word bigram is hashed into one of ``dimension`` buckets
+    with a pseudo-random sign, so texts sharing vocabulary end up close.
+    """
+
+    def __init__(self, dimension: int = 512):
+        self.dimension = dimension
+        self.name = f"hashing-{dimension}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            features = tokens + [a + " " + b for a, b in zip(tokens, tokens[1:])]
+            if not features:
+                continue
+            hashes = np.array([zlib.crc32(f.encode("utf-8")) for f in features], dtype=np.uint64)
+            signs = np.where(hashes & 1, 1.0, -1.0).astype(np.float32)
+            np.add.at(embeddings[row], (hashes >> 1) % self.dimension, signs)
+        return _normalize(embeddings)
+
+
+class OllamaEmbeddingProvider(EmbeddingProvider):
+    """Embeddings from an Ollama embedding model such as nomic-embed-text."""
+
+    def __init__(self, model: str = "nomic-embed-text", host: str = None):
+        import ollama
+
+        self.model = model
+        self.name = f"ollama-{model}"
+        self.client = ollama.Client(host=host or os.getenv("OLLAMA_HOST", "http://localhost:11434"))
+        self.dimension = len(self.embed(["boyut"])[0])
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        response = self.client.embed(model=self.model, input=texts)
+        return _normalize(np.array(response["embeddings"], dtype=np.float32))
+
+
+class EmbeddingCache:
+    """On-disk embedding cache keyed by provider name and text hash."""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        """Return {key: vector bytes} for the keys that are cached."""
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ))
+        return found
+
+    def put_many(self, items: Dict[str, bytes]):
+        """Store {key: vector bytes}."""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", items.items()
+            )
+
+
+class CachedEmbedder:
+    """Embeds texts in batches, reusing cached vectors for unchanged texts."""
+
+    def __init__(self, provider: EmbeddingProvider, cache: EmbeddingCache = None, batch_size: int = 64):
+        self.provider = provider
+        self.cache = cache
+        self.batch_size = batch_size
+
+    @property
+    def dimension(self) -> int:
+        return self.provider.dimension
+
+    def embed(self, texts: List[str], use_cache: bool = True) -> np.ndarray:
+        """Embed texts, calling the provider only for cache misses."""
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        keys = [self._key(text) for text in texts]
+
+        cached = self.cache.get_many(list(set(keys))) if use_cache and self.cache else {}
+        missing = {}  # key -> first position, so duplicate texts are embedded once
+        for i, key in enumerate(keys):
+            if key in cached:
+                embeddings[i] = np.frombuffer(cached[key], dtype=np.float32)
+            else:
+                missing.setdefault(key, i)
+
+        miss_keys = list(missing)
+        computed = {}
+        for start in range(0, len(miss_keys), self.batch_size):
+            batch = miss_keys[start:start + self.batch_size]
+            vectors = self.provider.embed([texts[missing[key]] for key in batch])
+            computed.update(zip(batch, vectors))
+
+        for i, key in enumerate(keys):
+            if key in computed:
+                embeddings[i] = computed[key]
+
+        if use_cache and self.cache and computed:
+            self.cache.put_many({key: vector.tobytes() for key, vector in computed.items()})
+        return embeddings
+
+    def _key(self, text: str) -> str:
+        return self.provider.name + ":" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def get_provider(spec: str = None) -> EmbeddingProvider:
+    """Build a provider from a spec like "hashing", "hashing:256" or "ollama:nomic-embed-text"."""
+    spec = spec or os.getenv("MALIBOT_EMBEDDER", "hashing")
+    kind, _, option = spec.partition(":")
+    if kind == "hashing":
+        return HashingEmbeddingProvider(int(option) if option else 512)
+    if kind == "ollama":
+        return OllamaEmbeddingProvider(option or "nomic-embed-text")
+    raise ValueError(f"Unknown embedding provider: {spec}")
+
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
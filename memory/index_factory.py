@@ -0,0 +1,86 @@
+import faiss
+import math
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+
+def needs_training(index_type: str) -> bool:
+    """IVF indexes need a k-means pass over real vectors before use."""
+    return index_type in ("ivf_flat", "ivf_pq")
+
+
+def default_nlist(n_vectors: int) -> int:
+    """Number of IVF cells: ~4*sqrt(N), keeping >= 39 training points per cell."""
+    nlist = int(4 * math.sqrt(max(n_vectors, 1)))
+    return max(1, min(nlist, n_vectors // 39 or 1, 65536))
+
+
+def default_pq_m(dimension: int) -> int:
+    """Largest divisor of the dimension giving sub-vectors of 4+ dimensions."""
+    for m in range(max(dimension // 4, 1), 0, -1):
+        if dimension % m == 0 and m <= 64:
+            return m
+    return 1
+
+
+def create_index(
+    index_type: str,
+    dimension: int,
+    n_vectors: int = 0,
+    nlist: int = None,
+    pq_m: int = None,
+    hnsw_m: int = 32,
+) -> faiss.Index:
+    """Create an empty (untrained) index of the given type.
+
+    ``n_vectors`` is the expected corpus size and is used to size IVF cells.
+    """
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dimension)
+    if index_type == "hnsw":
+        return faiss.IndexHNSWFlat(dimension, hnsw_m)
+
+    quantizer = faiss.IndexFlatL2(dimension)
+    nlist = nlist or default_nlist(n_vectors)
+    if index_type == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizer, dimension, nlist)
+    if index_type == "ivf_pq":
+        return faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m or default_pq_m(dimension), 8)
+    raise ValueError(f"Unknown index type: {index_type}. Expected one of {', '.join(INDEX_TYPES)}")
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """Return the factory name of an existing index."""
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def set_search_params(index: faiss.Index, nprobe: int = None, ef_search: int = None):
+    """Apply query-time knobs; ignored for index types they do not apply to."""
+    if nprobe is not None and isinstance(index, faiss.IndexIVF):
+        index.nprobe = nprobe
+    if ef_search is not None and isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search
+
+
+def search_parameters(index: faiss.Index, selector: faiss.IDSelector, selectivity: float,
+                      nprobe: int = None, ef_search: int = None) -> faiss.SearchParameters:
+    """Search parameters restricting results to ``selector``.
+
+    ``selectivity`` is the fraction of the corpus the selector allows. Fewer
+    allowed ids means fewer hits per visited IVF cell or HNSW neighbourhood,
+    so nprobe / efSearch are widened proportionally to keep recall.
+    """
+    scale = 1.0 / max(selectivity, 1e-6)
+    if isinstance(index, faiss.IndexIVF):
+        probes = min(index.nlist, int((nprobe or index.nprobe) * scale))
+        return faiss.SearchParametersIVF(sel=selector, nprobe=max(probes, 1))
+    if isinstance(index, faiss.IndexHNSW):
+        ef = min(4096, int((ef_search or index.hnsw.efSearch) * scale))
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=max(ef, 1))
+    return faiss.SearchParameters(sel=selector)
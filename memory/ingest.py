@@ -0,0 +1,91 @@
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+import logging
+import os
+import re
+from memory.vector_store import VectorStore
+from tools.pdf_parser import PDFParser
+from utils.tokens import count_tokens, split_tokens
+
+logger = logging.getLogger(__name__)
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def chunk_text(text: str, max_tokens: int = 400, overlap: int = 40) -> List[str]:
+    """Pack paragraphs into chunks of at most max_tokens tokens.
+
+    Paragraphs longer than max_tokens are split on token boundaries with
+    ``overlap`` tokens shared between consecutive pieces.
+    """
+    chunks, current, current_tokens = [], [], 0
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        tokens = count_tokens(paragraph)
+        if tokens > max_tokens:
+            if current:
+                chunks.append("\n\n".join(current))
+                current, current_tokens = [], 0
+            chunks.extend(split_tokens(paragraph, max_tokens, overlap))
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(paragraph)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def chunk_pages(pages: Iterable[Tuple[int, str]], max_tokens: int = 400,
+                overlap: int = 40) -> Iterator[Tuple[int, str]]:
+    """Yield (page_number, chunk) pairs.
+
+    Pages are chunked independently so that re-uploading an edited file only
+    produces new chunks for the pages that changed; the rest are deduplicated.
+    """
+    for number, text in pages:
+        for chunk in chunk_text(text, max_tokens, overlap):
+            yield number, chunk
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most size items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ingest_pdf(file_path: str, vector_store: VectorStore, metadata: Dict[str, Any] = None,
+               batch_size: int = 64, max_tokens: int = 400, overlap: int = 40,
+               parser: PDFParser = None) -> Dict[str, int]:
+    """Stream a PDF into the vector store page by page.
+
+    Chunks are embedded and added in batches, so memory use is bounded by
+    ``batch_size`` regardless of the document size. Chunks already stored
+    (by content hash) are skipped. Returns page and chunk counts.
+    """
+    parser = parser or PDFParser()
+    source = os.path.basename(file_path)
+    stats = {"pages": 0, "chunks": 0, "added": 0}
+
+    def pages():
+        for number, text in parser.iter_pages(file_path):
+            stats["pages"] = number
+            yield number, text
+
+    for batch in batched(chunk_pages(pages(), max_tokens, overlap), batch_size):
+        texts = [chunk for _, chunk in batch]
+        metadatas = [dict(metadata or {}, source=source, page=number, doc_type="pdf") for number, _ in batch]
+        stats["chunks"] += len(texts)
+        stats["added"] += vector_store.add_documents(texts, metadatas, dedupe=True)
+
+    logger.info("Ingested %s: %d pages, %d chunks, %d new", source, stats["pages"], stats["chunks"], stats["added"])
+    return stats
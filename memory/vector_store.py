@@ -1,98 +1,364 @@
 import faiss
 import numpy as np
-from typing import List, Dict
+from typing import Any, List, Dict, Tuple
 import os
-import json
-import hashlib
+import threading
+import atexit
+from memory.bm25 import BM25Index
+from memory.document_store import DocumentStore, content_hash, migrate_json
+from memory.embeddings import CachedEmbedder, EmbeddingCache, EmbeddingProvider, get_provider
+from memory.index_factory import INDEX_TYPES, create_index, index_type_of, needs_training, search_parameters, set_search_params
 
 class VectorStore:
-    def __init__(self):
-        self.dimension = 100  # Simple embedding dimension
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.documents = []
-        self.metadata_list = []
-        
+    def __init__(self, data_dir: str = "./data/vector_store", flush_interval: float = 5.0, checkpoint_rows: int = 50000,
+                 embedding_provider: EmbeddingProvider = None, embedding_batch_size: int = 64,
+                 index_type: str = None, train_threshold: int = 10000, nprobe: int = 16, ef_search: int = 64,
+                 exact_filter_limit: int = 5000):
         # Create data directory if it doesn't exist
-        os.makedirs("./data/vector_store", exist_ok=True)
-        
+        os.makedirs(data_dir, exist_ok=True)
+
+        # Index dimension follows the embedding provider
+        self.embedder = CachedEmbedder(
+            embedding_provider or get_provider(),
+            EmbeddingCache(os.path.join(data_dir, "embeddings.db")),
+            batch_size=embedding_batch_size
+        )
+        self.dimension = self.embedder.dimension
+
+        # IVF indexes start flat and are trained once the corpus reaches
+        # train_threshold; nprobe/ef_search trade recall for speed
+        self.index_type = index_type or os.getenv("MALIBOT_INDEX", "flat")
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {self.index_type}")
+        self.train_threshold = train_threshold
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        # Filters matching at most this many documents are scored exactly
+        self.exact_filter_limit = exact_filter_limit
+        self.index = self._build_index(np.empty((0, self.dimension), dtype=np.float32))
+        self.revision = 0  # Bumped on every change so caches can invalidate
+
+        # Texts and metadata live in SQLite and are read only for search hits
+        self.data_dir = data_dir
+        self.doc_store = DocumentStore(os.path.join(data_dir, "documents.db"))
+        # Lexical index for exact terms and article numbers, fused in hybrid_search
+        self.bm25 = BM25Index(os.path.join(data_dir, "bm25.db"))
+
+        # Journaling: new vectors are appended on flush, the full index is
+        # only rewritten at checkpoints
+        self.flush_interval = flush_interval  # seconds; None disables the timer
+        self.checkpoint_rows = checkpoint_rows
+        self._flushed_rows = 0    # vectors already in the journal or index file
+        self._journal_rows = 0    # rows in vectors.journal since last checkpoint
+        self._pending_vectors = []
+        self._saved_revision = 0
+        self._lock = threading.RLock()
+        self._timer = None
+
         # Load existing data if available
         self.load_data()
-    
+        atexit.register(self.flush)
+
     def add_document(self, text: str, metadata: dict = None):
         """Add a document to the vector store."""
-        if metadata is None:
-            metadata = {}
-        
-        # Create a simple embedding using hashing
-        embedding = self._create_embedding(text)
-        
-        # Add to FAISS index
-        self.index.add(np.array([embedding]).astype('float32'))
-        
-        # Store document and metadata
-        self.documents.append(text)
-        self.metadata_list.append(metadata)
-        
-        # Save data
-        self.save_data()
-    
-    def search(self, query: str, n_results: int = 3) -> List[str]:
-        """Search for relevant documents."""
+        self.add_documents([text], [metadata])
+
+    def add_documents(self, texts: List[str], metadatas: List[dict] = None, dedupe: bool = False) -> int:
+        """Add many documents with one embedding batch and one index update.
+
+        With ``dedupe`` texts whose content hash is already stored (or that
+        repeat within the batch) are skipped. Returns the number added.
+        """
+        if metadatas is None:
+            metadatas = [None] * len(texts)
+        if len(metadatas) != len(texts):
+            raise ValueError("texts and metadatas must have the same length")
+        if dedupe:
+            texts, metadatas = self._drop_duplicates(texts, metadatas)
+        if not texts:
+            return 0
+
+        embeddings = self._create_embeddings(texts)
+
+        with self._lock:
+            # Documents are committed right away; vectors reach disk on the
+            # next flush and are re-embedded from the cache after a crash
+            ids = self.doc_store.add_many(texts, metadatas)
+            self.bm25.add(ids, texts)
+            self.index.add(embeddings)
+            self._pending_vectors.append(embeddings)
+            self.revision += 1
+
+            self._maybe_train()
+
+        self._schedule_flush()
+        return len(texts)
+
+    def _drop_duplicates(self, texts: List[str], metadatas: List[dict]) -> Tuple[List[str], List[dict]]:
+        hashes = [content_hash(text) for text in texts]
+        seen = self.doc_store.existing_hashes(list(set(hashes)))
+        kept_texts, kept_metadatas = [], []
+        for text, metadata, text_hash in zip(texts, metadatas, hashes):
+            if text_hash not in seen:
+                seen.add(text_hash)
+                kept_texts.append(text)
+                kept_metadatas.append(metadata)
+        return kept_texts, kept_metadatas
+
+    def __len__(self) -> int:
+        return self.index.ntotal
+
+    def search(self, query: str, n_results: int = 3, where: Dict[str, Any] = None) -> List[str]:
+        """Search for relevant documents.
+
+        ``where`` restricts results to documents whose metadata matches, e.g.
+        ``{"client": "ABC Ltd", "period": ["2025-01", "2025-02"]}``.
+        """
+        ids, _ = self._search_ids(query, n_results, where)
+        return self.doc_store.get_texts(ids)
+
+    def hybrid_search(self, query: str, n_results: int = 3, where: Dict[str, Any] = None,
+                      candidates: int = 20, rrf_k: int = 60) -> List[str]:
+        """Search with BM25 and vectors, fused by reciprocal rank fusion.
+
+        Lexical matching catches exact terms such as "VUK 359" or
+        "tevkifat" that dense vectors rank poorly.
+        """
+        vector_ids, _ = self._search_ids(query, max(candidates, n_results), where)
+        allowed = set(self.doc_store.filter_ids(where)) if where else None
+        lexical = self.bm25.search(query, max(candidates, n_results), allowed)
+
+        scores: Dict[int, float] = {}
+        for ranking in (vector_ids, [doc_id for doc_id, _ in lexical]):
+            for rank, doc_id in enumerate(ranking):
+                scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+
+        best = sorted(scores, key=scores.get, reverse=True)[:n_results]
+        return self.doc_store.get_texts(best)
+
+    def _search_ids(self, query: str, n_results: int, where: Dict[str, Any] = None) -> Tuple[List[int], List[float]]:
+        """Return (ids, distances) of the nearest documents."""
+        if not self.index.ntotal:
+            return [], []
+
         # Create query embedding
-        query_embedding = self._create_embedding(query)
-        
-        # Search in FAISS
-        D, I = self.index.search(np.array([query_embedding]).astype('float32'), k=min(n_results, len(self.documents)))
-        
-        # Return found documents
-        return [self.documents[i] for i in I[0]]
-    
+        query_embedding = np.array([self._create_embedding(query)]).astype('float32')
+
+        if not where:
+            D, I = self.index.search(query_embedding, k=min(n_results, self.index.ntotal))
+        else:
+            # Filter inside the scan using the metadata inverted index
+            allowed = np.array(self.doc_store.filter_ids(where), dtype=np.int64)
+            allowed = allowed[allowed < self.index.ntotal]
+            if not len(allowed):
+                return [], []
+            if len(allowed) <= self.exact_filter_limit:
+                D, I = self._search_subset(query_embedding, allowed, n_results)
+            else:
+                params = search_parameters(
+                    self.index, faiss.IDSelectorBatch(allowed), len(allowed) / self.index.ntotal,
+                    self.nprobe, self.ef_search
+                )
+                D, I = self.index.search(query_embedding, k=min(n_results, len(allowed)), params=params)
+
+        # IVF may return fewer than k hits, padded with -1
+        keep = I[0] >= 0
+        return I[0][keep].tolist(), D[0][keep].tolist()
+
+    def _search_subset(self, query_embedding: np.ndarray, ids: np.ndarray, n_results: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact search over a small set of ids, where ANN selectors lose recall."""
+        try:
+            vectors = self.index.reconstruct_batch(ids)
+        except RuntimeError:
+            # IVF indexes need a direct map to reconstruct by id
+            faiss.extract_index_ivf(self.index).make_direct_map()
+            vectors = self.index.reconstruct_batch(ids)
+
+        distances = ((vectors - query_embedding) ** 2).sum(axis=1)
+        k = min(n_results, len(ids))
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        return distances[top][None, :], ids[top][None, :]
+
+    def set_search_params(self, nprobe: int = None, ef_search: int = None):
+        """Tune IVF nprobe / HNSW efSearch for subsequent searches."""
+        if nprobe is not None:
+            self.nprobe = nprobe
+        if ef_search is not None:
+            self.ef_search = ef_search
+        set_search_params(self.index, self.nprobe, self.ef_search)
+
+    def _build_index(self, vectors: np.ndarray) -> faiss.Index:
+        """Create an index of the configured type holding the given vectors."""
+        if needs_training(self.index_type) and len(vectors) < self.train_threshold:
+            # Too few vectors to train cells on; search exactly until then
+            index = create_index("flat", self.dimension)
+        else:
+            index = create_index(self.index_type, self.dimension, len(vectors))
+            if not index.is_trained:
+                index.train(vectors)
+        if len(vectors):
+            index.add(vectors)
+        set_search_params(index, self.nprobe, self.ef_search)
+        return index
+
+    def _index_matches(self) -> bool:
+        """Whether the loaded index is of the configured type."""
+        current = index_type_of(self.index)
+        if current == self.index_type:
+            return True
+        return needs_training(self.index_type) and current == "flat" and self.index.ntotal < self.train_threshold
+
+    def _maybe_train(self):
+        """Swap the flat index for a trained IVF index once the corpus is large enough."""
+        if not needs_training(self.index_type) or index_type_of(self.index) != "flat":
+            return
+        if self.index.ntotal < self.train_threshold:
+            return
+
+        self.index = self._build_index(self.index.reconstruct_n(0, self.index.ntotal))
+        self.checkpoint()
+
+    def _create_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Create embeddings for a batch of texts."""
+        return self.embedder.embed(texts)
+
     def _create_embedding(self, text: str) -> np.ndarray:
-        """Create a simple embedding using hashing."""
-        # Hash the text
-        hash_obj = hashlib.sha256(text.encode())
-        hash_bytes = hash_obj.digest()
-        
-        # Convert hash to numbers and normalize
-        numbers = np.frombuffer(hash_bytes, dtype=np.uint8)
-        embedding = numbers[:self.dimension].astype(np.float32)
-        embedding = embedding / np.linalg.norm(embedding)
-        
-        return embedding
-    
+        """Create a query embedding; queries are not worth caching on disk."""
+        return self.embedder.embed([text], use_cache=False)[0]
+
+    def _schedule_flush(self):
+        """Flush pending rows after flush_interval seconds."""
+        if self.flush_interval is None:
+            return
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Append vectors added since the last flush to the journal."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+            if self._pending_vectors:
+                rows = sum(len(embeddings) for embeddings in self._pending_vectors)
+                # Each journal block starts with its first row id and row count
+                with open(os.path.join(self.data_dir, "vectors.journal"), "ab") as f:
+                    f.write(np.array([self._flushed_rows, rows], dtype=np.int64).tobytes())
+                    for embeddings in self._pending_vectors:
+                        f.write(embeddings.tobytes())
+
+                self._flushed_rows += rows
+                self._journal_rows += rows
+                self._pending_vectors = []
+
+            if self.revision != self._saved_revision:
+                self._write_state()
+
+            if self._journal_rows >= self.checkpoint_rows:
+                self.checkpoint()
+
+    def checkpoint(self):
+        """Write the full FAISS index and truncate the vector journal."""
+        with self._lock:
+            faiss.write_index(self.index, os.path.join(self.data_dir, "index.faiss"))
+            open(os.path.join(self.data_dir, "vectors.journal"), "wb").close()
+            self._pending_vectors = []
+            self._flushed_rows = self.index.ntotal
+            self._journal_rows = 0
+
     def save_data(self):
         """Save the current state to disk."""
-        data_dir = "./data/vector_store"
-        
-        # Save documents and metadata
-        with open(os.path.join(data_dir, "documents.json"), "w", encoding="utf-8") as f:
-            json.dump({
-                "documents": self.documents,
-                "metadata": self.metadata_list
-            }, f, ensure_ascii=False, indent=2)
-        
-        # Save FAISS index
-        faiss.write_index(self.index, os.path.join(data_dir, "index.faiss"))
-    
+        with self._lock:
+            self.flush()
+            self.checkpoint()
+
+    def _write_state(self):
+        self._saved_revision = self.revision
+        self.doc_store.set_state(revision=self.revision, embedder=self.embedder.provider.name)
+
     def load_data(self):
         """Load the state from disk if available."""
-        data_dir = "./data/vector_store"
-        doc_path = os.path.join(data_dir, "documents.json")
-        index_path = os.path.join(data_dir, "index.faiss")
-        
-        if os.path.exists(doc_path) and os.path.exists(index_path):
-            # Load documents and metadata
-            with open(doc_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                self.documents = data["documents"]
-                self.metadata_list = data["metadata"]
-            
-            # Load FAISS index
-            self.index = faiss.read_index(index_path)
-    
+        index_path = os.path.join(self.data_dir, "index.faiss")
+        journal_path = os.path.join(self.data_dir, "vectors.journal")
+
+        # One-shot move of documents.json / documents.jsonl into SQLite
+        migrate_json(self.data_dir, self.doc_store)
+
+        state = self.doc_store.get_state()
+        self.revision = self._saved_revision = state.get("revision", 0)
+        n_documents = self.doc_store.count()
+
+        # Catch the lexical index up (new index, or crash after the document commit)
+        indexed = self.bm25.count()
+        if indexed < n_documents:
+            for texts in self.doc_store.iter_texts(start=indexed):
+                self.bm25.add(range(indexed, indexed + len(texts)), texts)
+                indexed += len(texts)
+
+        # Vectors from another embedding provider or index type are rebuilt
+        # from the documents (cached embeddings make this cheap)
+        rebuild = state.get("embedder") != self.embedder.provider.name
+        if not rebuild:
+            if os.path.exists(index_path):
+                self.index = faiss.read_index(index_path)
+                set_search_params(self.index, self.nprobe, self.ef_search)
+            if os.path.exists(journal_path):
+                self._replay_journal(journal_path)
+            rebuild = not self._index_matches() or self.index.ntotal > n_documents
+
+        if rebuild:
+            vectors = [self._create_embeddings(texts) for texts in self.doc_store.iter_texts()]
+            self.index = self._build_index(np.vstack(vectors) if vectors else np.empty((0, self.dimension), dtype=np.float32))
+            if n_documents:
+                self.revision += 1
+            self.checkpoint()
+            self._write_state()
+            return
+
+        # Recover from a crash between the document commit and the vector flush
+        self._flushed_rows = self.index.ntotal
+        if self.index.ntotal < n_documents:
+            for texts in self.doc_store.iter_texts(start=self.index.ntotal):
+                self.index.add(self._create_embeddings(texts))
+            self.checkpoint()
+        self._maybe_train()
+
+    def _replay_journal(self, journal_path: str):
+        """Add journaled vectors that are not in the checkpointed index yet."""
+        with open(journal_path, "rb") as f:
+            journal = f.read()
+
+        offset = 0
+        row_bytes = self.dimension * 4
+        while offset + 16 <= len(journal):
+            start, count = np.frombuffer(journal, dtype=np.int64, count=2, offset=offset)
+            offset += 16
+            if offset + count * row_bytes > len(journal):
+                offset -= 16
+                break  # Torn block from an interrupted flush
+            vectors = np.frombuffer(journal, dtype=np.float32, count=count * self.dimension, offset=offset)
+            offset += count * row_bytes
+            self._journal_rows += int(count)
+
+            # Skip rows the index already holds (crash right after a checkpoint)
+            skip = self.index.ntotal - int(start)
+            if skip < count:
+                self.index.add(vectors.reshape(int(count), self.dimension)[max(skip, 0):])
+
+        if offset != len(journal):
+            with open(journal_path, "r+b") as f:
+                f.truncate(offset)
+
     def clear(self):
         """Clear all documents from the vector store."""
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.documents = []
-        self.metadata_list = []
-        self.save_data() 
\ No newline at end of file
+        with self._lock:
+            self.doc_store.clear()
+            self.bm25.clear()
+            self.index = self._build_index(np.empty((0, self.dimension), dtype=np.float32))
+            self.revision += 1
+            self.save_data()
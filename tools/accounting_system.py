@@ -1,12 +1,498 @@
-from typing import Dict, Any
-import pyautogui
-import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+import asyncio
+import copy
 import json
+import logging
 import os
+import random
 import re
+import sqlite3
+import threading
+import time
+from utils.extraction import is_account_code
+from utils.turkish import turkish_lower
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from tools.fis_export import FisExporter
+
+logger = logging.getLogger(__name__)
+
+JOB_DB = "./data/accounting/jobs.db"
+
+# Readiness checks poll the screen instead of sleeping a fixed time
+READY_TIMEOUT = 10.0
+POLL_INTERVAL = 0.05
+# Used for a screen with no title or image to check: the old fixed wait
+SETTLE_DELAY = 1.0
+# Pause pyautogui adds after each call; the form is known to be open by then
+KEY_PAUSE = 0.05
+
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 2.0
+BATCH_SIZE = 50
+# How long enter_transaction waits for its job before answering "queued"
+ENTRY_WAIT = 15.0
+
+STATUS_LABELS = {"pending": "bekliyor", "running": "işleniyor", "done": "kaydedildi", "failed": "hata"}
+FINISHED = ("done", "failed")
+
+# "iş #12", "iş 12 durumu", "parti 3'ün durumu", "kayıt kuyruğu"; a bare
+# number after "iş" ("bu iş 5 dakika sürer mi") needs a status word
+_STATUS_WORD = r"\S*\s+(?:durum|ne durumda)"
+STATUS_QUERY = re.compile(
+    rf"\b(?P<kind>iş|parti)\s*(?:#|(?=\d+{_STATUS_WORD}))(?P<id>\d+)|\bkayıt kuyru|\bkuyru\w*{_STATUS_WORD}"
+)
+# "kayıt kuyruğunu sürdür" after the worker halted
+RESUME_QUERY = re.compile(r"\bsürdür|\bdevam et")
+
+
+class EntryError(Exception):
+    """A GUI entry step failed. ``retryable`` is False once the save key was sent,
+    as typing the fiş again could enter it twice."""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def wait_until(check: Callable[[], bool], timeout: float, interval: float = POLL_INTERVAL) -> bool:
+    """Poll ``check`` until it is true or ``timeout`` seconds pass."""
+    deadline = time.monotonic() + timeout
+    while True:
+        if check():
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+
+
+class PyAutoGUIDriver:
+    """Keyboard input and screen checks for the real DBS / Zirve Nova windows.
+
+    A screen ("app", "form", "saved") is ready when the active window
+    title contains its configured ``title`` or its ``image`` is found on
+    screen (``"screens"`` in the system's config). "app" defaults to the
+    system's window title; a screen with nothing to check waits
+    ``SETTLE_DELAY`` once, as before.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        # Imported here: pyautogui needs a display, the simulated driver does not.
+        # Without one it fails with Xlib / KeyError('DISPLAY'), not ImportError.
+        try:
+            import pyautogui
+        except Exception as e:
+            raise ImportError(f"pyautogui kullanılamıyor ({type(e).__name__}: {e})") from e
+        self.gui = pyautogui
+        self.config = config
+        pyautogui.PAUSE = KEY_PAUSE
+        pyautogui.FAILSAFE = True  # Move mouse to upper-left corner to abort
+
+    def activate(self, system: str):
+        title = self.config.get(system, {}).get("window_title")
+        # Window lookup is only available where pygetwindow is (Windows)
+        if title and hasattr(self.gui, "getWindowsWithTitle"):
+            windows = self.gui.getWindowsWithTitle(title)
+            if windows:
+                windows[0].activate()
+
+    def hotkey(self, *keys: str):
+        self.gui.hotkey(*keys)
+
+    def press(self, key: str):
+        self.gui.press(key)
+
+    def write(self, text: str):
+        self.gui.write(text)
+
+    def is_ready(self, system: str, screen: str) -> bool:
+        settings = self.config.get(system, {})
+        checks = dict(settings.get("screens", {}).get(screen, {}))
+        if screen == "app" and not checks:
+            checks["title"] = settings.get("window_title")
+        title, image = checks.get("title"), checks.get("image")
+        if title and hasattr(self.gui, "getActiveWindowTitle"):
+            return title in (self.gui.getActiveWindowTitle() or "")
+        if image:
+            try:
+                return self.gui.locateOnScreen(image) is not None
+            except self.gui.ImageNotFoundException:
+                return False
+        time.sleep(SETTLE_DELAY)
+        return True
+
+
+class SimulatedDriver:
+    """Stand-in for the accounting program, for tests and benchmarks.
+
+    Models a form that takes ``open_delay`` seconds to open and
+    ``save_delay`` to save; keys sent before the form is open are lost, as
+    on the real program. With ``fail_rate`` a new-entry shortcut
+    sometimes brings up nothing (a stray dialog) until Esc is pressed.
+    Saved fişler are appended to ``entries``.
+    """
+
+    def __init__(self, open_delay: float = 0.3, save_delay: float = 0.2, key_delay: float = 0.0,
+                 fail_rate: float = 0.0, seed: int = 0):
+        self.open_delay = open_delay
+        self.save_delay = save_delay
+        self.key_delay = key_delay
+        self.fail_rate = fail_rate
+        self.entries: List[List[str]] = []
+        self.keystrokes = 0
+        self.lost_keys = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._form: Optional[List[str]] = None
+        self._form_ready_at = 0.0
+        self._saved_at = 0.0
+        self._blocked = False
+
+    def activate(self, system: str):
+        pass
+
+    def hotkey(self, *keys: str):
+        with self._lock:
+            now = self._key()
+            if self._form is None:
+                # New entry
+                if self._random.random() < self.fail_rate:
+                    self._blocked = True
+                    return
+                self._form, self._form_ready_at = [], now + self.open_delay
+            elif now < self._form_ready_at:
+                self.lost_keys += 1
+            else:
+                # Save
+                self.entries.append(self._form)
+                self._form, self._saved_at = None, now + self.save_delay
+
+    def press(self, key: str):
+        with self._lock:
+            now = self._key()
+            if key == "esc":
+                self._form, self._blocked = None, False
+            elif self._form is None or now < self._form_ready_at:
+                self.lost_keys += 1
+            else:
+                self._form.append("")
+
+    def write(self, text: str):
+        with self._lock:
+            now = self._key()
+            if self._form is None or not self._form or now < self._form_ready_at:
+                self.lost_keys += 1
+            else:
+                self._form[-1] += text
+
+    def is_ready(self, system: str, screen: str) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if screen == "form":
+                return self._form is not None and now >= self._form_ready_at
+            if screen == "saved":
+                return self._form is None and now >= self._saved_at
+            return not self._blocked
+
+    def _key(self) -> float:
+        # The key lands now; like pyautogui.PAUSE, the delay comes after it
+        self.keystrokes += 1
+        now = time.monotonic()
+        if self.key_delay:
+            time.sleep(self.key_delay)
+        return now
+
+
+class TransactionQueue:
+    """Persistent queue of transactions to type into the accounting program.
+
+    Jobs live in SQLite, so queued entries survive a restart. A single
+    worker thread owns the GUI: it takes up to ``batch_size`` due jobs of
+    one system at a time, activates the program once for them and types
+    them one after another through ``session`` (an object with
+    ``begin_session``, ``type_entry`` and ``recover``). A failed job is
+    retried after ``retry_delay`` seconds, doubling per attempt, up to
+    ``max_attempts``; a job whose save key was already sent is never
+    retried. Only the job being typed is marked "running"; one found in
+    that state at startup was cut off mid-entry and is marked failed for
+    the user to check in the program, while the rest of its batch is still
+    pending. Any other error, above all the pyautogui fail-safe (the user's
+    emergency stop), halts the worker: ``halted`` says why, and the
+    remaining jobs wait until ``start(resume=True)``.
+    """
+
+    def __init__(self, session: Any, db_path: str = JOB_DB, max_attempts: int = MAX_ATTEMPTS,
+                 retry_delay: float = RETRY_DELAY, batch_size: int = BATCH_SIZE):
+        self.session = session
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.batch_size = batch_size
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                batch INTEGER NOT NULL,
+                system TEXT NOT NULL,
+                data TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                not_before REAL NOT NULL DEFAULT 0,
+                error TEXT,
+                created REAL NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_due ON jobs (status, not_before, id);
+            CREATE INDEX IF NOT EXISTS jobs_batch ON jobs (batch);
+        """)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self.halted: Optional[str] = None
+        # job id -> futures of coroutines waiting for it
+        self._waiters: Dict[int, List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'failed', updated = ?, "
+                "error = 'Uygulama kayıt sırasında kapandı; fişi programda kontrol edin' WHERE status = 'running'",
+                (time.time(),)
+            )
+
+    def start(self, resume: bool = False) -> Optional[threading.Thread]:
+        """Start the worker thread (once); after a halt only when ``resume`` is set."""
+        with self._lock:
+            if self.halted is not None:
+                if not resume:
+                    return self._thread
+                logger.info("Transaction worker resumed after: %s", self.halted)
+                self.halted = None
+            # A worker that was told to stop but has not exited yet carries on
+            self._stopping = False
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="accounting-entry", daemon=True)
+                self._thread.start()
+            return self._thread
+
+    def stop(self, timeout: float = None):
+        """Stop after the job being typed; queued jobs stay for the next start."""
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def submit(self, system: str, items: Iterable[Dict[str, Any]]) -> Tuple[int, List[int]]:
+        """Queue transactions as one batch; returns (batch id, job ids)."""
+        now = time.time()
+        with self._lock, self.conn:
+            batch = self.conn.execute("SELECT coalesce(max(batch), 0) + 1 FROM jobs").fetchone()[0]
+            ids = [
+                self.conn.execute(
+                    "INSERT INTO jobs (batch, system, data, created, updated) VALUES (?, ?, ?, ?, ?)",
+                    (batch, system, json.dumps(item, ensure_ascii=False), now, now)
+                ).lastrowid
+                for item in items
+            ]
+            self._wakeup.notify()
+        return batch, ids
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row else None
+
+    def batch(self, batch: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM jobs WHERE batch = ? ORDER BY id", (batch,)).fetchall()
+        return [_job(row) for row in rows]
+
+    def recent(self, limit: int = 5) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [_job(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self.conn.execute("SELECT status, count(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    async def wait(self, job_id: int, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait up to ``timeout`` seconds for a job to finish; returns the job as it is then."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            row = self.conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row[0] in FINISHED:
+                future = None
+            else:
+                self._waiters.setdefault(job_id, []).append((loop, future))
+        if future is not None:
+            try:
+                await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._lock:
+                    waiters = self._waiters.get(job_id, [])
+                    if (loop, future) in waiters:
+                        waiters.remove((loop, future))
+                    if not waiters:
+                        self._waiters.pop(job_id, None)
+        return self.get(job_id)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._stopping:
+                    return
+                jobs = self._claim()
+                if not jobs:
+                    self._wakeup.wait(self._next_due())
+                    continue
+            self._process(jobs)
+
+    def _claim(self) -> List[Dict[str, Any]]:
+        """The next due jobs of one system (lock held).
+
+        They stay "pending" until the worker starts typing each one, so a
+        crash mid-batch only leaves that one job in doubt.
+        """
+        now = time.time()
+        first = self.conn.execute(
+            "SELECT system FROM jobs WHERE status = 'pending' AND not_before <= ? ORDER BY id LIMIT 1", (now,)
+        ).fetchone()
+        if first is None:
+            return []
+        rows = self.conn.execute(
+            "SELECT * FROM jobs WHERE status = 'pending' AND not_before <= ? AND system = ? ORDER BY id LIMIT ?",
+            (now, first[0], self.batch_size)
+        ).fetchall()
+        return [_job(row) for row in rows]
+
+    def _next_due(self) -> Optional[float]:
+        row = self.conn.execute("SELECT min(not_before) FROM jobs WHERE status = 'pending'").fetchone()
+        if row[0] is None:
+            return None
+        return max(row[0] - time.time(), 0.0)
+
+    def _process(self, jobs: List[Dict[str, Any]]):
+        system = jobs[0]["system"]
+        try:
+            self.session.begin_session(system)
+        except EntryError as e:
+            # Nothing was typed, but it counts as an attempt for every job
+            for job in jobs:
+                job["attempts"] += 1
+                self._failed(job, e)
+            self._recover(system)
+            return
+        except Exception as e:
+            self._halt(e)
+            return
+        for job in jobs:
+            if self._stopping:
+                # The rest are still pending for the next start
+                return
+            self._start(job)
+            try:
+                self.session.type_entry(system, job["data"])
+            except EntryError as e:
+                self._failed(job, e)
+                self._recover(system)
+            except Exception as e:
+                # Not a readiness problem: the screen is in an unknown state,
+                # or the user pulled the emergency stop. Touch nothing more.
+                self._finish(job, "failed", f"Kayıt yarıda kesildi ({_reason(e)}); fişi programda kontrol edin")
+                self._halt(e)
+                return
+            else:
+                self._finish(job, "done")
+
+    def _start(self, job: Dict[str, Any]):
+        """Mark the job being typed; only this one is failed if the app dies now."""
+        job["attempts"] += 1
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = ?, updated = ? WHERE id = ?",
+                (job["attempts"], time.time(), job["id"])
+            )
+
+    def _recover(self, system: str):
+        try:
+            self.session.recover(system)
+        except Exception as e:
+            self._halt(e)
+
+    def _halt(self, error: Exception):
+        """Stop the worker; pending jobs stay queued until resumed."""
+        logger.error("Transaction worker halted, pending jobs wait for a resume: %s", _reason(error),
+                     exc_info=error)
+        with self._lock:
+            self.halted = _reason(error)
+            self._stopping = True
+
+    def _failed(self, job: Dict[str, Any], error: EntryError):
+        if error.retryable and job["attempts"] < self.max_attempts:
+            delay = self.retry_delay * 2 ** (job["attempts"] - 1)
+            logger.warning("Job %s failed (%s), retrying in %.1f s", job["id"], error, delay)
+            with self._lock, self.conn:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'pending', attempts = ?, not_before = ?, error = ?, updated = ? "
+                    "WHERE id = ?",
+                    (job["attempts"], time.time() + delay, str(error), time.time(), job["id"])
+                )
+        else:
+            self._finish(job, "failed", str(error))
+
+    def _finish(self, job: Dict[str, Any], status: str, error: str = None):
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = ?, error = ?, updated = ? WHERE id = ?",
+                    (status, job["attempts"], error, time.time(), job["id"])
+                )
+            waiters = self._waiters.pop(job["id"], [])
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+def _job(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    job["data"] = json.loads(job["data"])
+    return job
+
+
+def _halted_notice(reason: str) -> str:
+    return (f"Kayıt durduruldu ({reason}); bekleyen işler yazılmıyor. "
+            "Sürdürmek için 'kayıt kuyruğunu sürdür' yazın.")
+
+
+def _reason(error: Exception) -> str:
+    if type(error).__name__ == "FailSafeException":
+        return "acil durdurma: fare ekranın köşesine götürüldü"
+    return f"{type(error).__name__}: {error}"
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
 
 class AccountingSystem:
-    def __init__(self):
+    """Enters transactions into DBS / Zirve Nova.
+
+    Batches go out as import files (``export_transactions``). Single
+    entries are typed into the program by the background worker of a
+    ``TransactionQueue``, so chat sessions never wait on the GUI; the
+    ``driver`` does the typing (``PyAutoGUIDriver`` by default,
+    ``SimulatedDriver`` in benchmarks).
+    """
+
+    def __init__(self, driver: Any = None, queue_path: str = JOB_DB):
         self.config_file = "memory/system_config.json"
         self.config = self._load_config()
         self.systems = {
@@ -24,9 +510,14 @@ class AccountingSystem:
             }
         }
         
-        # Set pyautogui settings
-        pyautogui.PAUSE = 0.5  # 0.5 second pause between actions
-        pyautogui.FAILSAFE = True  # Move mouse to upper-left corner to abort
+        self._exporter: Optional["FisExporter"] = None
+        
+        # The GUI driver is created on first use, so exports and status
+        # queries work on a headless server
+        self._driver = driver
+        self._driver_error: Optional[ImportError] = None
+        self.ready_timeout = READY_TIMEOUT
+        self.queue = TransactionQueue(self, queue_path)
     
     def _load_config(self) -> Dict[str, Any]:
         """Load system configuration."""
@@ -52,8 +543,64 @@ class AccountingSystem:
             }
         }
     
-    async def enter_transaction(self, system: str, data: Dict[str, Any]) -> str:
-        """Enter a transaction into the accounting system."""
+    @property
+    def exporter(self) -> "FisExporter":
+        # Import file layouts, with per-installation overrides from the config.
+        # Built on first export: it needs pandas, entry and status queries don't.
+        if self._exporter is None:
+            from tools.fis_export import FisExporter
+            self._exporter = FisExporter({
+                system: settings["import"] for system, settings in self.config.items() if "import" in settings
+            })
+        return self._exporter
+    
+    def export_transactions(self, system: str, lines: Union[str, "pd.DataFrame", Iterable[Dict[str, Any]]],
+                            output_path: str, known_codes: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """Write validated fiş lines into the system's import file (the fast path for batches)."""
+        exporter = self.exporter
+        if known_codes is not None:
+            exporter = copy.copy(self.exporter)
+            exporter.known_codes = known_codes
+        return exporter.export(system, lines, output_path)
+    
+    @property
+    def driver(self) -> Any:
+        if self._driver is None:
+            if self._driver_error is not None:
+                raise self._driver_error
+            try:
+                self._driver = PyAutoGUIDriver(self.config)
+            except ImportError as e:
+                self._driver_error = e
+                raise
+        return self._driver
+    
+    def start_worker(self) -> Optional[threading.Thread]:
+        """Start typing queued entries, including ones left from the last run."""
+        return self.queue.start()
+    
+    def resume_worker(self) -> Optional[threading.Thread]:
+        """Start typing again after the worker halted (e.g. an emergency stop)."""
+        return self.queue.start(resume=True)
+    
+    def resume_pending(self) -> bool:
+        """Start the worker at startup if entries from the last run wait and there is a screen."""
+        if not self.queue.counts().get("pending"):
+            return False
+        try:
+            self.driver
+        except ImportError as e:
+            logger.warning("Queued transactions not resumed: %s", e)
+            return False
+        self.start_worker()
+        return True
+    
+    async def enter_transaction(self, system: str, data: Dict[str, Any], wait: float = ENTRY_WAIT) -> str:
+        """Queue a single transaction for the GUI worker (fallback for one-off entries).
+        
+        Waits up to ``wait`` seconds so a quick entry is answered as saved;
+        otherwise the reply gives the job number to ask about later.
+        """
         if system not in self.systems:
             return f"Desteklenmeyen muhasebe sistemi: {system}"
         
@@ -61,39 +608,125 @@ class AccountingSystem:
             return "Eksik veya geçersiz işlem bilgileri."
         
         try:
-            # Get system shortcuts
-            shortcuts = self.systems[system]
-            
-            # New entry
-            pyautogui.hotkey(*shortcuts["new_entry"])
-            time.sleep(1)  # Wait for window/form to open
-            
-            # Enter account code
-            pyautogui.press(shortcuts["account_field"])
-            pyautogui.write(data["account_code"])
-            
-            # Enter amount
-            pyautogui.press(shortcuts["amount_field"])
-            pyautogui.write(data["amount"])
-            
-            # Enter description if available
-            if data.get("description"):
-                pyautogui.press("tab")
-                pyautogui.write(data["description"])
-            
-            # Save entry
-            pyautogui.hotkey(*shortcuts["save"])
-            
+            self.driver
+        except ImportError as e:
+            return (f"Bu sunucuda ekran otomasyonu yok: {e}. "
+                    "Fişleri 'Muhasebe Fiş Aktarımı' ile aktarım dosyası olarak oluşturabilirsiniz.")
+        
+        _, (job_id,) = self.queue.submit(system, [data])
+        self.start_worker()
+        if self.queue.halted:
+            return f"İşlem sıraya alındı (iş #{job_id}). {_halted_notice(self.queue.halted)}"
+        job = await self.queue.wait(job_id, wait)
+        if job["status"] == "done":
             return f"""
 İşlem Kaydedildi:
 - Sistem: {system.upper()}
 - Hesap: {data['account_code']}
 - Tutar: {data['amount']} TL
-- Açıklama: {data.get('description', 'Belirtilmedi')}
+- Açıklama: {data.get('description') or 'Belirtilmedi'}
 """
-            
-        except Exception as e:
-            return f"İşlem sırasında bir hata oluştu: {str(e)}"
+        if job["status"] == "failed":
+            return f"İş #{job_id} kaydedilemedi: {job['error']}"
+        return (f"İşlem sıraya alındı (iş #{job_id}, {STATUS_LABELS[job['status']]}). "
+                f"Durumunu 'iş {job_id} durumu' yazarak sorabilirsiniz.")
+    
+    def enter_transactions(self, system: str, items: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Queue several transactions as one batch; invalid ones are returned, not queued."""
+        if system not in self.systems:
+            raise ValueError(f"Desteklenmeyen muhasebe sistemi: {system}")
+        items = list(items)
+        valid = [item for item in items if self._validate_data(item)]
+        invalid = [item for item in items if not self._validate_data(item)]
+        batch, job_ids = self.queue.submit(system, valid) if valid else (None, [])
+        if job_ids:
+            self.start_worker()
+        return {"parti": batch, "isler": job_ids, "gecersiz": invalid}
+    
+    def is_status_query(self, message: str) -> bool:
+        return bool(STATUS_QUERY.search(turkish_lower(message)))
+    
+    async def check_status(self, message: str) -> str:
+        """Answer "iş 12 durumu", "parti #3" or a general queue question."""
+        match = STATUS_QUERY.search(turkish_lower(message))
+        if match and match.group("kind") == "parti":
+            jobs = self.queue.batch(int(match.group("id")))
+            if not jobs:
+                return f"Parti #{match.group('id')} bulunamadı."
+            counts = {}
+            for job in jobs:
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            lines = [f"Parti #{match.group('id')}: {len(jobs)} işlem"]
+            lines += [f"- {STATUS_LABELS[status]}: {count}" for status, count in counts.items()]
+            lines += [f"- İş #{job['id']}: {job['error']}" for job in jobs if job["status"] == "failed"]
+            return "\n".join(lines)
+        
+        if match and match.group("kind") == "iş":
+            job = self.queue.get(int(match.group("id")))
+            if job is None:
+                return f"İş #{match.group('id')} bulunamadı."
+            return _describe(job)
+        
+        if self.queue.halted and RESUME_QUERY.search(turkish_lower(message)):
+            self.resume_worker()
+            return "Kayıt kuyruğu sürdürülüyor."
+        
+        counts = self.queue.counts()
+        if not counts:
+            return "Kayıt kuyruğunda iş yok."
+        summary = ", ".join(f"{count} {STATUS_LABELS[status]}" for status, count in counts.items())
+        lines = [f"Kayıt kuyruğu: {summary}"]
+        if self.queue.halted:
+            lines.append(_halted_notice(self.queue.halted))
+        lines.append("Son işler:")
+        lines += [f"- {_describe(job)}" for job in self.queue.recent()]
+        return "\n".join(lines)
+    
+    def begin_session(self, system: str):
+        """Bring the program to the front before a batch of entries."""
+        try:
+            driver = self.driver
+        except ImportError as e:
+            raise EntryError(str(e), retryable=False)
+        driver.activate(system)
+        self._wait(system, "app", f"{system.upper()} penceresi bulunamadı")
+    
+    def type_entry(self, system: str, data: Dict[str, Any]):
+        """Type one transaction into the entry form; called on the worker thread."""
+        shortcuts = self.systems[system]
+        
+        # New entry, then wait for the form instead of a fixed sleep
+        self.driver.hotkey(*shortcuts["new_entry"])
+        self._wait(system, "form", "Kayıt ekranı açılmadı")
+        
+        # Enter account code
+        self.driver.press(shortcuts["account_field"])
+        self.driver.write(data["account_code"])
+        
+        # Enter amount
+        self.driver.press(shortcuts["amount_field"])
+        self.driver.write(data["amount"])
+        
+        # Enter description if available
+        if data.get("description"):
+            self.driver.press("tab")
+            self.driver.write(data["description"])
+        
+        # Save entry; from here on a retry could save the fiş twice
+        self.driver.hotkey(*shortcuts["save"])
+        try:
+            self._wait(system, "saved", "Kaydın tamamlandığı doğrulanamadı; fişi programda kontrol edin")
+        except EntryError as e:
+            raise EntryError(str(e), retryable=False)
+    
+    def recover(self, system: str):
+        """Close whatever the failed entry left open."""
+        self.driver.press("esc")
+        wait_until(lambda: self.driver.is_ready(system, "app"), self.ready_timeout)
+    
+    def _wait(self, system: str, screen: str, error: str):
+        if not wait_until(lambda: self.driver.is_ready(system, screen), self.ready_timeout):
+            raise EntryError(error)
     
     def _validate_data(self, data: Dict[str, Any]) -> bool:
         """Validate transaction data."""
@@ -101,12 +734,23 @@ class AccountingSystem:
         if not data.get("account_code") or not data.get("amount"):
             return False
         
-        # Validate account code (3 digits)
-        if not re.match(r'^\d{3}$', data["account_code"]):
+        # Validate account code (3 digits, optionally with sub-accounts like 120.01)
+        if not is_account_code(data["account_code"]):
             return False
         
         # Validate amount (number with optional decimal)
         if not re.match(r'^\d+(\.\d{2})?$', str(data["amount"])):
             return False
         
-        return True 
\ No newline at end of file
+        return True 
+
+
+def _describe(job: Dict[str, Any]) -> str:
+    data = job["data"]
+    text = (f"İş #{job['id']} ({job['system'].upper()}, {data.get('account_code')} / {data.get('amount')} TL): "
+            f"{STATUS_LABELS[job['status']]}")
+    if job["status"] == "pending" and job["attempts"]:
+        text += f", {job['attempts']}. denemeden sonra tekrar denenecek"
+    if job["error"]:
+        text += f" - {job['error']}"
+    return text
@@ -0,0 +1,245 @@
+from collections import deque
+from datetime import date, datetime, time, timedelta
+from email.message import EmailMessage
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import threading
+from tools.deadline_tracker import DeadlineTracker
+
+logger = logging.getLogger(__name__)
+
+# Days before a deadline on which to remind, and the time of day
+REMINDER_DAYS = (7, 3, 1, 0)
+REMIND_AT = time(9, 0)
+
+# Deadlines are loaded into the heap this far ahead; the window is refilled
+# when half of it has passed
+WINDOW_DAYS = 35
+
+# Upper bound on one sleep, so a suspended machine or clock change is noticed
+MAX_SLEEP = 3600.0
+
+
+class LogSink:
+    """Writes reminders to the application log."""
+
+    def notify(self, notification: Dict[str, Any]):
+        logger.warning("Beyanname hatırlatması: %s", notification["message"])
+
+
+class BannerSink:
+    """Keeps recent reminders for the UI banner, which polls ``render``."""
+
+    def __init__(self, size: int = 20):
+        self.notifications = deque(maxlen=size)
+
+    def notify(self, notification: Dict[str, Any]):
+        self.notifications.append(notification)
+
+    def active(self, today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Latest reminder per deadline, for deadlines not yet passed."""
+        today = today or date.today()
+        latest = {}
+        for notification in list(self.notifications):
+            if notification["date"] >= today:
+                latest[notification["deadline_id"]] = notification
+        return sorted(latest.values(), key=lambda n: n["date"])
+
+    def render(self) -> str:
+        return "\n".join(f"⚠️ {n['message']}" for n in self.active())
+
+
+class MailboxSink:
+    """Writes each reminder as an .eml file, a stand-in for sending mail."""
+
+    def __init__(self, outbox_dir: str = "./data/notifications/outbox", recipient: str = None):
+        self.outbox_dir = outbox_dir
+        self.recipient = recipient or os.environ.get("MALIBOT_NOTIFY_EMAIL", "muhasebe@localhost")
+        os.makedirs(outbox_dir, exist_ok=True)
+
+    def notify(self, notification: Dict[str, Any]):
+        message = EmailMessage()
+        message["To"] = self.recipient
+        message["From"] = "malibot@localhost"
+        message["Subject"] = f"Beyanname hatırlatması: {notification['name']}"
+        message.set_content(notification["message"] + "\n")
+        name = f"{datetime.now():%Y%m%d-%H%M%S}-{notification['id'].replace(':', '_').replace('/', '-')}.eml"
+        with open(os.path.join(self.outbox_dir, name), "wb") as f:
+            f.write(bytes(message))
+
+
+class DeadlineScheduler:
+    """Fires deadline reminders from a background asyncio task.
+
+    Reminder times (``REMINDER_DAYS`` before each deadline, at
+    ``REMIND_AT``) sit in a min-heap; the task sleeps until the earliest one
+    instead of polling. Deadlines can be added or cancelled while it runs:
+    additions push their reminders, cancellations mark them dead so they are
+    dropped when they reach the top of the heap (no rebuild). Each reminder
+    goes to every sink; a sink is any object with ``notify(notification)``.
+    """
+
+    def __init__(self, tracker: DeadlineTracker, sinks: Iterable[Any] = (),
+                 reminder_days: Tuple[int, ...] = REMINDER_DAYS, remind_at: time = REMIND_AT):
+        self.tracker = tracker
+        self.sinks = list(sinks) or [LogSink()]
+        self.reminder_days = reminder_days
+        self.remind_at = remind_at
+        self._heap: List[list] = []
+        # deadline id -> (due date, its heap entries)
+        self._entries: Dict[str, Tuple[date, List[list]]] = {}
+        self._counter = itertools.count()
+        self._loaded_until: Optional[date] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> asyncio.Task:
+        """Start in the running event loop."""
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._task = self._loop.create_task(self.run())
+        return self._task
+
+    def start_in_thread(self) -> threading.Thread:
+        """Start on an event loop of its own, for apps that own the main loop (Gradio)."""
+        started = threading.Event()
+
+        async def main():
+            task = self.start()
+            started.set()
+            await task
+
+        thread = threading.Thread(target=asyncio.run, args=(main(),), name="deadline-scheduler", daemon=True)
+        thread.start()
+        started.wait()
+        return thread
+
+    def stop(self):
+        if self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+
+    def add_deadline(self, deadline: Dict[str, Any]):
+        """Track a new or changed deadline and schedule its reminders."""
+        self._call(self._add, deadline)
+
+    def cancel_deadline(self, deadline_id: str):
+        """Stop tracking a deadline; its pending reminders are dropped."""
+        self._call(self._cancel, deadline_id)
+
+    def pending(self) -> int:
+        """Number of live reminders in the heap."""
+        return sum(1 for entry in self._heap if entry[-1])
+
+    async def run(self):
+        """Sleep until the next reminder, fire every due one, repeat."""
+        self._refill(datetime.now())
+        while True:
+            now = datetime.now()
+            if self._loaded_until is not None and now.date() >= self._loaded_until - timedelta(days=WINDOW_DAYS // 2):
+                self._refill(now)
+            self._fire_due(now)
+
+            self._drop_cancelled()
+            delay = MAX_SLEEP
+            if self._heap:
+                delay = min(max((self._heap[0][0] - now).total_seconds(), 0.0), MAX_SLEEP)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _call(self, func, *args):
+        # Heap and index changes happen on the scheduler's loop, whichever
+        # thread asks for them
+        if self._loop is None or not self._loop.is_running():
+            func(*args)
+            return
+
+        def apply():
+            func(*args)
+            self._wake.set()
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            apply()
+        else:
+            self._loop.call_soon_threadsafe(apply)
+
+    def _add(self, deadline: Dict[str, Any]):
+        self._cancel(deadline["id"])
+        self.tracker.index.add(deadline)
+        self._schedule(deadline, datetime.now())
+
+    def _cancel(self, deadline_id: str):
+        self.tracker.index.remove(deadline_id)
+        for entry in self._entries.pop(deadline_id, (None, []))[1]:
+            entry[-1] = False
+
+    def _schedule(self, deadline: Dict[str, Any], now: datetime):
+        if deadline["id"] in self._entries:
+            return
+        entries = []
+        for days in self.reminder_days:
+            fire_at = datetime.combine(deadline["date"] - timedelta(days=days), self.remind_at)
+            # A reminder missed earlier today (app started late) still fires
+            if fire_at < now and fire_at.date() < now.date():
+                continue
+            entry = [fire_at, next(self._counter), deadline["id"], days, True]
+            heapq.heappush(self._heap, entry)
+            entries.append(entry)
+        self._entries[deadline["id"]] = (deadline["date"], entries)
+
+    def _refill(self, now: datetime):
+        """Load the deadlines of the next window into the heap."""
+        today = now.date()
+        for deadline_id in [i for i, (due, _) in self._entries.items() if due < today]:
+            del self._entries[deadline_id]
+        for deadline in self.tracker.upcoming(WINDOW_DAYS, today):
+            self._schedule(deadline, now)
+        self._loaded_until = today + timedelta(days=WINDOW_DAYS)
+
+    def _fire_due(self, now: datetime):
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, _, deadline_id, days, live = heapq.heappop(self._heap)
+            if not live:
+                continue
+            deadline = self.tracker.index.get(deadline_id)
+            if deadline is None:
+                continue
+            notification = _notification(deadline, (deadline["date"] - now.date()).days)
+            for sink in self.sinks:
+                try:
+                    sink.notify(notification)
+                except Exception:
+                    logger.exception("Notification sink %s failed", type(sink).__name__)
+
+    def _drop_cancelled(self):
+        while self._heap and not self._heap[0][-1]:
+            heapq.heappop(self._heap)
+
+
+def _notification(deadline: Dict[str, Any], days_left: int) -> Dict[str, Any]:
+    when = "bugün son gün" if days_left <= 0 else f"{days_left} gün kaldı"
+    donem = f" ({deadline['donem']})" if deadline.get("donem") else ""
+    client = f"{deadline['client_name']} - " if deadline.get("client_name") else ""
+    return {
+        "id": f"{deadline['id']}:{days_left}",
+        "deadline_id": deadline["id"],
+        "client_name": deadline.get("client_name"),
+        "name": deadline["name"],
+        "donem": deadline.get("donem"),
+        "date": deadline["date"],
+        "days_left": days_left,
+        "message": (f"{client}{deadline['name']}{donem}: son tarih "
+                    f"{deadline['date'].strftime('%d.%m.%Y')}, {when}."),
+    }
@@ -1,97 +1,342 @@
-from typing import Dict, List, Any
-from datetime import datetime, timedelta
+from bisect import bisect_left, insort
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 import json
 import os
+import re
+import threading
+from utils.turkish import ascii_fold
+
+# Official holidays with a fixed date (month, day). A deadline that falls on
+# a weekend or holiday moves to the next working day (VUK md. 18).
+FIXED_HOLIDAYS = [(1, 1), (4, 23), (5, 1), (5, 19), (7, 15), (8, 30), (10, 29)]
+
+# Religious holidays move every year; they are kept in holidays.json, which
+# is seeded with these and should be extended as the Diyanet calendar is out.
+RELIGIOUS_HOLIDAYS = {
+    "Ramazan Bayramı": ["2025-03-30", "2025-03-31", "2025-04-01",
+                        "2026-03-20", "2026-03-21", "2026-03-22",
+                        "2027-03-09", "2027-03-10", "2027-03-11"],
+    "Kurban Bayramı": ["2025-06-06", "2025-06-07", "2025-06-08", "2025-06-09",
+                       "2026-05-27", "2026-05-28", "2026-05-29", "2026-05-30",
+                       "2027-05-16", "2027-05-17", "2027-05-18", "2027-05-19"],
+}
+
+PERIOD_MONTHS = {"monthly": 1, "quarterly": 3, "yearly": 12}
+
+# Longest weekend + holiday run a deadline can be shifted across
+MAX_SHIFT = timedelta(days=10)
+
+# Default horizon of generated deadlines around today
+LOOKBACK_DAYS = 31
+HORIZON_DAYS = 400
+
+
+class DeadlineRule:
+    """A recurring obligation: one deadline per period.
+
+    The deadline is ``day`` of the month ``months_after`` months after the
+    period ends ("last" for that month's last day), e.g. monthly KDV is due
+    on the 28th of the following month. ``skip_months`` lists period-end
+    months that have no declaration (geçici vergi has none for Q4).
+    """
+
+    def __init__(self, obligation: str, period: str, name: str, months_after: int, day: Any,
+                 description: str, skip_months: Tuple[int, ...] = ()):
+        self.obligation = obligation
+        self.period = period
+        self.name = name
+        self.months_after = months_after
+        self.day = day
+        self.description = description
+        self.skip_months = skip_months
+
+    def due_dates(self, start: date, end: date) -> Iterator[Tuple[str, date]]:
+        """Yield (period label, unshifted due date) for due dates in [start, end]."""
+        step = PERIOD_MONTHS[self.period]
+        # Walk period ends from the first one whose deadline can reach start
+        month_index = start.year * 12 + start.month - 1 - self.months_after - 1
+        month_index -= (month_index + 1) % step
+        while True:
+            year, month = divmod(month_index, 12)
+            month += 1
+            due_year, due_month = divmod(month_index + self.months_after, 12)
+            due_month += 1
+            last_day = monthrange(due_year, due_month)[1]
+            due = date(due_year, due_month, last_day if self.day == "last" else min(self.day, last_day))
+            if due > end:
+                return
+            if month not in self.skip_months and start <= due:
+                yield _period_label(self.period, year, month), due
+            month_index += step
+
+
+RULES = [
+    DeadlineRule("KDV", "monthly", "KDV Beyannamesi", 1, 28, "İzleyen ayın 28'i"),
+    DeadlineRule("KDV", "quarterly", "KDV Beyannamesi", 1, 28, "Çeyreği izleyen ayın 28'i"),
+    DeadlineRule("Muhtasar", "monthly", "Muhtasar ve Prim Hizmet Beyannamesi", 1, 26, "İzleyen ayın 26'sı"),
+    DeadlineRule("Muhtasar", "quarterly", "Muhtasar ve Prim Hizmet Beyannamesi", 1, 26,
+                 "Çeyreği izleyen ayın 26'sı"),
+    DeadlineRule("Geçici Vergi", "quarterly", "Geçici Vergi Beyannamesi", 2, 17,
+                 "Çeyreği izleyen ikinci ayın 17'si (4. dönem yok)", skip_months=(12,)),
+    DeadlineRule("Ba-Bs", "monthly", "Ba-Bs Formları", 1, "last", "İzleyen ayın son günü"),
+    DeadlineRule("Gelir Vergisi", "yearly", "Yıllık Gelir Vergisi Beyannamesi", 3, "last", "Mart ayının son günü"),
+    DeadlineRule("Kurumlar Vergisi", "yearly", "Kurumlar Vergisi Beyannamesi", 4, "last", "Nisan ayının son günü"),
+]
+
+_RULES_BY_KEY = {(rule.obligation, rule.period): rule for rule in RULES}
+
+_DAYS = re.compile(r"(\d+)\s*gün")
+
+
+class DeadlineIndex:
+    """Deadlines kept sorted by due date for range queries.
+
+    Keys are (date, id) tuples in a sorted list, so a window such as "the
+    next 7 days" is two bisections plus the matches, whatever the number of
+    clients. Adding or removing one deadline is a single insort / delete.
+    A lock keeps the list and the id map consistent, since the scheduler
+    thread changes the index while chat requests read and extend it.
+    """
+
+    def __init__(self, deadlines: Iterable[Dict[str, Any]] = ()):
+        self._lock = threading.Lock()
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        for deadline in deadlines:
+            self._by_id[deadline["id"]] = deadline
+        self._keys: List[Tuple[date, str]] = sorted((d["date"], d["id"]) for d in self._by_id.values())
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            return iter([self._by_id[deadline_id] for _, deadline_id in self._keys])
+
+    def __contains__(self, deadline_id: str) -> bool:
+        return deadline_id in self._by_id
+
+    def get(self, deadline_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._by_id.get(deadline_id)
+
+    def add(self, deadline: Dict[str, Any]):
+        """Insert a deadline, replacing any with the same id."""
+        with self._lock:
+            self._remove(deadline["id"])
+            self._by_id[deadline["id"]] = deadline
+            insort(self._keys, (deadline["date"], deadline["id"]))
+
+    def remove(self, deadline_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._remove(deadline_id)
+
+    def between(self, start: date, end: date) -> List[Dict[str, Any]]:
+        """Deadlines due in [start, end], earliest first."""
+        with self._lock:
+            lo = bisect_left(self._keys, (start, ""))
+            hi = bisect_left(self._keys, (end + timedelta(days=1), ""), lo)
+            return [self._by_id[deadline_id] for _, deadline_id in self._keys[lo:hi]]
+
+    def _remove(self, deadline_id: str) -> Optional[Dict[str, Any]]:
+        deadline = self._by_id.pop(deadline_id, None)
+        if deadline is not None:
+            del self._keys[bisect_left(self._keys, (deadline["date"], deadline_id))]
+        return deadline
+
 
 class DeadlineTracker:
+    """Beyanname deadlines for every client, generated from RULES.
+
+    Clients (clients.json) list their obligations and periods, e.g.
+    {"KDV": "monthly", "Muhtasar": "quarterly"}. Deadlines are generated for
+    a window around today, shifted past weekends and holidays, and held
+    pre-parsed in a DeadlineIndex. One-off deadlines from deadlines.json are
+    indexed alongside them.
+    """
+
     def __init__(self):
         self.data_dir = "./data/deadlines"
         os.makedirs(self.data_dir, exist_ok=True)
-        self.deadlines = self._load_deadlines()
-        
-        # Common tax declaration deadlines
-        self.common_deadlines = {
-            "KDV": {
-                "monthly": "Ayın 26'sı",
-                "quarterly": "Çeyreğin son gününden itibaren 26 gün"
-            },
-            "Gelir Vergisi": {
-                "monthly": "Ayın 26'sı",
-                "quarterly": "Çeyreğin son gününden itibaren 26 gün",
-                "annual": "Mart ayının son günü"
-            },
-            "Kurumlar Vergisi": {
-                "quarterly": "Çeyreğin son gününden itibaren 26 gün",
-                "annual": "Nisan ayının son günü"
-            }
-        }
-    
-    def _load_deadlines(self) -> List[Dict]:
-        """Load deadlines from file."""
-        deadlines_file = os.path.join(self.data_dir, "deadlines.json")
-        
-        if not os.path.exists(deadlines_file):
-            # Create default deadlines
-            deadlines = [
-                {
-                    "name": "KDV Beyannamesi",
-                    "date": (datetime.now() + timedelta(days=7)).strftime("%d.%m.%Y"),
-                    "period": "monthly"
-                },
-                {
-                    "name": "Muhtasar Beyanname",
-                    "date": (datetime.now() + timedelta(days=14)).strftime("%d.%m.%Y"),
-                    "period": "monthly"
-                },
-                {
-                    "name": "Geçici Vergi Beyannamesi",
-                    "date": (datetime.now() + timedelta(days=30)).strftime("%d.%m.%Y"),
-                    "period": "quarterly"
-                },
+        self.clients = self._load_clients()
+        self.holidays = self._load_holidays()
+        self.index = DeadlineIndex(self._load_deadlines())
+        self._generated: Optional[Tuple[date, date]] = None
+        today = date.today()
+        self.generate(today - timedelta(days=LOOKBACK_DAYS), today + timedelta(days=HORIZON_DAYS))
+
+    def generate(self, start: date, end: date, clients: Optional[List[Dict]] = None) -> int:
+        """Index the rule deadlines due in [start, end]; returns how many were added.
+
+        Deadlines already in the index keep their place, so the window can
+        be widened at any time.
+        """
+        added = 0
+        for client in clients if clients is not None else self.clients:
+            for deadline in self._client_deadlines(client, start, end):
+                if deadline["id"] not in self.index:
+                    self.index.add(deadline)
+                    added += 1
+        if clients is None:
+            if self._generated:
+                start, end = min(start, self._generated[0]), max(end, self._generated[1])
+            self._generated = (start, end)
+        return added
+
+    def upcoming(self, days: int = 30, start: Optional[date] = None, client: Optional[str] = None,
+                 period: str = "all") -> List[Dict[str, Any]]:
+        """Deadlines due in the next ``days`` days, optionally for one client or period."""
+        start = start or date.today()
+        end = start + timedelta(days=days)
+        if self._generated and end > self._generated[1]:
+            self.generate(self._generated[1], end)
+        return [
+            deadline for deadline in self.index.between(start, end)
+            if (client is None or deadline["client"] == client)
+            and (period == "all" or deadline["period"] == period)
+        ]
+
+    def add_client(self, client: Dict[str, Any]):
+        """Add or update a client and index their deadlines."""
+        self.clients = [c for c in self.clients if c["id"] != client["id"]] + [client]
+        for deadline_id in [d["id"] for d in self.index if d["client"] == client["id"]]:
+            self.index.remove(deadline_id)
+        if self._generated:
+            self.generate(*self._generated, clients=[client])
+        self._save_json("clients.json", self.clients)
+
+    def is_working_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+
+    def next_working_day(self, day: date) -> date:
+        while not self.is_working_day(day):
+            day += timedelta(days=1)
+        return day
+
+    def _client_deadlines(self, client: Dict[str, Any], start: date, end: date) -> Iterator[Dict[str, Any]]:
+        for obligation, period in client.get("obligations", {}).items():
+            rule = _RULES_BY_KEY.get((obligation, period))
+            if rule is None:
+                continue
+            for label, due in rule.due_dates(start - MAX_SHIFT, end):
+                due = self.next_working_day(due)
+                if start <= due <= end:
+                    yield {
+                        "id": f"{client['id']}:{obligation}:{label}",
+                        "client": client["id"],
+                        "client_name": client.get("name", client["id"]),
+                        "name": rule.name,
+                        "obligation": obligation,
+                        "period": period,
+                        "donem": label,
+                        "date": due,
+                    }
+
+    def _load_clients(self) -> List[Dict]:
+        """Load client obligations."""
+        clients_file = os.path.join(self.data_dir, "clients.json")
+        if not os.path.exists(clients_file):
+            clients = [
                 {
-                    "name": "Kurumlar Vergisi Beyannamesi",
-                    "date": (datetime.now() + timedelta(days=60)).strftime("%d.%m.%Y"),
-                    "period": "yearly"
+                    "id": "ornek",
+                    "name": "Örnek Ticaret Ltd. Şti.",
+                    "obligations": {
+                        "KDV": "monthly",
+                        "Muhtasar": "monthly",
+                        "Geçici Vergi": "quarterly",
+                        "Ba-Bs": "monthly",
+                        "Kurumlar Vergisi": "yearly",
+                    },
                 }
             ]
-            
-            # Save to file
-            with open(deadlines_file, "w", encoding="utf-8") as f:
-                json.dump(deadlines, f, ensure_ascii=False, indent=2)
-        
+            self._save_json("clients.json", clients)
+            return clients
+        with open(clients_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _load_holidays(self) -> Set[date]:
+        """Fixed official holidays for the years around today plus holidays.json."""
+        holidays_file = os.path.join(self.data_dir, "holidays.json")
+        if not os.path.exists(holidays_file):
+            self._save_json("holidays.json", RELIGIOUS_HOLIDAYS)
+            extra = RELIGIOUS_HOLIDAYS
+        else:
+            with open(holidays_file, "r", encoding="utf-8") as f:
+                extra = json.load(f)
+
+        this_year = date.today().year
+        holidays = {date(year, month, day) for year in range(this_year - 1, this_year + 3)
+                    for month, day in FIXED_HOLIDAYS}
+        holidays.update(date.fromisoformat(day) for days in extra.values() for day in days)
+        return holidays
+
+    def _load_deadlines(self) -> List[Dict]:
+        """Load one-off deadlines from file, parsed once."""
+        deadlines_file = os.path.join(self.data_dir, "deadlines.json")
+
+        if not os.path.exists(deadlines_file):
+            deadlines = []
+            self._save_json("deadlines.json", deadlines)
+
         else:
             # Load from file
             with open(deadlines_file, "r", encoding="utf-8") as f:
                 deadlines = json.load(f)
-        
-        return deadlines
-    
+
+        return [
+            {
+                "id": f"custom:{i}",
+                "client": deadline.get("client"),
+                "client_name": deadline.get("client"),
+                "name": deadline["name"],
+                "obligation": deadline["name"],
+                "period": deadline.get("period", "once"),
+                "donem": None,
+                "date": datetime.strptime(deadline["date"], "%d.%m.%Y").date(),
+            }
+            for i, deadline in enumerate(deadlines)
+        ]
+
+    def _save_json(self, name: str, data: Any):
+        with open(os.path.join(self.data_dir, name), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
     async def check(self, message: str) -> str:
         """Check deadlines based on the message."""
-        # Extract period from message
+        # Extract period, window and client from message
         period = self._extract_period(message)
-        
+        days_match = _DAYS.search(message)
+        days = int(days_match.group(1)) if days_match else 30
+        client = self._extract_client(message)
+
         # Get relevant deadlines
-        deadlines = self._get_deadlines(period)
-        
+        today = date.today()
+        deadlines = self.upcoming(days, today, client["id"] if client else None, period)
+
         if not deadlines:
             return "Bu dönem için yaklaşan beyanname tarihi bulunamadı."
-        
+
         # Format response
-        response = "Yaklaşan Beyanname Tarihleri:\n\n"
-        for deadline in deadlines:
-            days_left = (deadline["date"] - datetime.now()).days
+        title = f"{client['name']} - " if client else ""
+        response = f"{title}Yaklaşan Beyanname Tarihleri ({days} gün):\n\n"
+        for deadline in deadlines[:50]:
+            days_left = (deadline["date"] - today).days
             status = "⚠️ ACİL" if days_left <= 3 else "✓ Normal"
-            
+            donem = f" ({deadline['donem']})" if deadline["donem"] else ""
+            mukellef = f"\n- Mükellef: {deadline['client_name']}" if deadline["client_name"] and not client else ""
+
             response += f"""
 {status}
-- Beyanname: {deadline['name']}
+- Beyanname: {deadline['name']}{donem}{mukellef}
 - Son Tarih: {deadline['date'].strftime('%d.%m.%Y')}
 - Kalan Gün: {days_left} gün
 """
-        
+        if len(deadlines) > 50:
+            response += f"\n... ve {len(deadlines) - 50} beyanname daha."
+
         return response
-    
+
     def _extract_period(self, message: str) -> str:
         """Extract period from message."""
         message = message.lower()
@@ -99,36 +344,35 @@ class DeadlineTracker:
             return "yearly"
         elif "aylık" in message:
             return "monthly"
-        elif "3" in message or "üç" in message:
+        elif "3 ay" in message or "üç ay" in message or "çeyrek" in message:
             return "quarterly"
         else:
             return "all"
-    
-    def _get_deadlines(self, period: str) -> List[Dict]:
-        """Get deadlines for the specified period."""
-        now = datetime.now()
-        deadlines = []
-        
-        for deadline in self.deadlines:
-            deadline_date = datetime.strptime(deadline["date"], "%d.%m.%Y")
-            if deadline_date < now:
-                continue
-            
-            if period == "all" or deadline["period"] == period:
-                deadlines.append({
-                    "name": deadline["name"],
-                    "date": deadline_date,
-                    "period": deadline["period"]
-                })
-        
-        return sorted(deadlines, key=lambda x: x["date"])
-    
+
+    def _extract_client(self, message: str) -> Optional[Dict]:
+        """The client whose name (or id) appears in the message, if any."""
+        folded = ascii_fold(message)
+        for client in self.clients:
+            names = [client["id"], client.get("name", "")]
+            if any(name and ascii_fold(name) in folded for name in names):
+                return client
+        return None
+
     def _list_all_deadlines(self) -> str:
         """List all available deadlines."""
         result = "Mevcut Beyanname Son Tarihleri:\n\n"
-        for tax_type, periods in self.common_deadlines.items():
-            result += f"{tax_type}:\n"
-            for period, deadline in periods.items():
-                result += f"- {period}: {deadline}\n"
-            result += "\n"
-        return result 
\ No newline at end of file
+        obligation = None
+        for rule in RULES:
+            if rule.obligation != obligation:
+                obligation = rule.obligation
+                result += f"\n{rule.name}:\n"
+            result += f"- {rule.period}: {rule.description}\n"
+        return result
+
+
+def _period_label(period: str, year: int, month: int) -> str:
+    if period == "monthly":
+        return f"{year}/{month:02d}"
+    if period == "quarterly":
+        return f"{year}/Q{(month - 1) // 3 + 1}"
+    return str(year)
@@ -0,0 +1,194 @@
+"""Bulk e-fatura extraction: a directory or ZIP of PDFs / UBL-TR XMLs to one CSV/Parquet table.
+
+    python -m tools.efatura_batch faturalar/ -o ocak.csv
+    python -m tools.efatura_batch ocak.zip -o ocak.parquet --concurrency 16
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from typing import Any, Callable, Dict, List, Optional
+import pandas as pd
+from tools.pdf_parser import PDFParser
+
+COLUMNS = ["dosya", "fatura_no", "tarih", "firma", "satici_vkn", "alici_vkn", "matrah", "kdv", "tevkifat", "tutar"]
+AMOUNT_COLUMNS = ["matrah", "kdv", "tevkifat", "tutar"]
+EXTENSIONS = (".pdf", ".xml")
+
+
+class EFaturaBatchProcessor:
+    """Extracts invoice fields from many PDFs and UBL-TR XMLs concurrently.
+
+    Files are parsed by a shared PDFParser process pool, at most
+    ``concurrency`` at a time. UBL-TR XML files are read natively and may
+    hold many invoices (one row each); PDFs are text-scraped. Rows are
+    written to the output in chunks as files finish, so memory stays flat
+    for any number of invoices. Files that fail are listed in
+    ``<output>.hatalar.csv`` instead of stopping the batch.
+    """
+
+    def __init__(self, parser: PDFParser = None, concurrency: int = None, chunk_size: int = 200):
+        self.parser = parser or PDFParser()
+        self.concurrency = concurrency or self.parser.max_workers * 2
+        self.chunk_size = chunk_size
+
+    async def run(self, source: str, output_path: str,
+                  progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """Process every invoice file under ``source`` (directory, .zip or .xml) into ``output_path``.
+
+        ``progress(done, total)`` is called after each file. Returns a summary
+        with counts, the error report path and the elapsed time.
+        """
+        start = time.perf_counter()
+        workdir = None
+        try:
+            if zipfile.is_zipfile(source):
+                workdir = tempfile.mkdtemp(prefix="efatura_")
+                files = self._extract_zip(source, workdir)
+            elif os.path.isdir(source):
+                files = self._list_files(source)
+            elif source.lower().endswith(".xml"):
+                files = [(os.path.basename(source), source)]
+            else:
+                raise ValueError(f"Klasör, ZIP veya XML dosyası bekleniyordu: {source}")
+
+            writer = _TableWriter(output_path)
+            errors: List[Dict[str, str]] = []
+            rows: List[Dict[str, Any]] = []
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def parse(name: str, path: str):
+                async with semaphore:
+                    try:
+                        if path.lower().endswith(".xml"):
+                            return name, await self.parser.extract_ubl_rows(path), None
+                        return name, [await self.parser.extract_efatura(path)], None
+                    except asyncio.TimeoutError:
+                        return name, None, f"{self.parser.timeout:.0f} saniyede tamamlanamadı"
+                    except Exception as e:
+                        return name, None, str(e) or type(e).__name__
+
+            tasks = [asyncio.ensure_future(parse(name, path)) for name, path in files]
+            try:
+                for done, task in enumerate(asyncio.as_completed(tasks), start=1):
+                    name, invoices, error = await task
+                    if error is None:
+                        rows.extend({"dosya": name, **fields} for fields in invoices)
+                    else:
+                        errors.append({"dosya": name, "hata": error})
+                    if len(rows) >= self.chunk_size:
+                        writer.write(rows)
+                        rows = []
+                    if progress:
+                        progress(done, len(files))
+                writer.write(rows)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                writer.close()
+
+            error_path = None
+            if errors:
+                error_path = os.path.splitext(output_path)[0] + ".hatalar.csv"
+                pd.DataFrame(errors, columns=["dosya", "hata"]).to_csv(error_path, index=False)
+
+            return {
+                "toplam": len(files),
+                "fatura": writer.rows,
+                "basarili": len(files) - len(errors),
+                "hatali": len(errors),
+                "cikti": output_path,
+                "hata_raporu": error_path,
+                "sure": time.perf_counter() - start,
+            }
+        finally:
+            if workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    def _list_files(self, directory: str) -> List[tuple]:
+        files = []
+        for root, _, names in os.walk(directory):
+            for name in names:
+                if name.lower().endswith(EXTENSIONS):
+                    path = os.path.join(root, name)
+                    files.append((os.path.relpath(path, directory), path))
+        return sorted(files)
+
+    def _extract_zip(self, archive: str, workdir: str) -> List[tuple]:
+        files = []
+        with zipfile.ZipFile(archive) as zf:
+            members = [m for m in zf.infolist() if not m.is_dir() and m.filename.lower().endswith(EXTENSIONS)]
+            for i, member in enumerate(sorted(members, key=lambda m: m.filename)):
+                # Never trust archive paths: write to a flat, numbered name
+                path = os.path.join(workdir, f"{i:06d}{os.path.splitext(member.filename)[1].lower()}")
+                with zf.open(member) as src, open(path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                files.append((member.filename, path))
+        return files
+
+
+class _TableWriter:
+    """Appends row chunks to a CSV or Parquet file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.parquet = path.lower().endswith(".parquet")
+        self._writer = None
+        self._header = True
+        self.rows = 0
+
+    def write(self, rows: List[Dict[str, Any]]):
+        frame = self._frame(rows)
+        self.rows += len(frame)
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="w" if self._header else "a", header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def _frame(self, rows: List[Dict[str, Any]]) -> pd.DataFrame:
+        frame = pd.DataFrame(rows, columns=COLUMNS)
+        for column in COLUMNS:
+            if column not in AMOUNT_COLUMNS:
+                frame[column] = frame[column].astype("string")
+        for column in AMOUNT_COLUMNS:
+            frame[column] = pd.to_numeric(frame[column], errors="coerce").astype("float64")
+        return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="PDF/XML klasörü, ZIP veya XML dosyası")
+    parser.add_argument("-o", "--output", required=True, help=".csv veya .parquet")
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    processor = EFaturaBatchProcessor(PDFParser(max_workers=args.workers), concurrency=args.concurrency)
+
+    def progress(done: int, total: int):
+        print(f"\r{done}/{total}", end="", flush=True)
+
+    summary = asyncio.run(processor.run(args.source, args.output, progress))
+    print()
+    print(f"{summary['basarili']}/{summary['toplam']} dosya, {summary['fatura']} fatura "
+          f"{summary['sure']:.1f} sn'de işlendi -> {summary['cikti']}")
+    if summary["hata_raporu"]:
+        print(f"{summary['hatali']} hatalı dosya: {summary['hata_raporu']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
-import re
-from typing import Dict, Any
+from typing import Dict
 import json
 import os
+from utils.extraction import AMOUNT, DATE, Field, FieldExtractor, format_amount, parse_amount, parse_date
+
+FIELDS = FieldExtractor([
+    Field("recipient", r"\b(?i:için|to|kime)[:\s]+([^,\n]+)"),
+    Field("subject", r"\b(?i:konu|subject)[:\s]+([^,\n]+)"),
+    Field("deadline", r"\b(?i:son|deadline)[:\s]+(" + DATE + ")", parse_date),
+    Field("date", DATE, parse_date),
+    Field("amount", "(" + AMOUNT + r")\s*(?:TL|₺|USD|EUR)", parse_amount),
+])
 
 class EmailWriter:
     def __init__(self):
@@ -55,30 +63,15 @@ Saygılarımla,
             "deadline": ""
         }
         
-        # Extract recipient
-        recipient_match = re.search(r'(?:için|to|kime)[:\s]+([^,\n]+)', message, re.I)
-        if recipient_match:
-            info["recipient"] = recipient_match.group(1).strip()
-        
-        # Extract subject
-        subject_match = re.search(r'(?:konu|subject)[:\s]+([^,\n]+)', message, re.I)
-        if subject_match:
-            info["subject"] = subject_match.group(1).strip()
-        
-        # Extract date
-        date_match = re.search(r'\d{2}[./]\d{2}[./]\d{4}', message)
-        if date_match:
-            info["date"] = date_match.group(0)
-        
-        # Extract amount
-        amount_match = re.search(r'(\d+(?:\.\d{2})?)\s*(?:TL|USD|EUR)', message)
-        if amount_match:
-            info["amount"] = amount_match.group(1)
-        
-        # Extract deadline
-        deadline_match = re.search(r'(?:son|deadline)[:\s]+(\d{2}[./]\d{2}[./]\d{4})', message, re.I)
-        if deadline_match:
-            info["deadline"] = deadline_match.group(1)
+        fields = FIELDS.extract(message)
+        for key in ("recipient", "subject"):
+            if fields[key]:
+                info[key] = fields[key]
+        for key in ("date", "deadline"):
+            if fields[key]:
+                info[key] = fields[key].strftime("%d.%m.%Y")
+        if fields["amount"] is not None:
+            info["amount"] = format_amount(fields["amount"])
         
         return info
     
@@ -0,0 +1,287 @@
+"""Fiş import files for DBS and Zirve Nova: thousands of lines in one import instead of keystrokes.
+
+    python -m tools.fis_export fisler.csv --system zirve -o zirve_aktarim.xlsx
+    python -m tools.fis_export fisler.parquet --system dbs -o dbs_aktarim.xml
+
+Input lines have the columns fis_no, tarih, hesap_kodu, aciklama, borc,
+alacak and optionally evrak_no; one fiş is all lines sharing a fis_no.
+"""
+import argparse
+import copy
+import os
+import xml.etree.ElementTree as ET
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+import pandas as pd
+from utils.extraction import is_account_code, parse_amount, parse_date
+
+LINE_COLUMNS = ["fis_no", "tarih", "hesap_kodu", "aciklama", "borc", "alacak", "evrak_no"]
+
+# Default import layouts. The column / tag names follow the programs' fiş
+# import templates and can be overridden per installation under "import"
+# in memory/system_config.json, since templates differ between versions.
+IMPORT_FORMATS = {
+    "zirve": {
+        "format": "xlsx",
+        "columns": {
+            "tarih": "Fiş Tarihi", "fis_no": "Fiş No", "evrak_no": "Evrak No", "hesap_kodu": "Hesap Kodu",
+            "aciklama": "Açıklama", "borc": "Borç", "alacak": "Alacak",
+        },
+        "date_format": "%d.%m.%Y",
+    },
+    "dbs": {
+        "format": "xml",
+        "tags": {"root": "FISLER", "fis": "FIS", "line": "SATIR"},
+        "columns": {
+            "tarih": "TARIH", "fis_no": "FIS_NO", "evrak_no": "EVRAK_NO", "hesap_kodu": "HESAP_KODU",
+            "aciklama": "ACIKLAMA", "borc": "BORC", "alacak": "ALACAK",
+        },
+        "date_format": "%d.%m.%Y",
+    },
+}
+
+# CSV imports on Turkish Windows expect ";" separators and decimal commas
+CSV_OPTIONS = {"sep": ";", "decimal": ",", "encoding": "utf-8-sig"}
+
+
+class FisExporter:
+    """Validates journal lines and writes them as one fiş import file.
+
+    Every fiş is checked before anything is written: account codes (and,
+    when ``known_codes`` is given, that they exist in the hesap planı),
+    dates, amounts with at most two decimals on exactly one side, at least
+    two lines and equal borç / alacak totals. A fiş with any error is left
+    out whole and reported; the rest go into the file.
+    """
+
+    def __init__(self, formats: Dict[str, Dict[str, Any]] = None, known_codes: Optional[Set[str]] = None):
+        self.formats = copy.deepcopy(IMPORT_FORMATS)
+        for system, overrides in (formats or {}).items():
+            self.formats.setdefault(system, {}).update(overrides)
+        self.known_codes = known_codes
+
+    def export(self, system: str, lines: Union[str, pd.DataFrame, Iterable[Dict[str, Any]]],
+               output_path: str) -> Dict[str, Any]:
+        """Validate ``lines`` and write the import file for ``system``.
+
+        The file type follows ``output_path``'s extension (.xlsx, .csv or
+        .xml) or, without one, the system's default. Returns counts, the
+        output path and the errors, which are also written to
+        ``<output>.hatalar.csv``.
+        """
+        if system not in self.formats:
+            raise ValueError(f"Desteklenmeyen muhasebe sistemi: {system}")
+        spec = self.formats[system]
+        fisler, errors = self.validate(load_lines(lines))
+
+        extension = os.path.splitext(output_path)[1].lower().lstrip(".")
+        if not extension:
+            extension = spec["format"]
+            output_path = f"{output_path}.{extension}"
+        if extension == "xml":
+            self._write_xml(fisler, spec, output_path)
+        elif extension in ("xlsx", "csv"):
+            self._write_table(fisler, spec, output_path, extension)
+        else:
+            raise ValueError(f"Desteklenmeyen dosya türü: .{extension}")
+
+        error_path = None
+        if errors:
+            error_path = os.path.splitext(output_path)[0] + ".hatalar.csv"
+            pd.DataFrame(errors, columns=["fis_no", "satir", "hata"]).to_csv(error_path, index=False)
+
+        return {
+            "dosya": output_path,
+            "fis": len(fisler),
+            "satir": sum(len(fis["satirlar"]) for fis in fisler),
+            "hatali_fis": len({error["fis_no"] for error in errors}),
+            "hatalar": errors,
+            "hata_raporu": error_path,
+        }
+
+    def validate(self, frame: pd.DataFrame) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Group lines into fişler; returns (valid fişler, errors)."""
+        missing = [c for c in ("fis_no", "tarih", "hesap_kodu", "borc", "alacak") if c not in frame.columns]
+        if missing:
+            raise ValueError(f"Eksik sütun: {', '.join(missing)}")
+
+        # Plain records: per-group pandas access costs more than the checks
+        groups: Dict[str, List[Tuple[Any, Dict[str, Any]]]] = {}
+        for row_number, row in zip(frame.index, frame.to_dict("records")):
+            groups.setdefault(_text(row["fis_no"]), []).append((row_number, row))
+
+        fisler, errors = [], []
+        for fis_no, rows in groups.items():
+            fis_errors = []
+            dates = {_date(row["tarih"]) for _, row in rows}
+            if None in dates:
+                fis_errors.append((None, "geçersiz tarih"))
+            elif len(dates) > 1:
+                fis_errors.append((None, "fişin satırlarında farklı tarihler var"))
+            fis_date = next(iter(dates))
+
+            satirlar = []
+            for row_number, row in rows:
+                line, error = self._line(row)
+                if error:
+                    fis_errors.append((row_number, error))
+                else:
+                    satirlar.append(line)
+
+            if not fis_errors:
+                borc = sum(line["borc"] for line in satirlar)
+                alacak = sum(line["alacak"] for line in satirlar)
+                if len(satirlar) < 2:
+                    fis_errors.append((None, "fişte en az iki satır olmalı"))
+                elif borc != alacak:
+                    fis_errors.append((None, f"borç ({borc}) ve alacak ({alacak}) toplamları eşit değil"))
+
+            if fis_errors:
+                errors.extend({"fis_no": fis_no, "satir": row, "hata": error} for row, error in fis_errors)
+            else:
+                first = rows[0][1]
+                fisler.append({
+                    "fis_no": fis_no,
+                    "tarih": fis_date,
+                    "evrak_no": _text(first.get("evrak_no")),
+                    "aciklama": _text(first.get("aciklama")),
+                    "satirlar": satirlar,
+                })
+        return fisler, errors
+
+    def _line(self, row: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        code = _text(row["hesap_kodu"])
+        if not is_account_code(code):
+            return None, f"geçersiz hesap kodu: {code or '-'}"
+        if self.known_codes is not None and code not in self.known_codes:
+            return None, f"hesap planında olmayan hesap: {code}"
+        borc, alacak = _amount(row["borc"]), _amount(row["alacak"])
+        if borc is None or alacak is None or not borc.is_finite() or not alacak.is_finite():
+            return None, "tutar okunamadı"
+        if borc < 0 or alacak < 0 or borc.as_tuple().exponent < -2 or alacak.as_tuple().exponent < -2:
+            return None, "tutarlar pozitif ve en fazla iki ondalıklı olmalı"
+        if (borc > 0) == (alacak > 0):
+            return None, "satırda borç veya alacaktan yalnız biri olmalı"
+        return {
+            "hesap_kodu": code,
+            "aciklama": _text(row.get("aciklama")),
+            "borc": borc,
+            "alacak": alacak,
+        }, None
+
+    def _rows(self, fisler: List[Dict[str, Any]], spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+        columns = spec["columns"]
+        return [
+            {
+                columns["tarih"]: fis["tarih"].strftime(spec["date_format"]),
+                columns["fis_no"]: fis["fis_no"],
+                columns["evrak_no"]: fis["evrak_no"],
+                columns["hesap_kodu"]: line["hesap_kodu"],
+                columns["aciklama"]: line["aciklama"] or fis["aciklama"],
+                columns["borc"]: line["borc"],
+                columns["alacak"]: line["alacak"],
+            }
+            for fis in fisler for line in fis["satirlar"]
+        ]
+
+    def _write_table(self, fisler: List[Dict[str, Any]], spec: Dict[str, Any], path: str, extension: str):
+        frame = pd.DataFrame(self._rows(fisler, spec), columns=list(spec["columns"].values()))
+        amounts = [spec["columns"]["borc"], spec["columns"]["alacak"]]
+        if extension == "csv":
+            # Write Decimals as "1250,50" exactly, not through float
+            for column in amounts:
+                frame[column] = frame[column].map(lambda amount: f"{amount:.2f}".replace(".", ","))
+            frame.to_csv(path, index=False, sep=CSV_OPTIONS["sep"], encoding=CSV_OPTIONS["encoding"])
+            return
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            raise ValueError("Excel çıktısı için openpyxl kurulu olmalı (pip install openpyxl)")
+        for column in amounts:
+            frame[column] = frame[column].astype(float)
+        frame.to_excel(path, index=False, sheet_name="Fisler")
+
+    def _write_xml(self, fisler: List[Dict[str, Any]], spec: Dict[str, Any], path: str):
+        columns, tags = spec["columns"], spec.get("tags", IMPORT_FORMATS["dbs"]["tags"])
+        root = ET.Element(tags["root"])
+        for fis in fisler:
+            fis_elem = ET.SubElement(root, tags["fis"])
+            ET.SubElement(fis_elem, columns["fis_no"]).text = fis["fis_no"]
+            ET.SubElement(fis_elem, columns["tarih"]).text = fis["tarih"].strftime(spec["date_format"])
+            ET.SubElement(fis_elem, columns["evrak_no"]).text = fis["evrak_no"]
+            ET.SubElement(fis_elem, columns["aciklama"]).text = fis["aciklama"]
+            for line in fis["satirlar"]:
+                line_elem = ET.SubElement(fis_elem, tags["line"])
+                ET.SubElement(line_elem, columns["hesap_kodu"]).text = line["hesap_kodu"]
+                ET.SubElement(line_elem, columns["aciklama"]).text = line["aciklama"] or fis["aciklama"]
+                ET.SubElement(line_elem, columns["borc"]).text = f"{line['borc']:.2f}"
+                ET.SubElement(line_elem, columns["alacak"]).text = f"{line['alacak']:.2f}"
+        tree = ET.ElementTree(root)
+        ET.indent(tree)
+        tree.write(path, encoding="utf-8", xml_declaration=True)
+
+
+def load_lines(source: Union[str, pd.DataFrame, Iterable[Dict[str, Any]]]) -> pd.DataFrame:
+    """Read journal lines from a DataFrame, a list of dicts, or a .csv / .xlsx / .parquet file.
+
+    Files are read as text so amounts and codes keep their exact form
+    ("1.250,50", "120.01").
+    """
+    if isinstance(source, pd.DataFrame):
+        return source
+    if not isinstance(source, str):
+        return pd.DataFrame(list(source))
+    lower = source.lower()
+    if lower.endswith(".parquet"):
+        return pd.read_parquet(source)
+    if lower.endswith(".xlsx"):
+        return pd.read_excel(source, dtype=str)
+    with open(source, encoding="utf-8-sig") as f:
+        sep = ";" if ";" in f.readline() else ","
+    return pd.read_csv(source, sep=sep, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+
+
+def _amount(value: Any) -> Optional[Decimal]:
+    if value is None or (isinstance(value, float) and pd.isna(value)) or value == "":
+        return Decimal("0")
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, (int, float)):
+        try:
+            return Decimal(str(value))
+        except InvalidOperation:
+            return None
+    return parse_amount(str(value))
+
+
+def _date(value: Any) -> Optional[date]:
+    if isinstance(value, pd.Timestamp):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return parse_date(str(value)) if value is not None else None
+
+
+def _text(value: Any) -> str:
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return str(value).strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="fiş satırları (.csv, .xlsx veya .parquet)")
+    parser.add_argument("--system", choices=sorted(IMPORT_FORMATS), required=True)
+    parser.add_argument("-o", "--output", required=True, help=".xlsx, .csv veya .xml")
+    args = parser.parse_args()
+
+    summary = FisExporter().export(args.system, args.source, args.output)
+    print(f"{summary['fis']} fiş, {summary['satir']} satır -> {summary['dosya']}")
+    for error in summary["hatalar"]:
+        row = f" satır {error['satir']}" if error["satir"] is not None else ""
+        print(f"Fiş {error['fis_no']}{row}: {error['hata']}")
+
+
+if __name__ == "__main__":
+    main()
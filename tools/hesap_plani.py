@@ -1,65 +1,268 @@
-import re
-from typing import Dict, List
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import heapq
 import json
+import math
 import os
+import re
+from utils.extraction import ACCOUNT_PREFIX, Field, FieldExtractor
+from utils.turkish import analyze, ascii_fold, stem, tokenize
+
+# A code prefix ("1", "12", "120") or a sub-account ("120.01.001")
+FIELDS = FieldExtractor([
+    Field("code", ACCOUNT_PREFIX),
+])
+
+PAGE_SIZE = 10
+
+# "sayfa 2": which page of results to show
+_PAGE = re.compile(r"\bsayfa\s*(\d+)", re.IGNORECASE)
+
+# Words that say what the user wants rather than which account
+STOPWORDS = set(analyze("hesap hesabı hesapları planı bul ara lütfen nedir kodu hangi ne nolu no"))
+
+# Minimum trigram (Dice) similarity for a misspelled word to match a name
+# word, and how many of the closest name words it may match
+FUZZY_THRESHOLD = 0.5
+FUZZY_EXPANSIONS = 3
+
+
+def _trigrams(word: str) -> Set[str]:
+    padded = f"${word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "account", "count")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.account: Optional[int] = None
+        self.count = 0  # accounts in this subtree, including this node's
+
+
+class AccountIndex:
+    """In-memory search index over hesap planı accounts.
+
+    Codes go into a character trie whose nodes count the accounts below
+    them, so a prefix such as "120" or "120.01" pages through its
+    sub-accounts in code order without visiting the skipped ones. Names go
+    into an inverted index of Turkish-lower-cased, stemmed tokens. All are
+    built once at load and updated in place as accounts are added.
+
+    Query words that miss the inverted index are resolved against the
+    vocabulary of name words, ASCII-folded ("alicilar" finds "ALICILAR")
+    and then through a character-trigram index for typos ("alcilar"). The
+    vocabulary is far smaller than the chart, since sub-accounts repeat the
+    same words, so fuzzy lookups never scan the accounts themselves.
+    """
+
+    def __init__(self, accounts: Iterable[Dict] = ()):
+        self.accounts: List[Dict] = []
+        self._by_code: Dict[str, int] = {}
+        self._order: List[Tuple[int, str]] = []  # tie-break: main accounts first, then code
+        self._trie = _TrieNode()
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._vocab: Dict[str, Set[str]] = defaultdict(set)  # folded word -> index terms
+        self._grams: Dict[str, Set[str]] = defaultdict(set)  # trigram -> folded words
+        self._gram_counts: Dict[str, int] = {}
+        for account in accounts:
+            self.add(account)
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    def add(self, account: Dict):
+        """Index an account; an existing account with the same code is replaced."""
+        code = account["code"]
+        idx = self._by_code.get(code)
+        if idx is not None:
+            for term in set(analyze(self.accounts[idx]["name"])):
+                self._postings[term].discard(idx)
+            self.accounts[idx] = account
+        else:
+            idx = len(self.accounts)
+            self.accounts.append(account)
+            self._order.append((code.count("."), code))
+            self._by_code[code] = idx
+            node = self._trie
+            node.count += 1
+            for char in code:
+                node = node.children.setdefault(char, _TrieNode())
+                node.count += 1
+            node.account = idx
+        for token in set(tokenize(account["name"])):
+            term = stem(token)
+            self._postings[term].add(idx)
+            if token.isdigit():
+                continue
+            word = ascii_fold(token)
+            if word not in self._vocab:
+                grams = _trigrams(word)
+                for gram in grams:
+                    self._grams[gram].add(word)
+                self._gram_counts[word] = len(grams)
+            self._vocab[word].add(term)
+
+    def get(self, code: str) -> Optional[Dict]:
+        idx = self._by_code.get(code)
+        return self.accounts[idx] if idx is not None else None
+
+    def search(self, code: str = "", words: Iterable[str] = (), limit: int = PAGE_SIZE,
+               offset: int = 0) -> Tuple[int, List[Dict]]:
+        """Return (total matches, one page of accounts).
+
+        With only a code, accounts under that prefix are listed in code
+        order. With name words, accounts are ranked by how closely their
+        names match the words (1 per exact word, the trigram similarity for a
+        fuzzy one), then by the IDF weight of the matched words, main
+        accounts before their sub-accounts; a code restricts the ranking to
+        its prefix. IDF only breaks ties, so a common word spelled right
+        beats a rare word that merely looks alike ("alcilar" -> ALICILAR,
+        not SATICILAR).
+        """
+        n = len(self.accounts)
+        scores: Dict[int, Tuple[float, float]] = {}
+        for word in set(words):
+            # An account scores once per query word, through its best match
+            best: Dict[int, Tuple[float, float]] = {}
+            for term, similarity in self._expand(word).items():
+                ids = self._postings.get(term)
+                if not ids:
+                    continue
+                match = (similarity, math.log(1 + n / len(ids)))
+                for idx in ids:
+                    if match > best.get(idx, (0.0, 0.0)):
+                        best[idx] = match
+            for idx, (similarity, weight) in best.items():
+                total = scores.get(idx, (0.0, 0.0))
+                scores[idx] = (total[0] + similarity, total[1] + weight)
+        if code:
+            scores = {idx: score for idx, score in scores.items()
+                      if self.accounts[idx]["code"].startswith(code)}
+        # Words no account name contains ("120 nolu") don't narrow a code search
+        if not scores:
+            return self._by_prefix(code, limit, offset) if code else (0, [])
+
+        order = self._order
+        top = heapq.nsmallest(offset + limit, scores,
+                              key=lambda idx: (-scores[idx][0], -scores[idx][1], order[idx]))
+        return len(scores), [self.accounts[idx] for idx in top[offset:]]
+
+    def suggest(self, word: str) -> List[Tuple[str, float]]:
+        """Name words closest to a (possibly misspelled) word, best first."""
+        word = ascii_fold(word)
+        grams = _trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._grams.get(gram, ()))
+        scored = [
+            (candidate, 2 * count / (len(grams) + self._gram_counts[candidate]))
+            for candidate, count in shared.items()
+        ]
+        return sorted(
+            (item for item in scored if item[1] >= FUZZY_THRESHOLD), key=lambda item: -item[1]
+        )[:FUZZY_EXPANSIONS]
+
+    def _expand(self, word: str) -> Dict[str, float]:
+        """Index terms a query word stands for, with their similarity."""
+        term = stem(word)
+        if self._postings.get(term):
+            return {term: 1.0}
+        folded = ascii_fold(word)
+        if folded in self._vocab:
+            return dict.fromkeys(self._vocab[folded], 1.0)
+        expansions: Dict[str, float] = {}
+        for candidate, similarity in self.suggest(folded):
+            for term in self._vocab[candidate]:
+                expansions[term] = max(similarity, expansions.get(term, 0.0))
+        return expansions
+
+    def _by_prefix(self, prefix: str, limit: int, offset: int) -> Tuple[int, List[Dict]]:
+        node = self._trie
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return 0, []
+
+        total = node.count
+        results = []
+        stack = [node]
+        while stack and len(results) < limit:
+            node = stack.pop()
+            # Skip whole subtrees that fall before the requested page
+            if offset >= node.count:
+                offset -= node.count
+                continue
+            if node.account is not None:
+                if offset:
+                    offset -= 1
+                else:
+                    results.append(self.accounts[node.account])
+            # "." sorts before digits, so "120" < "120.01" < "121"
+            stack.extend(node.children[char] for char in sorted(node.children, reverse=True))
+        return total, results
+
 
 class HesapPlaniProcessor:
     def __init__(self):
         self.data_dir = "./data/hesap_plani"
         os.makedirs(self.data_dir, exist_ok=True)
-        self.accounts = self._load_accounts()
+        self.accounts_file = os.path.join(self.data_dir, "accounts.json")
+        self.index = AccountIndex(self._load_accounts())
+
+    @property
+    def accounts(self) -> List[Dict]:
+        return self.index.accounts
     
     async def search_account(self, message: str) -> str:
         """Search for account based on the message."""
         # Extract search criteria
+        page_match = _PAGE.search(message)
+        page = max(int(page_match.group(1)), 1) if page_match else 1
+        message = _PAGE.sub(" ", message)
         code = self._extract_code(message)
         keywords = self._extract_keywords(message)
         
         if not code and not keywords:
             return "Lütfen bir hesap kodu veya anahtar kelime belirtin."
         
-        # Search accounts
-        results = []
-        for account in self.accounts:
-            if code and account["code"].startswith(code):
-                results.append(account)
-            elif keywords:
-                if any(kw.lower() in account["name"].lower() for kw in keywords):
-                    results.append(account)
+        offset = (page - 1) * PAGE_SIZE
+        total, results = self.index.search(code, keywords, limit=PAGE_SIZE, offset=offset)
         
         if not results:
-            return "Hesap bulunamadı."
+            return "Hesap bulunamadı." if not total else f"Sayfa {page} boş; toplam {total} hesap bulundu."
         
         # Format response
-        response = "Bulunan Hesaplar:\n\n"
+        response = f"Bulunan Hesaplar ({offset + 1}-{offset + len(results)} / {total}):\n\n"
         for account in results:
             response += f"""
 {account['code']} - {account['name']}
-Tür: {account['type']}
-Grup: {account['group']}
+Tür: {account.get('type', '-')}
+Grup: {account.get('group', '-')}
 """
+        if offset + len(results) < total:
+            response += f"\nDevamı için: \"sayfa {page + 1}\""
         
         return response
+
+    def add_accounts(self, accounts: List[Dict]):
+        """Add or update accounts (e.g. client sub-accounts) and save the chart."""
+        for account in accounts:
+            self.index.add(account)
+        self._save_accounts(self.index.accounts)
     
     def _extract_code(self, message: str) -> str:
         """Extract account code from message."""
-        code_match = re.search(r'\b(\d{1,3})\b', message)
-        return code_match.group(1) if code_match else ""
+        return FIELDS.extract(message)["code"] or ""
     
     def _extract_keywords(self, message: str) -> List[str]:
-        """Extract search keywords from message."""
-        # Remove common words and punctuation
-        message = message.lower()
-        message = re.sub(r'hesap|planı|bul|ara|lütfen|[^\w\s]', '', message)
-        
-        # Split into words and remove empty strings
-        return [word.strip() for word in message.split() if word.strip()]
+        """Extract search words from message."""
+        return [word for word in tokenize(message) if stem(word) not in STOPWORDS and not word.isdigit()]
     
     def _load_accounts(self) -> List[Dict]:
         """Load account definitions."""
-        accounts_file = os.path.join(self.data_dir, "accounts.json")
-        
-        if not os.path.exists(accounts_file):
+        if not os.path.exists(self.accounts_file):
             # Create default accounts
             accounts = [
                 {
@@ -106,13 +309,18 @@ Grup: {account['group']}
                 }
             ]
             
-            # Save to file
-            with open(accounts_file, "w", encoding="utf-8") as f:
-                json.dump(accounts, f, ensure_ascii=False, indent=2)
+            self._save_accounts(accounts)
         
         else:
             # Load from file
-            with open(accounts_file, "r", encoding="utf-8") as f:
+            with open(self.accounts_file, "r", encoding="utf-8") as f:
                 accounts = json.load(f)
         
-        return accounts 
\ No newline at end of file
+        return accounts
+
+    def _save_accounts(self, accounts: List[Dict]):
+        # Write to a temp file first so a crash never leaves a truncated chart
+        tmp_path = self.accounts_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(accounts, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.accounts_file) 
\ No newline at end of file
@@ -1,5 +1,16 @@
-from typing import Dict, Any
-import re
+from decimal import Decimal, ROUND_HALF_UP
+from typing import TYPE_CHECKING, Optional, Tuple, Union
+from utils.extraction import AMOUNT, Field, FieldExtractor, format_amount, parse_amount, parse_rate
+from utils.turkish import turkish_lower
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# "1.250,50 TL için %20 KDV": the amount is any number that is not the rate
+FIELDS = FieldExtractor([
+    Field("rate", r"%\s*\d{1,2}(?!\d)|(?<![\d.,])\d{1,2}(?=\s*(?:%|(?i:kdv)))", parse_rate),
+    Field("amount", r"(?<!%)(?<!% )" + AMOUNT + r"(?!\s*(?:%|(?i:kdv)))", parse_amount),
+])
 
 class KDVCalculator:
     def __init__(self):
@@ -14,36 +25,57 @@ class KDVCalculator:
     async def calculate(self, message: str) -> str:
         """Calculate KDV based on the message."""
         # Extract amount and rate from message
-        amount_match = re.search(r'\b(\d+(?:\.\d{2})?)\b', message)
-        rate_match = re.search(r'%?(\d+)\s*(?:kdv|KDV)', message)
+        fields = FIELDS.extract(message)
+        amount = fields["amount"]
+        rate = fields["rate"] if fields["rate"] is not None else self._determine_rate(message)
+        
+        if amount is None:
+            return "Lütfen tutarı belirtin. Örnek: '1000 TL için %20 KDV hesapla'"
         
-        if not amount_match or not rate_match:
-            return "Lütfen tutarı ve KDV oranını belirtin. Örnek: '1000 TL için %18 KDV hesapla'"
+        if rate is None:
+            # No default rate: a guessed %20 would look like a real answer
+            return (f"Lütfen KDV oranını belirtin (geçerli oranlar: {', '.join(map(str, self.kdv_rates.keys()))}%). "
+                    f"Örnek: '{format_amount(amount)} TL için %20 KDV hesapla' veya "
+                    f"'{format_amount(amount)} TL KDV istisna hesapla'")
         
-        amount = float(amount_match.group(1))
-        rate = int(rate_match.group(1))
+        if rate == 0:
+            return f"""
+KDV Hesaplama Sonucu:
+- Matrah: {format_amount(amount)} TL
+- KDV Oranı: İstisna (KDV hesaplanmaz)
+- KDV Tutarı: 0,00 TL
+- Toplam: {format_amount(amount)} TL
+"""
         
         if rate not in self.kdv_rates:
             return f"Geçersiz KDV oranı. Geçerli oranlar: {', '.join(map(str, self.kdv_rates.keys()))}%"
         
-        kdv_amount = amount * self.kdv_rates[rate]
+        kdv_amount = (amount * rate / 100).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
         total_amount = amount + kdv_amount
         
         return f"""
 KDV Hesaplama Sonucu:
-- Matrah: {amount:.2f} TL
+- Matrah: {format_amount(amount)} TL
 - KDV Oranı: %{rate}
-- KDV Tutarı: {kdv_amount:.2f} TL
-- Toplam: {total_amount:.2f} TL
+- KDV Tutarı: {format_amount(kdv_amount)} TL
+- Toplam: {format_amount(total_amount)} TL
 """
+
+    def calculate_batch(self, source: Union[str, "pd.DataFrame"],
+                        turkish_numbers: bool = False) -> Tuple["pd.DataFrame", "pd.DataFrame"]:
+        """KDV and tevkifat for a table of invoice lines; returns (lines, per-rate summary)."""
+        # pandas is only needed here, not for chat calculations
+        from tools.kdv_batch import KDVBatchCalculator
+        return KDVBatchCalculator().run(source, turkish_numbers)
     
-    def _determine_rate(self, message: str) -> float:
-        """Determine which KDV rate to use based on message content."""
-        message = message.lower()
+    def _determine_rate(self, message: str) -> Optional[int]:
+        """The KDV rate implied by the wording (0 for istisna), or None if there is none."""
+        message = turkish_lower(message)
         
-        if "indirimli" in message or "düşük" in message:
-            return self.kdv_rates["2"]
-        elif "özel" in message or "istisna" in message:
-            return self.kdv_rates["3"]
-        else:
-            return self.kdv_rates["1"] 
\ No newline at end of file
+        if "istisna" in message:
+            return 0
+        elif "indirimli" in message or "düşük" in message:
+            return 10
+        elif "özel" in message:
+            return 1
+        return None
@@ -0,0 +1,129 @@
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+
+def file_sha256(file_path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PDFCache:
+    """Content-addressed on-disk cache of parsed PDFs.
+
+    Entries are keyed by the SHA-256 of the file bytes plus the parser
+    version, so a re-uploaded file hits regardless of its name and a parser
+    change invalidates old results. Each entry holds the page texts
+    (zlib-compressed) and the structured fields per document type. When the
+    stored size exceeds ``max_bytes`` the least recently used entries are
+    evicted.
+    """
+
+    def __init__(self, data_dir: str = "./data/cache", max_bytes: int = 256 * 1024 * 1024):
+        os.makedirs(data_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(os.path.join(data_dir, "pdf_cache.db"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                pages BLOB,
+                fields TEXT NOT NULL DEFAULT '{}',
+                size INTEGER NOT NULL DEFAULT 0,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+        """)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_pages(self, key: str) -> Optional[List[str]]:
+        """Return the cached page texts of a file or None."""
+        row = self._get(key, "pages")
+        if row is None or row[0] is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put_pages(self, key: str, pages: List[str]):
+        """Store the page texts of a file."""
+        blob = zlib.compress(json.dumps(pages, ensure_ascii=False).encode("utf-8"))
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO entries (key, pages, last_used) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET pages = excluded.pages, last_used = excluded.last_used",
+                (key, blob, time.time())
+            )
+            self._update_size(key)
+            self._evict()
+
+    def get_fields(self, key: str, kind: str) -> Optional[Dict[str, Any]]:
+        """Return the cached structured fields of a file for one document type."""
+        row = self._get(key, "fields")
+        fields = json.loads(row[0]).get(kind) if row else None
+        if fields is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return fields
+
+    def put_fields(self, key: str, kind: str, fields: Dict[str, Any]):
+        """Store the structured fields of a file for one document type."""
+        with self._lock, self.conn:
+            row = self.conn.execute("SELECT fields FROM entries WHERE key = ?", (key,)).fetchone()
+            all_fields = json.loads(row[0]) if row else {}
+            all_fields[kind] = fields
+            self.conn.execute(
+                "INSERT INTO entries (key, fields, last_used) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET fields = excluded.fields, last_used = excluded.last_used",
+                (key, json.dumps(all_fields, ensure_ascii=False), time.time())
+            )
+            self._update_size(key)
+            self._evict()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT coalesce(sum(size), 0) FROM entries").fetchone()[0]
+
+    def clear(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM entries")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self.conn.execute("SELECT count(*) FROM entries").fetchone()[0]
+        return {"entries": entries, "bytes": self.total_bytes(), "hits": self.hits, "misses": self.misses}
+
+    def _get(self, key: str, column: str):
+        with self._lock, self.conn:
+            row = self.conn.execute(f"SELECT {column} FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row
+
+    def _update_size(self, key: str):
+        self.conn.execute(
+            "UPDATE entries SET size = coalesce(length(pages), 0) + length(fields) WHERE key = ?", (key,)
+        )
+
+    def _evict(self):
+        total = self.conn.execute("SELECT coalesce(sum(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.conn.execute("SELECT key, size FROM entries ORDER BY last_used").fetchall():
+            self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
@@ -0,0 +1,204 @@
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Any, Dict, IO, Iterator, List, Optional, Union
+import xml.etree.ElementTree as ET
+import zipfile
+
+NS = {
+    "inv": "urn:oasis:names:specification:ubl:schema:xsd:Invoice-2",
+    "cac": "urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2",
+    "cbc": "urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2",
+}
+
+INVOICE_TAG = f"{{{NS['inv']}}}Invoice"
+KDV_TAX_CODE = "0015"
+
+# Large parts of an invoice we never read: the embedded XSLT view (base64),
+# XAdES signatures and extensions. Cleared as soon as they are parsed.
+_DISCARD_TAGS = {
+    f"{{{NS['cbc']}}}EmbeddedDocumentBinaryObject",
+    "{http://www.w3.org/2000/09/xmldsig#}Signature",
+    "{urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2}UBLExtensions",
+}
+
+
+class UBLParser:
+    """Streaming reader for UBL-TR e-fatura / e-arşiv XML.
+
+    ``iter_invoices`` walks the document with ``iterparse`` and yields one
+    dict per ``Invoice`` element, whether the file holds a single invoice or
+    an envelope/bundle with thousands. Each invoice subtree is detached once
+    read, so memory stays bounded by the largest single invoice. Amounts are
+    ``Decimal`` and dates are ``datetime.date``.
+    """
+
+    def iter_invoices(self, source: Union[str, IO[bytes]]) -> Iterator[Dict[str, Any]]:
+        """Yield invoices from an XML file (path or binary file object)."""
+        stack = []
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                stack.append(elem)
+                continue
+            stack.pop()
+            if elem.tag in _DISCARD_TAGS:
+                elem.clear()
+            elif elem.tag == INVOICE_TAG:
+                yield self.parse_invoice(elem)
+                if stack:
+                    stack[-1].remove(elem)
+                elem.clear()
+
+    def iter_archive(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Yield invoices from every XML member of a ZIP archive.
+
+        Each invoice gets a ``kaynak`` key naming the archive member.
+        """
+        with zipfile.ZipFile(path) as zf:
+            for member in sorted(zf.namelist()):
+                if member.lower().endswith(".xml"):
+                    with zf.open(member) as f:
+                        for invoice in self.iter_invoices(f):
+                            invoice["kaynak"] = member
+                            yield invoice
+
+    def parse_invoice(self, invoice: ET.Element) -> Dict[str, Any]:
+        """Read the typed fields of one Invoice element."""
+        currency = _text(invoice, "cbc:DocumentCurrencyCode") or "TRY"
+        taxes = [self._subtotal(s) for s in invoice.findall(_q("cac:TaxTotal/cac:TaxSubtotal"))]
+        withholdings = [self._subtotal(s) for s in invoice.findall(_q("cac:WithholdingTaxTotal/cac:TaxSubtotal"))]
+        kdv = [tax for tax in taxes if tax["kod"] == KDV_TAX_CODE]
+        totals = invoice.find(_q("cac:LegalMonetaryTotal"))
+
+        return {
+            "fatura_no": _text(invoice, "cbc:ID"),
+            "ettn": _text(invoice, "cbc:UUID"),
+            "tarih": _date(_text(invoice, "cbc:IssueDate")),
+            "profil": _text(invoice, "cbc:ProfileID"),
+            "tip": _text(invoice, "cbc:InvoiceTypeCode"),
+            "para_birimi": currency,
+            "satici": self._party(invoice.find(_q("cac:AccountingSupplierParty/cac:Party"))),
+            "alici": self._party(invoice.find(_q("cac:AccountingCustomerParty/cac:Party"))),
+            "satirlar": [self._line(line) for line in invoice.findall(_q("cac:InvoiceLine"))],
+            "kdv": kdv,
+            "diger_vergiler": [tax for tax in taxes if tax["kod"] != KDV_TAX_CODE],
+            "kdv_toplam": sum((tax["tutar"] or Decimal("0") for tax in kdv), Decimal("0")),
+            "tevkifat": withholdings,
+            "tevkifat_toplam": sum((tax["tutar"] or Decimal("0") for tax in withholdings), Decimal("0")),
+            "toplamlar": {
+                "mal_hizmet": _amount(totals, "cbc:LineExtensionAmount"),
+                "vergi_haric": _amount(totals, "cbc:TaxExclusiveAmount"),
+                "vergi_dahil": _amount(totals, "cbc:TaxInclusiveAmount"),
+                "iskonto": _amount(totals, "cbc:AllowanceTotalAmount"),
+                "odenecek": _amount(totals, "cbc:PayableAmount"),
+            },
+        }
+
+    def _party(self, party: Optional[ET.Element]) -> Dict[str, Optional[str]]:
+        if party is None:
+            return {"vkn": None, "tckn": None, "unvan": None, "vergi_dairesi": None}
+        ids = {
+            (ident.get("schemeID") or "").upper(): (ident.text or "").strip()
+            for ident in party.findall(_q("cac:PartyIdentification/cbc:ID"))
+        }
+        name = _text(party, "cac:PartyName/cbc:Name")
+        if not name:
+            person = " ".join(filter(None, [
+                _text(party, "cac:Person/cbc:FirstName"), _text(party, "cac:Person/cbc:FamilyName")
+            ]))
+            name = person or None
+        return {
+            "vkn": ids.get("VKN"),
+            "tckn": ids.get("TCKN"),
+            "unvan": name,
+            "vergi_dairesi": _text(party, "cac:PartyTaxScheme/cac:TaxScheme/cbc:Name"),
+        }
+
+    def _line(self, line: ET.Element) -> Dict[str, Any]:
+        quantity = line.find(_q("cbc:InvoicedQuantity"))
+        kdv = [self._subtotal(s) for s in line.findall(_q("cac:TaxTotal/cac:TaxSubtotal"))]
+        kdv = [tax for tax in kdv if tax["kod"] == KDV_TAX_CODE]
+        withholding = line.find(_q("cac:WithholdingTaxTotal/cac:TaxSubtotal"))
+        return {
+            "sira": _text(line, "cbc:ID"),
+            "ad": _text(line, "cac:Item/cbc:Name"),
+            "miktar": _decimal(quantity.text if quantity is not None else None),
+            "birim": quantity.get("unitCode") if quantity is not None else None,
+            "birim_fiyat": _amount(line, "cac:Price/cbc:PriceAmount"),
+            "tutar": _amount(line, "cbc:LineExtensionAmount"),
+            "kdv_orani": kdv[0]["oran"] if kdv else None,
+            "kdv_tutari": kdv[0]["tutar"] if kdv else None,
+            "tevkifat": self._subtotal(withholding) if withholding is not None else None,
+        }
+
+    def _subtotal(self, subtotal: ET.Element) -> Dict[str, Any]:
+        return {
+            "kod": _text(subtotal, "cac:TaxCategory/cac:TaxScheme/cbc:TaxTypeCode"),
+            "ad": _text(subtotal, "cac:TaxCategory/cac:TaxScheme/cbc:Name"),
+            "oran": _amount(subtotal, "cbc:Percent"),
+            "matrah": _amount(subtotal, "cbc:TaxableAmount"),
+            "tutar": _amount(subtotal, "cbc:TaxAmount"),
+            "muafiyet": _text(subtotal, "cac:TaxCategory/cbc:TaxExemptionReasonCode"),
+        }
+
+
+def invoice_row(invoice: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten an invoice into one table row for batch output."""
+    return {
+        "fatura_no": invoice["fatura_no"],
+        "tarih": invoice["tarih"].strftime("%d.%m.%Y") if invoice["tarih"] else None,
+        "firma": invoice["satici"]["unvan"],
+        "satici_vkn": invoice["satici"]["vkn"] or invoice["satici"]["tckn"],
+        "alici_vkn": invoice["alici"]["vkn"] or invoice["alici"]["tckn"],
+        "matrah": invoice["toplamlar"]["vergi_haric"],
+        "kdv": invoice["kdv_toplam"],
+        "tevkifat": invoice["tevkifat_toplam"],
+        "tutar": invoice["toplamlar"]["odenecek"],
+    }
+
+
+def parse_file_rows(path: str) -> List[Dict[str, Any]]:
+    """Table rows of every invoice in an XML file; runs in a worker process."""
+    return [invoice_row(invoice) for invoice in UBLParser().iter_invoices(path)]
+
+
+@lru_cache(maxsize=None)
+def _q(path: str) -> str:
+    """Expand "cac:Party/cbc:Name" to Clark notation once.
+
+    ElementPath re-normalizes a namespaces mapping on every call, which
+    dominated parse time; pre-expanded paths skip that.
+    """
+    return "/".join(
+        "{%s}%s" % (NS[step.split(":")[0]], step.split(":")[1]) if ":" in step else step
+        for step in path.split("/")
+    )
+
+
+def _text(elem: Optional[ET.Element], path: str) -> Optional[str]:
+    if elem is None:
+        return None
+    found = elem.find(_q(path))
+    if found is None or found.text is None:
+        return None
+    return found.text.strip() or None
+
+
+def _decimal(value: Optional[str]) -> Optional[Decimal]:
+    if value is None:
+        return None
+    try:
+        return Decimal(value.strip())
+    except InvalidOperation:
+        return None
+
+
+def _amount(elem: Optional[ET.Element], path: str) -> Optional[Decimal]:
+    return _decimal(_text(elem, path))
+
+
+def _date(value: Optional[str]) -> Optional[date]:
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
@@ -0,0 +1,149 @@
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import re
+from utils.turkish import turkish_lower
+
+# Patterns start with a plain \d and check what precedes it afterwards
+# ("\d(?<!\d\d)" rather than "(?<!\d)\d"): a leading lookbehind stops the
+# regex engine from skipping ahead to candidate characters, which made
+# scans several times slower on long texts.
+
+# Amounts in Turkish ("1.250,50") or English ("1,250.50") notation, or plain
+# ("1250.50", "1250,5"). Digits glued to other digits, dots or commas are not
+# amounts, so "15.01.2024" is not read as 15.01.
+AMOUNT = r"\d(?<![\d.,]\d)(?:\d{0,2}(?:[.,]\d{3})+|\d*)(?:[.,]\d{1,2})?(?![.,]?\d)"
+
+MONTHS = {
+    "ocak": 1, "şubat": 2, "mart": 3, "nisan": 4, "mayıs": 5, "haziran": 6,
+    "temmuz": 7, "ağustos": 8, "eylül": 9, "ekim": 10, "kasım": 11, "aralık": 12,
+}
+
+# dd.mm.yyyy / dd/mm/yyyy / dd-mm-yyyy, ISO yyyy-mm-dd and "15 Ocak 2024"
+DATE = (
+    r"\d(?<!\d\d)(?:\d?[./-]\d{1,2}[./-]\d{4}|\d{3}-\d{2}-\d{2}"
+    r"|\d?\s+(?i:" + "|".join(MONTHS) + r")\s+\d{4})(?!\d)"
+)
+
+# "%20", "% 20", "20%"
+RATE = r"%\s*\d{1,2}(?!\d)|\d(?<![\d.,]\d)\d?\s*%"
+
+# Hesap planı codes: "191", "120.01", "320.01.001", "120.01.0457". Every
+# tool that reads or writes a code uses these, so a code the extractor
+# finds is one the import files accept.
+_SUB_ACCOUNTS = r"(?:\.\d{2,4})*"
+ACCOUNT_CODE = r"\d(?<![\d.,]\d)\d{2}" + _SUB_ACCOUNTS + r"(?![\d,]|\.\d)"
+# A code or a prefix of one ("1", "12"), for searching the hesap planı
+ACCOUNT_PREFIX = r"\d(?<![\d.,]\d)(?:\d{2}" + _SUB_ACCOUNTS + r"|\d?)(?![\d,]|\.\d)"
+_ACCOUNT_CODE_ONLY = re.compile(r"\d{3}" + _SUB_ACCOUNTS)
+
+_DATE_PARTS = re.compile(r"(\d{1,4})[./\-\s]+(\w+)[./\-\s]+(\d{1,4})")
+
+
+def parse_amount(text: str) -> Optional[Decimal]:
+    """Parse "1.250,50", "1,250.50", "1250,5" or "1250.50" into a Decimal.
+
+    When both separators appear the last one is the decimal separator. A
+    single separator followed by exactly three digits is a thousands
+    separator ("1.250" is 1250), otherwise it is the decimal separator.
+    """
+    text = text.strip()
+    if "," in text and "." in text:
+        decimal_sep = "," if text.rfind(",") > text.rfind(".") else "."
+        thousands_sep = "." if decimal_sep == "," else ","
+        text = text.replace(thousands_sep, "").replace(decimal_sep, ".")
+    elif "," in text or "." in text:
+        sep = "," if "," in text else "."
+        whole, _, fraction = text.rpartition(sep)
+        if len(fraction) == 3 or text.count(sep) > 1:
+            text = text.replace(sep, "")
+        else:
+            text = whole.replace(sep, "") + "." + fraction
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        return None
+
+
+def parse_date(text: str) -> Optional[date]:
+    """Parse "15.01.2024", "15/01/2024", "2024-01-15" or "15 Ocak 2024"."""
+    match = _DATE_PARTS.search(text.strip())
+    if not match:
+        return None
+    first, month, last = match.groups()
+    month = MONTHS.get(turkish_lower(month)) or month
+    try:
+        if len(first) == 4:
+            return date(int(first), int(month), int(last))
+        return date(int(last), int(month), int(first))
+    except ValueError:
+        return None
+
+
+def parse_rate(text: str) -> Optional[int]:
+    """Parse "%20" or "20 %" into 20."""
+    digits = re.sub(r"\D", "", text)
+    return int(digits) if digits else None
+
+
+def is_account_code(text: str) -> bool:
+    """Whether ``text`` is exactly one hesap planı code, e.g. "120.01.0457"."""
+    return _ACCOUNT_CODE_ONLY.fullmatch(text) is not None
+
+
+def format_amount(amount: Decimal) -> str:
+    """Format a Decimal in Turkish notation: 1250.5 -> "1.250,50"."""
+    return f"{amount:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+class Field:
+    """One named field: a regex and a converter for the matched value.
+
+    The value is the first capturing group of ``pattern`` if it has one,
+    otherwise the whole match. Use non-capturing groups for anything else,
+    and scoped flags such as ``(?i:...)`` instead of global ones.
+    ``convert`` may return None to reject a match (e.g. "31.02.2024"); the
+    next occurrence is then used.
+    """
+
+    def __init__(self, name: str, pattern: str, convert: Callable[[str], Any] = str.strip):
+        self.name = name
+        self.pattern = pattern
+        self.convert = convert
+        self.regex = re.compile(pattern)
+
+
+class FieldExtractor:
+    """Extracts a fixed set of fields from a text.
+
+    Patterns are compiled once when the extractor is built (module level in
+    each tool) and each field takes its first match whose value converts.
+    Fields are searched one after another rather than through one combined
+    alternation: CPython's regex engine can only skip ahead to a pattern's
+    literal prefix or first-character set when it searches for that pattern
+    alone, and losing that made a single combined pass several times slower
+    on long invoice texts (see benchmarks/bench_field_extraction.py).
+    """
+
+    def __init__(self, fields: List[Field]):
+        self.fields = {field.name: field for field in fields}
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        """Return {field name: typed value or None}."""
+        found = self.scan(text)
+        return {name: found[name][0] if name in found else None for name in self.fields}
+
+    def scan(self, text: str) -> Dict[str, Tuple[Any, int, int]]:
+        """Return {field name: (typed value, start, end)} for the fields found."""
+        found = {}
+        for name, field in self.fields.items():
+            for match in field.regex.finditer(text):
+                value = _convert(field, match.group(1) if field.regex.groups else match.group(0))
+                if value is not None:
+                    found[name] = (value, match.start(), match.end())
+                    break
+        return found
+
+
+def _convert(field: Field, raw: Optional[str]) -> Any:
+    return field.convert(raw) if raw is not None else None
@@ -0,0 +1,49 @@
+from functools import lru_cache
+from typing import List
+import logging
+import re
+import tiktoken
+
+ENCODING_NAME = "cl100k_base"
+
+logger = logging.getLogger(__name__)
+
+
+class ApproximateEncoding:
+    """Rough stand-in for a tiktoken encoding.
+
+    Used when the BPE file cannot be downloaded (offline servers). Words are
+    cut into pieces of up to 4 characters, which is close to BPE token counts
+    for Turkish text, and decode() restores the original text exactly.
+    """
+
+    _PIECE = re.compile(r"\s*\w{1,4}|\s*[^\w\s]|\s+")
+
+    def encode(self, text: str, disallowed_special=()) -> List[str]:
+        return self._PIECE.findall(text)
+
+    def decode(self, tokens: List[str]) -> str:
+        return "".join(tokens)
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str = ENCODING_NAME):
+    """Load a tiktoken encoding once per process."""
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning("tiktoken encoding %s unavailable (%s); using approximate token counts", name, e)
+        return ApproximateEncoding()
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text."""
+    return len(get_encoding().encode(text, disallowed_special=()))
+
+
+def split_tokens(text: str, max_tokens: int, overlap: int = 0) -> List[str]:
+    """Split text into pieces of at most max_tokens tokens, overlapping by overlap."""
+    encoding = get_encoding()
+    tokens = encoding.encode(text, disallowed_special=())
+    step = max(max_tokens - overlap, 1)
+    return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, max(len(tokens) - overlap, 1), step)]
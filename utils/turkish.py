@@ -0,0 +1,71 @@
+from functools import lru_cache
+from typing import List
+import re
+
+# Inflectional suffixes stripped by stem(), longest first within each group
+SUFFIXES = sorted([
+    # plural + possessive/case combinations
+    "lerinden", "larından", "lerinde", "larında", "lerine", "larına", "lerini", "larını",
+    "lerin", "ların", "leri", "ları", "ler", "lar",
+    # ablative / locative
+    "ından", "inden", "undan", "ünden", "ndan", "nden", "dan", "den", "tan", "ten",
+    "ında", "inde", "unda", "ünde", "nda", "nde", "da", "de", "ta", "te",
+    # genitive / dative / accusative / possessive
+    "nın", "nin", "nun", "nün", "ın", "in", "un", "ün",
+    "ına", "ine", "una", "üne", "na", "ne", "ya", "ye",
+    "nı", "ni", "nu", "nü", "yı", "yi", "yu", "yü",
+    "sı", "si", "su", "sü",
+    # instrumental
+    "yla", "yle", "la", "le",
+    # single vowels last
+    "ı", "i", "u", "ü", "a", "e",
+], key=len, reverse=True)
+
+MIN_STEM_LENGTH = 3
+
+_WORD = re.compile(r"\w+")
+
+
+def turkish_lower(text: str) -> str:
+    """Lower-case with Turkish rules: I -> ı and İ -> i."""
+    return text.replace("I", "ı").replace("İ", "i").lower()
+
+
+# Turkish letters to their closest ASCII letter; U+0307 is the combining dot
+# str.lower() leaves behind when it lower-cases "İ"
+_ASCII_FOLD = str.maketrans("çğıöşüâîû", "cgiosuaiu", "\u0307")
+
+
+def ascii_fold(text: str) -> str:
+    """Lower-case and drop Turkish diacritics: "ALICILAR" and "alıcılar" -> "alicilar"."""
+    return turkish_lower(text).translate(_ASCII_FOLD)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into Turkish-lower-cased word tokens."""
+    return _WORD.findall(turkish_lower(text))
+
+
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    """Strip inflectional suffixes, e.g. "beyannamesinin" -> "beyannam".
+
+    This is deliberately light: it only needs to map inflected forms of the
+    same word to one key, not to produce the dictionary root. Numbers are
+    left alone so "VUK 359" and "191" match exactly.
+    """
+    if token.isdigit():
+        return token
+    for _ in range(3):
+        for suffix in SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+                token = token[:-len(suffix)]
+                break
+        else:
+            break
+    return token
+
+
+def analyze(text: str) -> List[str]:
+    """Tokenize and stem text for lexical search."""
+    return [stem(token) for token in tokenize(text)]